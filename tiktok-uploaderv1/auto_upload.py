@@ -5,19 +5,87 @@ import sys
 import os
 from pathlib import Path
 
-# Proje root'unu path'e ekle
+# Proje root'unu path'e ekle, paket importları bu yüzden aşağıda
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
-from tiktok_uploader.upload import upload_videos
-from tiktok_uploader.auth import AuthBackend
+from tiktok_uploader.upload import UploadSession  # noqa: E402
+from tiktok_uploader.auth import AuthBackend  # noqa: E402
+from tiktok_uploader.jobs import JobStore, process_queue  # noqa: E402
+from tiktok_uploader.ledger import UploadLedger  # noqa: E402
+from tiktok_uploader.metrics import start_metrics_server_from_env  # noqa: E402
+
+
+def _video_for(path):
+    """Dosya adından hashtag açıklamalı video sözlüğü oluştur"""
+    return {
+        'path': str(path),
+        'description': f"#{Path(path).stem.replace(' ', '')}"
+    }
+
+
+def _find_cookies():
+    cookies_file = Path(project_root) / 'cookies.txt'
+    if not cookies_file.exists():
+        # Bir üst dizinde ara
+        cookies_file = Path(project_root).parent / 'cookies.txt'
+    
+    if not cookies_file.exists():
+        print("Hata: cookies.txt dosyası bulunamadı!")
+        print("Lütfen cookies.txt dosyasını proje klasörüne koyun.")
+        sys.exit(1)
+    return cookies_file
+
+
+def watch(folders):
+    """
+    Klasörleri izler, yazımı biten her yeni videoyu kuyruğa ekleyip yükler.
+    Tarayıcı açık ve yükleme sayfasında bekler; Ctrl+C ile durur.
+    """
+    from tiktok_uploader.watch import WatchDaemon
+
+    for folder_path in folders:
+        if not os.path.isdir(folder_path):
+            print(f"Hata: Klasör bulunamadı: {folder_path}")
+            sys.exit(1)
+
+    cookies_file = _find_cookies()
+    start_metrics_server_from_env()
+    auth = AuthBackend(cookies=str(cookies_file))
+
+    db_path = str(Path(project_root) / 'uploads.db')
+    store = JobStore(db_path)
+    ledger = UploadLedger(db_path)
+    retried = store.requeue_failed(max_attempts=3)
+    if retried:
+        print(f"{retried} başarısız video tekrar denenecek.")
+
+    with store, ledger, UploadSession(auth, ledger=ledger) as session:
+        daemon = WatchDaemon(folders, store, session, make_video=_video_for)
+        try:
+            daemon.run()
+        except KeyboardInterrupt:
+            print("\nİzleme durduruldu.")
+
 
 def main():
-    if len(sys.argv) < 2:
-        print("Kullanım: python auto_upload.py <klasor_yolu>")
+    args = sys.argv[1:]
+    if '--watch' in args:
+        # Converter her export'ta TIKTOK_UPLOAD_FOLDER ile çağırır
+        folders = [a for a in args if a != '--watch']
+        if not folders and os.environ.get('TIKTOK_UPLOAD_FOLDER'):
+            folders = [os.environ['TIKTOK_UPLOAD_FOLDER']]
+        if not folders:
+            print("Kullanım: python auto_upload.py --watch <klasor_yolu> [<klasor_yolu> ...]")
+            sys.exit(1)
+        watch(folders)
+        return
+
+    if len(args) < 1:
+        print("Kullanım: python auto_upload.py [--watch] <klasor_yolu>")
         sys.exit(1)
     
-    folder_path = sys.argv[1]
+    folder_path = args[0]
     
     if not os.path.isdir(folder_path):
         print(f"Hata: Klasör bulunamadı: {folder_path}")
@@ -36,36 +104,45 @@ def main():
         sys.exit(1)
     
     # Video listesi oluştur
-    videos = []
-    for video_file in sorted(video_files):
-        videos.append({
-            'path': str(video_file),
-            'description': f"#{Path(video_file).stem.replace(' ', '')}"
-        })
+    videos = [_video_for(video_file) for video_file in sorted(video_files)]
     
     print(f"{len(videos)} video bulundu. Yükleniyor...")
     
     # Cookies dosyasını bul
-    cookies_file = Path(project_root) / 'cookies.txt'
-    if not cookies_file.exists():
-        # Bir üst dizinde ara
-        cookies_file = Path(project_root).parent / 'cookies.txt'
+    cookies_file = _find_cookies()
     
-    if not cookies_file.exists():
-        print("Hata: cookies.txt dosyası bulunamadı!")
-        print("Lütfen cookies.txt dosyasını proje klasörüne koyun.")
-        sys.exit(1)
+    # TIKTOK_METRICS_PORT ayarlıysa Prometheus metriklerini yayınla
+    start_metrics_server_from_env()
     
     # Auth backend oluştur
     auth = AuthBackend(cookies=str(cookies_file))
     
-    # Videoları yükle
-    failed_videos = upload_videos(videos=videos, auth=auth)
+    # Kalıcı kuyruk: yarıda kalan bir çalışmadan sonra yalnızca
+    # yayınlanmamış videolar yüklenir, yayınlananlar tekrar yüklenmez
+    db_path = str(Path(project_root) / 'uploads.db')
+    store = JobStore(db_path)
+    # İçerik parmak izi: yeniden adlandırılmış/kopyalanmış videolar da atlanır
+    ledger = UploadLedger(db_path)
+    # İşler, ledger ile aynı hesap kimliğiyle kuyruğa alınır
+    new_jobs = store.enqueue_many(videos, auth.account_id)
+    retried = store.requeue_failed(max_attempts=3)
+    print(f"{len(new_jobs)} yeni video kuyruğa eklendi, {retried} başarısız video tekrar denenecek.")
+    
+    # Videoları tek bir tarayıcı oturumuyla yükle
+    with store, ledger, UploadSession(auth, ledger=ledger) as session:
+        process_queue(store, session)
+        failed_jobs = store.find('failed', auth.account_id)
+        review_jobs = store.find('review', auth.account_id)
+
+    if review_jobs:
+        print(f"\n{len(review_jobs)} video paylaşılırken yarıda kaldı, TikTok'ta kontrol edin:")
+        for job in review_jobs:
+            print(f"  - {job['video'].get('path', 'Bilinmeyen')}")
     
-    if failed_videos:
-        print(f"\n{len(failed_videos)} video yüklenemedi:")
-        for video in failed_videos:
-            print(f"  - {video.get('path', 'Bilinmeyen')}")
+    if failed_jobs:
+        print(f"\n{len(failed_jobs)} video yüklenemedi:")
+        for job in failed_jobs:
+            print(f"  - {job['video'].get('path', 'Bilinmeyen')}: {job['error']}")
     else:
         print("\nTüm videolar başarıyla yüklendi!")
 
@@ -0,0 +1,93 @@
+"""
+Page load benchmark of the resource blocking mode
+
+Loads the mock upload page in headless Chrome with and without
+`block_resources` and reports how long it takes until the file input can be
+used and how many bytes the server had to send for it.
+
+    python benchmarks/bench_blocking.py --loads 10
+    python benchmarks/bench_blocking.py --asset-latency 400 --json blocking.json
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_upload import point_config_at  # noqa: E402
+from mock_tiktok import DEFAULT_LATENCIES, MockTikTok  # noqa: E402
+
+from tiktok_uploader import config  # noqa: E402
+from tiktok_uploader.browsers import get_browser  # noqa: E402
+from tiktok_uploader.waits import wait_for  # noqa: E402
+
+# the mock serves its analytics from its own origin
+MOCK_ANALYTICS = "*/analytics/*"
+
+
+def measure(mock: MockTikTok, block: bool, loads: int, headed: bool) -> dict:
+    """
+    Loads the upload page `loads` times in one browser
+    """
+    driver = get_browser("chrome", headless=not headed, block_resources=block)
+    latencies, transferred = [], []
+    try:
+        for _ in range(loads):
+            sent = mock.bytes_sent
+            start = time.perf_counter()
+            driver.get(mock.upload_url)
+            wait_for(driver, config.selectors.upload.upload_video)
+            latencies.append(time.perf_counter() - start)
+            # late requests (the preview keeps streaming) are counted too
+            time.sleep(0.5)
+            transferred.append(mock.bytes_sent - sent)
+    finally:
+        driver.quit()
+
+    return {
+        "median": round(statistics.median(latencies), 3),
+        "max": round(max(latencies), 3),
+        "kilobytes": round(statistics.median(transferred) / 1024, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks resource blocking")
+    parser.add_argument("--loads", type=int, default=5, help="Page loads per mode")
+    parser.add_argument("--headed", action="store_true", help="Show the browser")
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument(
+        "--asset-latency",
+        type=int,
+        default=DEFAULT_LATENCIES["asset"],
+        help="ms before each script, font, image or video is served",
+    )
+    args = parser.parse_args()
+
+    with MockTikTok(latencies={"asset": args.asset_latency}) as mock:
+        point_config_at(mock)
+        config.resource_blocking.urls = [*config.resource_blocking.urls, MOCK_ANALYTICS]
+        results = {
+            mode: measure(mock, mode == "blocked", args.loads, args.headed)
+            for mode in ("default", "blocked")
+        }
+
+    print(f"{'mode':<10}{'ready median s':>16}{'ready max s':>13}{'KiB/load':>11}")
+    for mode, result in results.items():
+        print(
+            f"{mode:<10}{result['median']:>16.3f}{result['max']:>13.3f}"
+            f"{result['kilobytes']:>11.1f}"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
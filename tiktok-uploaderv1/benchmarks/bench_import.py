@@ -0,0 +1,131 @@
+"""
+Cold start benchmark of the command line entry points
+
+Every measurement runs in a fresh interpreter, the interpreter's own start
+up (`python -c pass`) is subtracted. Exits with status 1 when a scenario
+goes over its budget or when `--help` imports one of the heavy dependencies,
+so it can guard against start up regressions in CI.
+
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --runs 20 --help-budget 80 --config-budget 150
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+# none of these may be imported to print the usage
+HEAVY_MODULES = ("selenium", "webdriver_manager", "pydantic", "toml", "pytz")
+
+HELP = (
+    "import sys; sys.argv = ['tiktok-uploader', '--help']\n"
+    "from tiktok_uploader import __main__\n"
+    "try:\n"
+    "    __main__.main()\n"
+    "except SystemExit:\n"
+    f"    heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+    "    print('heavy:' + ','.join(heavy))\n"
+)
+CONFIG = "from tiktok_uploader import config; config.implicit_wait"
+
+
+def run(code: str, env: dict[str, str]) -> float:
+    """
+    Returns the wall time in milliseconds of running `code` in a new interpreter
+    """
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", code],
+        env=env,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return (time.perf_counter() - start) * 1000
+
+
+def measure(code: str, env: dict[str, str], runs: int, baseline: float) -> float:
+    """
+    Returns the median time in milliseconds on top of the interpreter start up
+    """
+    return statistics.median(run(code, env) for _ in range(runs)) - baseline
+
+
+def heavy_imports(env: dict[str, str]) -> list[str]:
+    """
+    Returns the heavy dependencies imported while printing the usage
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", HELP],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    line = next(line for line in output.splitlines() if line.startswith("heavy:"))
+    return [module for module in line[len("heavy:") :].split(",") if module]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks the start up time")
+    parser.add_argument("--runs", type=int, default=10, help="Runs per scenario")
+    parser.add_argument(
+        "--help-budget", type=float, default=100, help="ms allowed for --help"
+    )
+    parser.add_argument(
+        "--config-budget",
+        type=float,
+        default=150,
+        help="ms allowed to load the config from its cached snapshot",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache:
+        env = {
+            **os.environ,
+            "PYTHONPATH": os.pathsep.join(
+                filter(None, [str(SRC), os.environ.get("PYTHONPATH")])
+            ),
+            "TIKTOK_UPLOADER_CACHE_DIR": cache,
+        }
+        baseline = statistics.median(run("pass", env) for _ in range(args.runs))
+
+        results = {"--help": measure(HELP, env, args.runs, baseline)}
+        budgets = {"--help": args.help_budget}
+
+        try:
+            # the first access validates config.toml and writes the snapshot
+            results["config (validated)"] = run(CONFIG, env) - baseline
+            results["config (snapshot)"] = measure(CONFIG, env, args.runs, baseline)
+            budgets["config (snapshot)"] = args.config_budget
+        except subprocess.CalledProcessError:
+            print("config could not be loaded, are the dependencies installed?")
+
+        heavy = heavy_imports(env)
+
+    failed = bool(heavy)
+    print(f"interpreter start up: {baseline:.1f} ms\n")
+    print(f"{'scenario':<22}{'ms':>10}{'budget':>10}")
+    for name, value in results.items():
+        budget = budgets.get(name)
+        over = budget is not None and value > budget
+        failed = failed or over
+        limit = f"{budget:.0f}" if budget is not None else "-"
+        print(
+            f"{name:<22}{value:>10.1f}{limit:>10}" + ("  OVER BUDGET" if over else "")
+        )
+
+    if heavy:
+        print(f"\n--help imported {', '.join(heavy)}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+End-to-end upload benchmark against the mock TikTok page
+
+Drives headless Chrome through `UploadSession` against `mock_tiktok.py`
+and reports the throughput, the latency of every stage and the number of
+WebDriver commands each stage sends, so changes to the upload path can be
+measured without touching the real site.
+
+    python benchmarks/bench_upload.py --videos 5
+    python benchmarks/bench_upload.py --videos 20 --processing-latency 3000 --json results.json
+
+`--compare` puts the WebDriver commands of every stage next to the ones of
+an earlier `--json` file, e.g. one written before a change to the upload path:
+
+    git stash && python benchmarks/bench_upload.py --variant full --json before.json
+    git stash pop && python benchmarks/bench_upload.py --variant full --compare before.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from mock_tiktok import DEFAULT_LATENCIES, MockTikTok  # noqa: E402
+from pydantic import HttpUrl  # noqa: E402
+
+from tiktok_uploader import config  # noqa: E402
+from tiktok_uploader.auth import AuthBackend  # noqa: E402
+from tiktok_uploader.types import TimingRecord, VideoDict  # noqa: E402
+from tiktok_uploader.upload import UploadSession  # noqa: E402
+
+DESCRIPTION = "benchmark run with a few plain words #fyp #benchmark @tiktok done"
+
+
+def point_config_at(mock: MockTikTok) -> None:
+    """
+    Makes the uploader use the mock instead of tiktok.com
+    """
+    config.paths.main = HttpUrl(mock.url + "/")
+    config.paths.login = HttpUrl(mock.url + "/login/phone-or-email/email")
+    config.paths.upload = HttpUrl(mock.upload_url)
+
+
+def make_videos(folder: str, count: int, size: int, variant: str) -> list[VideoDict]:
+    """
+    Writes `count` dummy video files and returns the videos to upload
+    """
+    videos: list[VideoDict] = []
+    for idx in range(count):
+        path = os.path.join(folder, f"video{idx}.mp4")
+        with open(path, "wb") as file:
+            file.write(os.urandom(size))
+
+        video: VideoDict = {"path": path, "description": f"{DESCRIPTION} {idx}"}
+        if variant in ("visibility", "full"):
+            video["visibility"] = "only_you"
+        if variant in ("schedule", "full"):
+            # naive datetimes are read as local time and converted to UTC
+            video["schedule"] = datetime.datetime.now() + datetime.timedelta(days=1)
+        videos.append(video)
+    return videos
+
+
+def summarize(records: list[TimingRecord], elapsed: float, posted: int) -> dict:
+    """
+    Aggregates the per-video timing records
+    """
+    stages: dict[str, dict[str, list[float]]] = {}
+    for record in records:
+        for span in record["stages"]:
+            stage = stages.setdefault(
+                span["stage"], {"duration": [], "commands": [], "retries": []}
+            )
+            stage["duration"].append(span["duration"])
+            stage["commands"].append(span["commands"])
+            stage["retries"].append(span["retries"])
+
+    return {
+        "videos": len(records),
+        "posted": posted,
+        "elapsed": round(elapsed, 2),
+        "videos_per_minute": round(60 * len(records) / elapsed, 2) if elapsed else 0,
+        "commands_per_video": (
+            round(statistics.mean(r["commands"] for r in records), 1) if records else 0
+        ),
+        "stages": {
+            name: {
+                "median": round(statistics.median(values["duration"]), 3),
+                "p95": round(_percentile(values["duration"], 95), 3),
+                "commands": round(statistics.mean(values["commands"]), 1),
+                "retries": sum(values["retries"]),
+            }
+            for name, values in stages.items()
+        },
+    }
+
+
+def print_summary(summary: dict) -> None:
+    print(
+        f"\n{summary['posted']}/{summary['videos']} posted in {summary['elapsed']}s"
+        f" -> {summary['videos_per_minute']} videos/min,"
+        f" {summary['commands_per_video']} WebDriver commands/video\n"
+    )
+    print(f"{'stage':<24}{'median s':>10}{'p95 s':>10}{'commands':>10}{'retries':>9}")
+    for name, stage in summary["stages"].items():
+        print(
+            f"{name:<24}{stage['median']:>10.3f}{stage['p95']:>10.3f}"
+            f"{stage['commands']:>10.1f}{stage['retries']:>9}"
+        )
+
+
+def print_comparison(before: dict, after: dict) -> None:
+    """
+    Prints the commands per stage of two summaries side by side
+    """
+
+    def commands(summary: dict) -> dict[str, float]:
+        return {name: stage["commands"] for name, stage in summary["stages"].items()}
+
+    old, new = commands(before), commands(after)
+    old["per video"] = before["commands_per_video"]
+    new["per video"] = after["commands_per_video"]
+    names = [*after["stages"], *(name for name in before["stages"] if name not in new)]
+    print(f"\n{'commands':<24}{'before':>10}{'after':>10}{'change':>10}")
+    for name in [*names, "per video"]:
+        previous, current = old.get(name, 0.0), new.get(name, 0.0)
+        print(
+            f"{name:<24}{previous:>10.1f}{current:>10.1f}{current - previous:>+10.1f}"
+        )
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmarks uploads against a mock page"
+    )
+    parser.add_argument("--videos", type=int, default=5, help="Videos to upload")
+    parser.add_argument("--size", type=int, default=256 * 1024, help="Bytes per video")
+    parser.add_argument(
+        "--variant",
+        choices=["plain", "visibility", "schedule", "full"],
+        default="plain",
+        help="Which optional form fields to fill",
+    )
+    parser.add_argument("--post-now", action="store_true", help="Ask for 'Post now'")
+    parser.add_argument("--headed", action="store_true", help="Show the browser")
+    parser.add_argument("--json", help="Also write the summary to this file")
+    parser.add_argument("--compare", help="Compare the commands to this --json file")
+    for name, value in DEFAULT_LATENCIES.items():
+        parser.add_argument(f"--{name}-latency", type=int, default=value, help="ms")
+    args = parser.parse_args()
+
+    latencies = {name: getattr(args, f"{name}_latency") for name in DEFAULT_LATENCIES}
+    auth = AuthBackend(cookies_list=[{"name": "sessionid", "value": "benchmark"}])
+
+    with MockTikTok(latencies=latencies, post_now=args.post_now) as mock:
+        point_config_at(mock)
+        with tempfile.TemporaryDirectory() as folder:
+            videos = make_videos(folder, args.videos, args.size, args.variant)
+
+            with UploadSession(
+                auth, headless=not args.headed, skip_split_window=True
+            ) as session:
+                session.driver  # the browser start is not part of the measurement
+                start = time.perf_counter()
+                failed = session.upload_many(videos)
+                elapsed = time.perf_counter() - start
+
+        records = [video["timings"] for video in videos if "timings" in video]
+        summary = summarize(records, elapsed, len(videos) - len(failed))
+        summary["latencies"] = latencies
+        summary["received"] = len(mock.posts)
+
+    print_summary(summary)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            print_comparison(json.load(file), summary)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(summary, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,448 @@
+"""
+A local stand-in for TikTok's upload page
+
+Serves a page which follows the DOM contract the selectors in `config.toml`
+target (file input, processing marker, description editor, hashtag and
+mention popovers, interactivity checkboxes, visibility combobox, schedule
+pickers, post button and confirmation), with configurable artificial
+latencies. Posted forms are recorded so benchmarks can check what was sent.
+Like the real page it also pulls in an analytics script, a web font,
+thumbnails and a video preview, and counts the bytes it served.
+
+Run it on its own to poke at the page in a browser:
+
+    python benchmarks/mock_tiktok.py --port 8000
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+# milliseconds
+DEFAULT_LATENCIES = {
+    "processing": 1500,  # file selected -> resolution label and enabled post button
+    "popover": 300,  # typing a hashtag or mention -> suggestions
+    "dropdown": 200,  # opening the visibility combobox -> options
+    "post": 500,  # clicking post -> confirmation
+    "asset": 150,  # request for a script, font, image or video -> response
+}
+
+# path -> (content type, bytes), the weight of the real page's extras
+ASSETS = {
+    "/analytics/collect.js": ("application/javascript", 150_000),
+    "/static/sans.woff2": ("font/woff2", 120_000),
+    "/static/preview.mp4": ("video/mp4", 2_000_000),
+    **{f"/static/thumb-{idx}.jpg": ("image/jpeg", 200_000) for idx in range(6)},
+}
+
+HOME_PAGE = """<!doctype html>
+<html><head><title>TikTok - Make Your Day</title></head>
+<body><div id="root">Mock TikTok</div></body></html>
+"""
+
+UPLOAD_PAGE = """<!doctype html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>TikTok Studio</title>
+<script async src="/analytics/collect.js"></script>
+<style>
+  @font-face { font-family: MockSans; src: url(/static/sans.woff2) format('woff2'); }
+  body { font-family: MockSans, sans-serif; margin: 24px; }
+  .hidden { display: none; }
+  .row { margin: 12px 0; }
+  [contenteditable] { border: 1px solid #999; min-height: 48px; padding: 6px; }
+  .mention-list-popover { border: 1px solid #333; padding: 4px; }
+  .mention-list-popover > div { padding: 2px 4px; }
+  .mention-list-popover .selected { background: #fe2c55; color: white; }
+  .tiktok-timepicker-time-picker-container span { display: inline-block; padding: 2px 4px; cursor: pointer; }
+  .days-wrapper span, .arrow { display: inline-block; padding: 2px 4px; cursor: pointer; }
+  [role=option] { padding: 4px; cursor: pointer; }
+</style>
+</head>
+<body>
+<div id="root">
+  <div class="row">
+    <img src="/static/thumb-0.jpg" width="60"><img src="/static/thumb-1.jpg" width="60">
+    <img src="/static/thumb-2.jpg" width="60"><img src="/static/thumb-3.jpg" width="60">
+    <img src="/static/thumb-4.jpg" width="60"><img src="/static/thumb-5.jpg" width="60">
+    <video src="/static/preview.mp4" width="120" preload="auto" autoplay muted></video>
+  </div>
+  <div class="row"><input type="file" accept="video/*"></div>
+  <div class="row" id="processing"></div>
+
+  <div class="row">
+    <div contenteditable="true" id="caption"></div>
+    <div id="popover" class="mention-list-popover hidden"></div>
+  </div>
+
+  <div class="row">
+    <div><label>Comment</label><div><input type="checkbox" checked></div></div>
+    <div><label>Duet</label><div><input type="checkbox" checked></div></div>
+    <div><label>Stitch</label><div><input type="checkbox" checked></div></div>
+  </div>
+
+  <div class="row" data-e2e="video_visibility_container">
+    <button role="combobox" id="visibility">Everyone</button>
+    <div id="visibility-options"></div>
+  </div>
+
+  <div class="row">
+    <button id="tux-1" role="switch" aria-checked="false">Schedule</button>
+    <div id="schedule" class="hidden">
+      <div class="date-picker-input" id="date"></div>
+      <div id="calendar"></div>
+      <div class="time-picker-input" id="time"><span>00:00</span></div>
+      <div id="timepicker"></div>
+    </div>
+  </div>
+
+  <div class="row">
+    <button class="TUXButton--primary" data-e2e="post_video_button" data-disabled="true" id="post"><div>Post</div></button>
+  </div>
+  <div class="row" id="modal"></div>
+</div>
+
+<script>
+const LATENCY = __LATENCIES__;
+const POST_NOW = __POST_NOW__;
+const MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+                'August', 'September', 'October', 'November', 'December'];
+const pad = (n) => String(n).padStart(2, '0');
+const $ = (id) => document.getElementById(id);
+const state = { file: null, visibility: 'Everyone', scheduled: false,
+                year: 0, month: 0, day: 0, hour: 0, minute: 0 };
+
+// upload and processing
+document.querySelector('input[type=file]').addEventListener('change', (event) => {
+  const file = event.target.files[0];
+  if (!file) return;
+  state.file = file.name;
+  // the form is filled in right away, the post button waits for processing
+  if (!$('caption').textContent) $('caption').textContent = file.name.replace(/\\.[^.]+$/, '');
+  $('processing').innerHTML =
+    '<div role="progressbar" aria-valuenow="0" aria-valuemax="100">Uploading...</div>';
+  const started = Date.now();
+  const progress = setInterval(() => {
+    const bar = document.querySelector('[role=progressbar]');
+    const done = Math.min(99, 100 * (Date.now() - started) / LATENCY.processing);
+    if (bar) bar.setAttribute('aria-valuenow', String(Math.floor(done)));
+  }, 100);
+  setTimeout(() => {
+    clearInterval(progress);
+    $('processing').innerHTML = '<div class="resolution-label-text">1080P</div>';
+    $('post').setAttribute('data-disabled', 'false');
+  }, LATENCY.processing);
+});
+
+// hashtag and mention suggestions
+const caption = $('caption');
+const popover = $('popover');
+let popoverTimer = null;
+let selected = 0;
+
+function currentToken() {
+  const text = caption.textContent;
+  const match = text.match(/(^|\\s)([#@][^\\s#@]*)$/);
+  return match ? match[2] : null;
+}
+
+function placeCaretAtEnd() {
+  const range = document.createRange();
+  range.selectNodeContents(caption);
+  range.collapse(false);
+  const selection = window.getSelection();
+  selection.removeAllRanges();
+  selection.addRange(range);
+}
+
+function hidePopover() {
+  clearTimeout(popoverTimer);
+  popover.classList.add('hidden');
+  popover.innerHTML = '';
+}
+
+caption.addEventListener('input', () => {
+  hidePopover();
+  const token = currentToken();
+  if (!token || token.length < 2) return;
+  popoverTimer = setTimeout(() => {
+    const name = token.slice(1);
+    selected = 0;
+    if (token[0] === '#') {
+      popover.innerHTML = [token, token + 'challenge', token + 'tiktok']
+        .map((tag) => `<div><span class="hash-tag-topic">${tag}</span></div>`).join('');
+    } else {
+      popover.innerHTML = [name + '_fan', name, name + '.official']
+        .map((user) => `<div><span class="user-id">${user} </span><span>${user}</span></div>`).join('');
+    }
+    popover.firstElementChild.classList.add('selected');
+    popover.classList.remove('hidden');
+  }, LATENCY.popover);
+});
+
+caption.addEventListener('keydown', (event) => {
+  if (popover.classList.contains('hidden')) return;
+  const items = popover.children;
+  if (event.key === 'ArrowDown') {
+    event.preventDefault();
+    items[selected].classList.remove('selected');
+    selected = Math.min(selected + 1, items.length - 1);
+    items[selected].classList.add('selected');
+  } else if (event.key === 'Enter') {
+    event.preventDefault();
+    const token = currentToken();
+    const choice = items[selected].firstElementChild.textContent.trim();
+    const value = token[0] === '@' ? '@' + choice : choice;
+    caption.textContent = caption.textContent.slice(0, -token.length) + value + ' ';
+    hidePopover();
+    placeCaretAtEnd();
+  }
+});
+
+// visibility
+$('visibility').addEventListener('click', () => {
+  setTimeout(() => {
+    $('visibility-options').innerHTML = ['Everyone', 'Friends', 'Only you']
+      .map((label) => `<div role="option">${label}</div>`).join('');
+  }, LATENCY.dropdown);
+});
+$('visibility-options').addEventListener('click', (event) => {
+  const option = event.target.closest('[role=option]');
+  if (!option) return;
+  state.visibility = option.textContent;
+  $('visibility').textContent = option.textContent;
+  $('visibility-options').innerHTML = '';
+});
+
+// schedule
+$('tux-1').addEventListener('click', () => {
+  state.scheduled = !state.scheduled;
+  $('tux-1').setAttribute('aria-checked', String(state.scheduled));
+  $('schedule').classList.toggle('hidden', !state.scheduled);
+  const now = new Date();
+  state.year = now.getFullYear(); state.month = now.getMonth() + 1; state.day = now.getDate();
+  $('date').textContent = `${state.year}-${pad(state.month)}-${pad(state.day)}`;
+});
+
+let shownYear = 0, shownMonth = 0;
+function renderCalendar() {
+  const days = new Date(shownYear, shownMonth, 0).getDate();
+  let html = '<div class="calendar-wrapper"><span class="arrow">&lt;</span>'
+    + `<span class="month-title">${MONTHS[shownMonth - 1]}</span><span class="arrow">&gt;</span>`
+    + '<div class="jsx-4172176419 days-wrapper">';
+  for (let day = 1; day <= days; day++) html += `<span class="day valid">${day}</span>`;
+  $('calendar').innerHTML = html + '</div></div>';
+}
+$('date').addEventListener('click', () => {
+  shownYear = state.year; shownMonth = state.month;
+  renderCalendar();
+});
+$('calendar').addEventListener('click', (event) => {
+  const target = event.target;
+  if (target.classList.contains('arrow')) {
+    const forward = target.textContent === '>';
+    shownMonth += forward ? 1 : -1;
+    if (shownMonth === 13) { shownMonth = 1; shownYear++; }
+    if (shownMonth === 0) { shownMonth = 12; shownYear--; }
+    renderCalendar();
+  } else if (target.classList.contains('day')) {
+    state.year = shownYear; state.month = shownMonth; state.day = Number(target.textContent);
+    $('date').textContent = `${state.year}-${pad(state.month)}-${pad(state.day)}`;
+    $('calendar').innerHTML = '';
+  }
+});
+
+function renderTime() {
+  $('time').firstElementChild.textContent = `${pad(state.hour)}:${pad(state.minute)}`;
+}
+$('time').addEventListener('click', () => {
+  if ($('timepicker').innerHTML) { $('timepicker').innerHTML = ''; return; }
+  let html = '<div class="tiktok-timepicker-time-picker-container"><div>';
+  for (let hour = 0; hour < 24; hour++) html += `<span class="tiktok-timepicker-left">${pad(hour)}</span>`;
+  html += '</div><div>';
+  for (let minute = 0; minute < 60; minute += 5) html += `<span class="tiktok-timepicker-right">${pad(minute)}</span>`;
+  $('timepicker').innerHTML = html + '</div></div>';
+});
+$('timepicker').addEventListener('click', (event) => {
+  const target = event.target;
+  if (target.classList.contains('tiktok-timepicker-left')) state.hour = Number(target.textContent);
+  if (target.classList.contains('tiktok-timepicker-right')) state.minute = Number(target.textContent);
+  renderTime();
+});
+
+// post
+function confirm() {
+  const form = {
+    file: state.file,
+    description: caption.textContent,
+    visibility: state.visibility,
+    comment: document.querySelectorAll('input[type=checkbox]')[0].checked,
+    duet: document.querySelectorAll('input[type=checkbox]')[1].checked,
+    stitch: document.querySelectorAll('input[type=checkbox]')[2].checked,
+    schedule: state.scheduled
+      ? `${state.year}-${pad(state.month)}-${pad(state.day)}T${pad(state.hour)}:${pad(state.minute)}`
+      : null,
+  };
+  fetch('/api/post', { method: 'POST', body: JSON.stringify(form) }).finally(() => {
+    setTimeout(() => {
+      $('modal').innerHTML = '<div>Your video has been uploaded</div>';
+    }, LATENCY.post);
+  });
+}
+$('post').addEventListener('click', () => {
+  if ($('post').getAttribute('data-disabled') !== 'false') return;
+  if (POST_NOW) {
+    $('modal').innerHTML = '<button id="post-now"><div>Post now</div></button>';
+    $('post-now').addEventListener('click', confirm);
+  } else {
+    confirm();
+  }
+});
+</script>
+</body>
+</html>
+"""
+
+
+class MockTikTok:
+    """
+    Serves the mock pages from a background thread
+
+    Parameters
+    ----------
+    port : int
+        The port to listen on, a free one is picked when 0
+    latencies : dict
+        Overrides of `DEFAULT_LATENCIES`, in milliseconds
+    post_now : bool
+        Asks to confirm with a "Post now" button after clicking post
+    """
+
+    def __init__(
+        self,
+        port: int = 0,
+        latencies: dict[str, int] | None = None,
+        post_now: bool = False,
+    ):
+        self.latencies = {**DEFAULT_LATENCIES, **(latencies or {})}
+        self.post_now = post_now
+        self.posts: list[dict[str, Any]] = []
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    @property
+    def upload_url(self) -> str:
+        return f"{self.url}/creator-center/upload?lang=en"
+
+    def render_upload_page(self) -> str:
+        return UPLOAD_PAGE.replace("__LATENCIES__", json.dumps(self.latencies)).replace(
+            "__POST_NOW__", json.dumps(self.post_now)
+        )
+
+    def start(self) -> "MockTikTok":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="mock-tiktok", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockTikTok":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                path = self.path.split("?")[0]
+                if path.startswith("/creator-center/upload"):
+                    self._send(200, mock.render_upload_page())
+                elif path in ("/", "/login/phone-or-email/email"):
+                    self._send(200, HOME_PAGE)
+                elif path in ASSETS:
+                    time.sleep(mock.latencies["asset"] / 1000)
+                    self._send_asset(*ASSETS[path])
+                else:
+                    self._send(404, "Not found", "text/plain")
+
+            def do_POST(self) -> None:
+                if self.path != "/api/post":
+                    self._send(404, "Not found", "text/plain")
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                form = json.loads(self.rfile.read(length) or b"{}")
+                with mock._lock:
+                    mock.posts.append(form)
+                self._send(200, "{}", "application/json")
+
+            def _send(
+                self, status: int, body: str, content_type: str = "text/html"
+            ) -> None:
+                self._write(
+                    status, body.encode("utf-8"), f"{content_type}; charset=utf-8"
+                )
+
+            def _send_asset(self, content_type: str, size: int) -> None:
+                # a script has to parse, everything else is only downloaded
+                if content_type == "application/javascript":
+                    data = b"/*" + b"x" * (size - 4) + b"*/"
+                else:
+                    data = bytes(size)
+                self._write(200, data, content_type)
+
+            def _write(self, status: int, data: bytes, content_type: str) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                try:
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    return  # the browser gave up on a preview it did not need
+                with mock._lock:
+                    mock.bytes_sent += len(data)
+
+            def log_message(self, format, *args) -> None:
+                pass
+
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serves a mock TikTok upload page")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--post-now", action="store_true", help="Ask for 'Post now'")
+    for name, value in DEFAULT_LATENCIES.items():
+        parser.add_argument(f"--{name}-latency", type=int, default=value, help="ms")
+    args = parser.parse_args()
+
+    latencies = {name: getattr(args, f"{name}_latency") for name in DEFAULT_LATENCIES}
+    mock = MockTikTok(args.port, latencies, args.post_now)
+    print(f"Serving {mock.upload_url}")
+    try:
+        mock.start()._thread.join()  # type: ignore[union-attr]
+    except KeyboardInterrupt:
+        mock.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,6 @@
 """TikTok Video Yukleyici - Modern GUI Uygulamasi"""
 
 import os
-import random
 import threading
 import time
 from pathlib import Path
@@ -17,8 +16,9 @@ except ImportError:
 
 from tkinter import filedialog, messagebox, scrolledtext
 
-from tiktok_uploader.upload import upload_videos
 from tiktok_uploader.auth import AuthBackend
+from tiktok_uploader.ledger import UploadLedger
+from tiktok_uploader.metrics import start_metrics_server_from_env
 
 
 class TikTokUploaderGUI:
@@ -26,6 +26,7 @@ class TikTokUploaderGUI:
     
     # Varsayilan dosya yollari
     DEFAULT_COOKIES_FILE = "cookies.txt"
+    LEDGER_FILE = "uploads.db"
     
     def __init__(self):
         self._setup_appearance()
@@ -60,7 +61,12 @@ class TikTokUploaderGUI:
     def _init_variables(self):
         """Degiskenleri baslat"""
         self.videos: List[Dict] = []
+        # Ekli videolarin mutlak yollari (hizli tekrar kontrolu icin)
+        self.video_paths: set = set()
         self.cookies_path: Optional[str] = None
+        self.account_id: str = ""
+        # Daha once yuklenen videolarin kaydi
+        self.ledger = UploadLedger(str(Path(__file__).parent / self.LEDGER_FILE))
         self.is_uploading = False
         # Rastgele bekleme ayarlari
         self.delay_enabled = False
@@ -416,7 +422,7 @@ class TikTokUploaderGUI:
         cookies_file = app_dir / self.DEFAULT_COOKIES_FILE
         
         if cookies_file.exists():
-            self.cookies_path = str(cookies_file)
+            self._set_cookies_path(str(cookies_file))
             self.cookies_status_label.configure(
                 text=f"✓ {cookies_file.name} bulundu",
                 text_color=self.colors["success"]
@@ -450,13 +456,16 @@ class TikTokUploaderGUI:
             if video_files:
                 # Videoları ekle
                 for video_path in sorted(video_files):
+                    if self._is_already_uploaded(video_path):
+                        self._log(f"Atlandi (daha once yuklendi): {Path(video_path).name}")
+                        continue
                     if not self._is_duplicate(video_path):
                         video_info = {
                             "path": video_path,
                             "description": "",
                             "status": "Beklemede"
                         }
-                        self.videos.append(video_info)
+                        self._append_video(video_info)
                         self._add_video_to_list(video_info, len(self.videos) - 1)
                         self._log(f"✓ Video eklendi: {Path(video_path).name}")
                 
@@ -604,7 +613,7 @@ class TikTokUploaderGUI:
         )
         
         if file_path:
-            self.cookies_path = file_path
+            self._set_cookies_path(file_path)
             filename = Path(file_path).name
             self.cookies_status_label.configure(
                 text=f"✓ {filename}",
@@ -636,13 +645,16 @@ class TikTokUploaderGUI:
             if self._is_duplicate(file_path):
                 self._log(f"Atlandi (zaten ekli): {Path(file_path).name}")
                 continue
+            if self._is_already_uploaded(file_path):
+                self._log(f"Atlandi (daha once yuklendi): {Path(file_path).name}")
+                continue
                 
             video_info = {
                 "path": file_path,
                 "description": "",
                 "status": "Beklemede"
             }
-            self.videos.append(video_info)
+            self._append_video(video_info)
             self._add_video_to_list(video_info, len(self.videos) - 1)
             self._log(f"✓ Video eklendi: {Path(file_path).name}")
             
@@ -650,8 +662,27 @@ class TikTokUploaderGUI:
         
     def _is_duplicate(self, file_path: str) -> bool:
         """Video zaten ekli mi kontrol et"""
-        abs_path = os.path.abspath(file_path)
-        return any(os.path.abspath(v["path"]) == abs_path for v in self.videos)
+        return os.path.abspath(file_path) in self.video_paths
+        
+    def _is_already_uploaded(self, file_path: str) -> bool:
+        """Video bu hesaba daha once yuklendi mi kontrol et (icerik parmak izi ile)"""
+        try:
+            return self.ledger.is_uploaded(file_path, self.account_id)
+        except OSError:
+            return False
+        
+    def _append_video(self, video_info: Dict):
+        """Videoyu listeye ekle"""
+        self.videos.append(video_info)
+        self.video_paths.add(os.path.abspath(video_info["path"]))
+        
+    def _set_cookies_path(self, cookies_path: str):
+        """Cookies dosyasini ve hesap kimligini ayarla"""
+        self.cookies_path = cookies_path
+        try:
+            self.account_id = AuthBackend(cookies=cookies_path).account_id
+        except Exception:
+            self.account_id = ""
         
     def _add_video_to_list(self, video_info: Dict, index: int):
         """Video listesine ekle"""
@@ -729,6 +760,7 @@ class TikTokUploaderGUI:
         """Video listesinden sil"""
         if 0 <= index < len(self.videos):
             removed = self.videos.pop(index)
+            self.video_paths.discard(os.path.abspath(removed["path"]))
             self._log(f"✗ Video silindi: {Path(removed['path']).name}")
             self._refresh_video_list()
             self._update_empty_state()
@@ -794,6 +826,7 @@ class TikTokUploaderGUI:
             f"Tum {len(self.videos)} videoyu silmek istediginize emin misiniz?"
         ):
             self.videos.clear()
+            self.video_paths.clear()
             self._refresh_video_list()
             self._update_empty_state()
             self._log("Liste temizlendi")
@@ -854,82 +887,36 @@ class TikTokUploaderGUI:
             if delay_enabled:
                 self._log(f"Rastgele bekleme aktif: {delay_min}-{delay_max} dakika arasi\n")
             
-            # Her video icin yukleme
-            failed_videos = []
-            
-            for idx, video in enumerate(self.videos, 1):
+            # Her satiri yol uzerinden bul (durum guncellemeleri icin)
+            rows = {}
+            video_dicts = []
+            for video in self.videos:
                 filename = Path(video["path"]).name
-                video["status"] = "Hazirlaniyor"
-                video["status_label"].configure(text="Hazirlaniyor", text_color=self.colors["warning"])
-                self._log(f"[{idx}/{total}] Yukleme basladi: {filename}")
-                
-                # Tek video yukle
                 video_dict = {
                     "path": video["path"],
                     "description": video["description"] or filename
                 }
-                
-                try:
-                    failed = upload_videos(
-                        videos=[video_dict],
-                        auth=auth,
-                        headless=False
-                    )
-                    
-                    if failed:
-                        failed_videos.extend(failed)
-                        video["status"] = "Basarisiz"
-                        video["status_label"].configure(text="Basarisiz", text_color=self.colors["error"])
-                        error_msg = failed[0].get("error", "Bilinmeyen hata")
-                        self._log(f"✗ BASARISIZ: {filename}")
-                        self._log(f"  Hata: {error_msg}")
-                    else:
-                        video["status"] = "Basarili"
-                        video["status_label"].configure(text="Basarili", text_color=self.colors["success"])
-                        self._log(f"✓ BASARILI: {filename}")
-                        
-                except Exception as e:
-                    failed_videos.append({
-                        "path": video["path"],
-                        "error": str(e)
-                    })
-                    video["status"] = "Basarisiz"
-                    video["status_label"].configure(text="Basarisiz", text_color=self.colors["error"])
-                    self._log(f"✗ BASARISIZ: {filename}")
-                    self._log(f"  Hata: {str(e)}")
-                
-                # Son video degilse ve bekleme aktifse, rastgele bekle
-                if idx < total and delay_enabled:
-                    delay_seconds = random.randint(delay_min * 60, delay_max * 60)
-                    delay_minutes = delay_seconds / 60
-                    self._log(f"\n⏳ Sonraki video icin {delay_minutes:.1f} dakika bekleniyor...")
-                    
-                    # Geri sayim goster
-                    remaining = delay_seconds
-                    last_line = None
-                    while remaining > 0:
-                        mins = remaining // 60
-                        secs = remaining % 60
-                        countdown_msg = f"   Kalan sure: {mins:02d}:{secs:02d}"
-                        
-                        # Onceki satiri sil ve yenisini ekle
-                        if last_line:
-                            # Son satiri sil
-                            self.log_text.delete(f"end-{len(last_line)+1}c", "end-1c")
-                        
-                        self.log_text.insert("end", countdown_msg)
-                        self.log_text.see("end")
-                        self.root.update_idletasks()
-                        
-                        last_line = countdown_msg
-                        time.sleep(1)
-                        remaining -= 1
-                    
-                    # Geri sayim satirini temizle
-                    if last_line:
-                        self.log_text.delete(f"end-{len(last_line)+1}c", "end-1c")
-                    
-                    self._log("✓ Bekleme tamamlandi, sonraki video yukleniyor...\n")
+                rows[video["path"]] = video
+                video_dicts.append(video_dict)
+            
+            # Selenium sadece yukleme baslayinca yuklenir, pencere hemen acilir
+            from tiktok_uploader.upload import UploadSession
+
+            # Tek tarayici tum videolar icin kullanilir
+            session = UploadSession(
+                auth,
+                headless=False,
+                delay=(delay_min * 60, delay_max * 60) if delay_enabled else None,
+                on_status=lambda video_dict, status: self._on_upload_status(
+                    rows[video_dict["path"]], video_dict, status, total
+                ),
+                sleep=self._countdown,
+                ledger=self.ledger,
+            )
+            try:
+                failed_videos = session.upload_many(video_dicts)
+            finally:
+                session.close()
             
             # Sonuclari guncelle
             self.root.after(0, self._update_upload_results, failed_videos)
@@ -939,6 +926,64 @@ class TikTokUploaderGUI:
             error_details = traceback.format_exc()
             self.root.after(0, self._upload_error, str(e), error_details)
             
+    def _on_upload_status(self, video: Dict, video_dict: Dict, status: str, total: int):
+        """Yukleme oturumundan gelen durum degisikligini goster"""
+        filename = Path(video["path"]).name
+        if status == "preparing":
+            idx = self.videos.index(video) + 1
+            video["status"] = "Hazirlaniyor"
+            video["status_label"].configure(text="Hazirlaniyor", text_color=self.colors["warning"])
+            self._log(f"[{idx}/{total}] Yukleme basladi: {filename}")
+        elif status == "uploading":
+            video["status"] = "Yukleniyor"
+            video["status_label"].configure(text="Yukleniyor", text_color=self.colors["warning"])
+        elif status == "skipped":
+            video["status"] = "Atlandi"
+            video["status_label"].configure(text="Atlandi", text_color=self.colors["text_secondary"])
+            self._log(f"Atlandi (daha once yuklendi): {filename}")
+        elif status == "success":
+            video["status"] = "Basarili"
+            video["status_label"].configure(text="Basarili", text_color=self.colors["success"])
+            self._log(f"✓ BASARILI: {filename}")
+        elif status == "failed":
+            video["status"] = "Basarisiz"
+            video["status_label"].configure(text="Basarisiz", text_color=self.colors["error"])
+            self._log(f"✗ BASARISIZ: {filename}")
+            self._log(f"  Hata: {video_dict.get('error', 'Bilinmeyen hata')}")
+            
+    def _countdown(self, seconds: float):
+        """Videolar arasi bekleme sirasinda geri sayim goster"""
+        delay_seconds = int(seconds)
+        delay_minutes = delay_seconds / 60
+        self._log(f"\n⏳ Sonraki video icin {delay_minutes:.1f} dakika bekleniyor...")
+        
+        # Geri sayim goster
+        remaining = delay_seconds
+        last_line = None
+        while remaining > 0:
+            mins = remaining // 60
+            secs = remaining % 60
+            countdown_msg = f"   Kalan sure: {mins:02d}:{secs:02d}"
+            
+            # Onceki satiri sil ve yenisini ekle
+            if last_line:
+                # Son satiri sil
+                self.log_text.delete(f"end-{len(last_line)+1}c", "end-1c")
+            
+            self.log_text.insert("end", countdown_msg)
+            self.log_text.see("end")
+            self.root.update_idletasks()
+            
+            last_line = countdown_msg
+            time.sleep(1)
+            remaining -= 1
+        
+        # Geri sayim satirini temizle
+        if last_line:
+            self.log_text.delete(f"end-{len(last_line)+1}c", "end-1c")
+        
+        self._log("✓ Bekleme tamamlandi, sonraki video yukleniyor...\n")
+            
     def _update_upload_results(self, failed_videos: List[Dict]):
         """Yukleme sonuclarini guncelle"""
         failed_paths = {os.path.abspath(v.get("path", "")) for v in failed_videos}
@@ -966,6 +1011,9 @@ class TikTokUploaderGUI:
                 filename = Path(video["path"]).name
                 self._log(f"\n✗ BASARISIZ: {filename}")
                 self._log(f"  Hata: {error_msg}")
+            elif video["status"] == "Atlandi":
+                filename = Path(video["path"]).name
+                self._log(f"\n- ATLANDI: {filename}")
             else:
                 video["status"] = "Basarili"
                 video["status_label"].configure(text="Basarili", text_color=self.colors["success"])
@@ -1113,5 +1161,7 @@ class TikTokUploaderGUI:
 
 
 if __name__ == "__main__":
+    # TIKTOK_METRICS_PORT ayarliysa Prometheus metriklerini yayinla
+    start_metrics_server_from_env()
     app = TikTokUploaderGUI()
     app.run()
@@ -1,23 +1,79 @@
 """
 TikTok Uploader Initialization
+
+`config` and `logger` are created on first access, so importing the package
+(or running `tiktok-uploader --help`) does not load the config, selenium or
+any other heavy dependency up front.
 """
 
-import logging
+import sys
+import threading
+from collections.abc import Callable
 from os.path import abspath, dirname, join
+from types import ModuleType
+from typing import TYPE_CHECKING, cast
+
+if TYPE_CHECKING:
+    import logging
 
-from tiktok_uploader.config import load_config
+    from tiktok_uploader.config import TikTokConfig
+
+    # a `ConfigSnapshot` at runtime, which has the attributes of the model
+    config: TikTokConfig
+    logger: logging.Logger
 
-## Load Config
 config_dir = abspath(dirname(__file__))
-config = load_config(join(config_dir, "config.toml"))
 
-## Setup Logging
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
 
-formatter = logging.Formatter("%(asctime)s %(message)s", datefmt="[%H:%M:%S]")
+def _load_config() -> "TikTokConfig":
+    from tiktok_uploader.config_cache import load_settings
+
+    # the snapshot has the same attributes as the validated model
+    return cast("TikTokConfig", load_settings(join(config_dir, "config.toml")))
+
+
+def _setup_logger() -> "logging.Logger":
+    import logging
+
+    logger = logging.getLogger(__name__)
+    logger.setLevel(logging.DEBUG)
+
+    formatter = logging.Formatter("%(asctime)s %(message)s", datefmt="[%H:%M:%S]")
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setLevel(logging.DEBUG)
+    stream_handler.setFormatter(formatter)
+    logger.addHandler(stream_handler)
+    return logger
+
+
+_lazy: dict[str, Callable[[], "TikTokConfig | logging.Logger"]] = {
+    "config": _load_config,
+    "logger": _setup_logger,
+}
+_lazy_lock = threading.RLock()
+
+
+def __getattr__(name: str) -> "TikTokConfig | logging.Logger":
+    if name not in _lazy:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _lazy_lock:
+        # another thread may have created it while this one waited
+        if name in globals():
+            return globals()[name]
+        value = _lazy[name]()
+        # later lookups find the global and never come back here
+        globals()[name] = value
+    return value
+
+
+class _Package(ModuleType):
+    def __setattr__(self, name: str, value: object) -> None:
+        # importing the `config` submodule binds it on the package, which
+        # would hide the lazily loaded config behind the module
+        if name == "config" and isinstance(value, ModuleType):
+            return
+        super().__setattr__(name, value)
+
 
-stream_handler = logging.StreamHandler()
-stream_handler.setLevel(logging.DEBUG)
-stream_handler.setFormatter(formatter)
-logger.addHandler(stream_handler)
+sys.modules[__name__].__class__ = _Package
@@ -0,0 +1,228 @@
+"""
+asyncio API of the uploader
+
+Selenium only offers blocking calls, so the uploads run on a small shared
+thread pool and are awaited from the event loop. Coroutines of many
+accounts can be gathered: only an upload which is driving its browser
+holds one of the pool's threads, the others wait as ordinary tasks.
+Cancelling the awaiting task, or a job overrunning its timeout, kills the
+browser of the upload in flight so its thread is released right away.
+
+    failed = await asyncio.gather(
+        upload_videos_async(videos_a, auth_a, timeout=900),
+        upload_videos_async(videos_b, auth_b, timeout=900),
+    )
+
+Key Functions
+-------------
+upload_video_async : Uploads a single TikTok video
+upload_videos_async : Uploads multiple TikTok videos with one account
+set_executor : Replaces the thread pool the uploads run on
+"""
+
+import asyncio
+import datetime
+import os
+import threading
+from collections.abc import Callable
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Literal
+
+from tiktok_uploader import config, logger
+from tiktok_uploader.auth import AuthBackend
+from tiktok_uploader.types import Cookie, ProxyDict, VideoDict
+from tiktok_uploader.upload import UploadSession, _convert_videos_dict, _single_video
+
+# browsers driven at the same time by the default pool, each one needs a
+# core and several hundred MB while it uploads
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+_executor: Executor | None = None
+_executor_lock = threading.Lock()
+
+
+def set_executor(executor: Executor | None) -> None:
+    """
+    Runs the uploads on `executor`, None goes back to the default pool
+
+    The executor bounds how many browsers are driven at the same time
+    """
+    global _executor
+    with _executor_lock:
+        _executor = executor
+
+
+def get_executor() -> Executor:
+    """
+    Returns the executor the uploads run on, created on first use
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=DEFAULT_WORKERS, thread_name_prefix="tiktok-upload"
+            )
+        return _executor
+
+
+async def upload_video_async(
+    filename: str,
+    description: str | None = None,
+    cookies: str = "",
+    schedule: datetime.datetime | None = None,
+    username: str = "",
+    password: str = "",
+    sessionid: str | None = None,
+    cookies_list: list[Cookie] = [],
+    cookies_str: str | None = None,
+    proxy: ProxyDict | None = None,
+    product_id: str | None = None,
+    cover: str | None = None,
+    visibility: Literal["everyone", "friends", "only_you"] = "everyone",
+    *,
+    timeout: float | None = None,
+    executor: Executor | None = None,
+    **kwargs,
+) -> list[VideoDict]:
+    """
+    Uploads a single TikTok video, the asyncio version of `upload_video`
+
+    Parameters
+    ----------
+    filename : str
+        The path to the video to upload
+    timeout : float
+        Seconds the upload may take, it fails once they are over
+    executor : Executor
+        Runs the blocking upload, the shared pool of `get_executor` by default
+
+    The other parameters are the ones of `upload_video`
+    """
+    video, auth = _single_video(
+        filename,
+        description,
+        cookies,
+        schedule,
+        username,
+        password,
+        sessionid,
+        cookies_list,
+        cookies_str,
+        product_id,
+        cover,
+        visibility,
+    )
+    return await upload_videos_async(
+        [video], auth, proxy, timeout=timeout, executor=executor, **kwargs
+    )
+
+
+async def upload_videos_async(
+    videos: list[VideoDict],
+    auth: AuthBackend,
+    proxy: ProxyDict | None = None,
+    *,
+    timeout: float | None = None,
+    executor: Executor | None = None,
+    on_complete: Callable[[VideoDict], None] | None = None,
+    **kwargs,
+) -> list[VideoDict]:
+    """
+    Uploads multiple videos with one account, the asyncio version of `upload_videos`
+
+    The videos are uploaded one after another in one browser, the pause
+    between them (`delay`) is awaited without holding a thread
+
+    Parameters
+    ----------
+    videos : list
+        A list of dictionaries containing the video's ('path') and description ('description')
+    auth : AuthBackend
+        The authentication backend used to log the browser in
+    proxy : dict
+        A dictionary containing the proxy user, pass, host and port
+    timeout : float
+        Seconds each video may take, a video over it fails and the next one
+        starts in a new browser
+    executor : Executor
+        Runs the blocking uploads, the shared pool of `get_executor` by default
+    on_complete : function
+        Called with each video once it is done
+    **kwargs :
+        Additional keyword arguments passed to the UploadSession
+
+    Returns
+    -------
+    failed : list
+        A list of videos which failed to upload
+    """
+    videos = _convert_videos_dict(videos)  # type: ignore
+    executor = executor or get_executor()
+    session = UploadSession(auth, proxy=proxy, **kwargs)
+
+    failed = []
+    try:
+        used_browser = False
+        for idx, video in enumerate(videos, 1):
+            if used_browser:
+                delay = session.next_delay()
+                if delay:
+                    await asyncio.sleep(delay)
+
+            attempts = session._attempts
+            label = f"[{idx}/{len(videos)}]"
+            success = await _upload(session, video, label, timeout, executor)
+            used_browser = session._attempts > attempts
+
+            if not success:
+                failed.append(video)
+            if on_complete is not None:
+                on_complete(video)
+    finally:
+        if config.quit_on_end:
+            # quitting blocks as well, and must not be skipped on cancellation
+            await asyncio.shield(
+                asyncio.get_running_loop().run_in_executor(executor, session.close)
+            )
+
+    logger.info(
+        f"Yukleme tamamlandi: {len(videos) - len(failed)}/{len(videos)} basarili"
+    )
+    return failed
+
+
+async def _upload(
+    session: UploadSession,
+    video: VideoDict,
+    label: str,
+    timeout: float | None,
+    executor: Executor,
+) -> bool:
+    """
+    Runs `session.upload` on the executor and awaits it
+
+    The timeout starts once a thread picked the upload up, not while it
+    waits for one
+    """
+    loop = asyncio.get_running_loop()
+    started = asyncio.Event()
+
+    def run() -> bool:
+        loop.call_soon_threadsafe(started.set)
+        return session.upload(video, label)
+
+    future = executor.submit(run)
+    try:
+        await started.wait()
+        return await asyncio.wait_for(
+            asyncio.shield(asyncio.wrap_future(future)), timeout
+        )
+    except asyncio.TimeoutError:
+        session.cancel(f"{timeout:g} sn zaman asimi")
+        return await asyncio.wrap_future(future)
+    except asyncio.CancelledError:
+        if not future.cancel():
+            session.cancel()
+            # the thread ends as soon as its browser is gone
+            await asyncio.gather(asyncio.wrap_future(future), return_exceptions=True)
+        raise
@@ -1,18 +1,21 @@
 """Handles authentication for TikTokUploader"""
 
+from __future__ import annotations
+
+import hashlib
 from http import cookiejar
 from time import sleep, time
-
-from selenium.webdriver.common.by import By
-from selenium.webdriver.remote.webdriver import WebDriver
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import WebDriverWait
+from typing import TYPE_CHECKING
 
 from tiktok_uploader import config, logger
 from tiktok_uploader.browsers import get_browser
 from tiktok_uploader.types import Cookie, cookie_from_dict
 from tiktok_uploader.utils import green
 
+# reading cookies does not need selenium, it is imported once a browser is driven
+if TYPE_CHECKING:
+    from selenium.webdriver.remote.webdriver import WebDriver
+
 
 class AuthBackend:
     """
@@ -64,6 +67,23 @@ class AuthBackend:
         elif cookies_list:
             logger.debug(green("Authenticating browser with cookies_list"))
 
+    @property
+    def account_id(self) -> str:
+        """
+        A stable identifier of the account, used to key per-account state
+
+        The username when logging in with a password, otherwise a hash of the
+        session cookie (so the secret itself is never stored)
+        """
+        if self.username:
+            return self.username
+
+        for cookie in self.cookies:
+            if cookie.get("name") == config.selectors.login.cookie_of_interest:
+                return hashlib.sha256(cookie["value"].encode()).hexdigest()[:16]
+
+        return ""
+
     def authenticate_agent(self, driver: WebDriver) -> WebDriver:
         """
         Authenticates the agent using the browser backend
@@ -72,6 +92,9 @@ class AuthBackend:
         if not self.cookies and self.username and self.password:
             self.cookies = login(driver, username=self.username, password=self.password)
 
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
         logger.debug(green("Authenticating browser with cookies"))
 
         driver.get(str(config.paths.main))
@@ -156,6 +179,10 @@ def login(driver: WebDriver, username: str, password: str) -> list[Cookie]:
     """
     assert username and password, "Username and password are required"
 
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
     # checks if the browser is on TikTok
     if str(config.paths.main) not in driver.current_url:
         driver.get(str(config.paths.main))
@@ -1,32 +1,65 @@
 """Gets the browser's given the user's input"""
 
+from __future__ import annotations
+
+import importlib
+import os
+import signal
+import threading
+import time
+from collections import deque
 from collections.abc import Callable
-from typing import Any, Literal
-
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options as ChromeOptions
-
-# Webdriver managers
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.common.options import BaseOptions
-from selenium.webdriver.common.service import Service
-from selenium.webdriver.edge.options import Options as EdgeOptions
-from selenium.webdriver.edge.service import Service as EdgeService
-from selenium.webdriver.firefox.options import Options as FirefoxOptions
-from selenium.webdriver.firefox.service import Service as FirefoxService
-from selenium.webdriver.remote.webdriver import WebDriver
-from selenium.webdriver.safari.options import Options as SafariOptions
-from webdriver_manager.chrome import ChromeDriverManager
-from webdriver_manager.firefox import GeckoDriverManager
-from webdriver_manager.microsoft import EdgeChromiumDriverManager
-
-from tiktok_uploader import config
-from tiktok_uploader.proxy_auth_extension.proxy_auth_extension import (
-    generate_proxy_auth_extension,
-)
+from typing import TYPE_CHECKING, Any, Literal
+
+from tiktok_uploader import config, logger
+from tiktok_uploader.driver_cache import resolve_driver
+from tiktok_uploader.utils import green
+
+# selenium and webdriver-manager take longer to import than the rest of the
+# package together, they are imported when a browser is actually started
+if TYPE_CHECKING:
+    from selenium.webdriver.chrome.options import Options as ChromeOptions
+    from selenium.webdriver.common.options import BaseOptions
+    from selenium.webdriver.common.service import Service
+    from selenium.webdriver.edge.options import Options as EdgeOptions
+    from selenium.webdriver.firefox.options import Options as FirefoxOptions
+    from selenium.webdriver.remote.webdriver import WebDriver
+    from selenium.webdriver.safari.options import Options as SafariOptions
+
+    from tiktok_uploader.auth import AuthBackend
+
+try:
+    import psutil
+except ImportError:  # the `memory` extra, /proc is read directly on Linux
+    psutil = None  # type: ignore[assignment]
 
 browser_t = Literal["chrome", "safari", "chromium", "edge", "firefox"]
 
+# blocked by `apply_resource_blocking` when config.resource_blocking allows
+MEDIA_EXTENSIONS = ("mp4", "webm", "m4s", "m3u8", "mp3", "m4a", "aac")
+FONT_EXTENSIONS = ("woff2", "woff", "ttf", "otf")
+
+# switches of the "dense" profile, which trades a little speed for fitting
+# more browsers on one host
+DENSE_ARGUMENTS = (
+    "--renderer-process-limit=2",
+    "--process-per-site",
+    # site isolation is a switch of its own, it is no feature --disable-features
+    # could turn off
+    "--disable-site-isolation-trials",
+    "--disable-features=IsolateOrigins,Translate,MediaRouter,"
+    "OptimizationHints,BackForwardCache",
+    "--disable-gpu",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-dev-shm-usage",
+    "--disk-cache-size=33554432",  # 32 MB
+    "--media-cache-size=1048576",  # 1 MB
+    "--js-flags=--max-old-space-size=256",  # MB of JavaScript heap per renderer
+)
+
 
 def get_browser(
     name: browser_t = "chrome", options: Any | None = None, *args, **kwargs
@@ -51,6 +84,9 @@ def get_browser(
 
     driver.implicitly_wait(config.implicit_wait)
 
+    if kwargs.get("block_resources"):
+        apply_resource_blocking(driver)
+
     return driver
 
 
@@ -60,19 +96,20 @@ def get_driver(name: str, *args, **kwargs) -> type[WebDriver]:
     """
     clean_name = _clean_name(name)
     if clean_name in drivers:
-        return drivers[clean_name]
+        module, attribute = drivers[clean_name].split(":")
+        return getattr(importlib.import_module(module), attribute)
 
     raise UnsupportedBrowserException()
 
 
 def get_service(name: str):
     """
-    Gets a service to install the browser driver per webdriver-manager docs
+    Gets a service running the browser driver, see `driver_cache.resolve_driver`
 
     https://pypi.org/project/webdriver-manager/
     """
     if _clean_name(name) in services:
-        return services[name]()
+        return services[_clean_name(name)]()
 
     return None  # Safari doesn't need a service
 
@@ -90,12 +127,23 @@ def get_default_options(name: browser_t, *args, **kwargs) -> BaseOptions:
 
 
 def chrome_defaults(
-    *args, headless: bool = False, proxy: dict | None = None, **kwargs
+    *args,
+    headless: bool = False,
+    proxy: dict | None = None,
+    block_resources: bool = False,
+    dense: bool = False,
+    **kwargs,
 ) -> ChromeOptions:
     """
     Creates Chrome with Options
+
+    With `block_resources` images and media autoplay are turned off as set in
+    `config.resource_blocking`, `get_browser` then blocks the URL patterns.
+    `dense` adds the memory saving `DENSE_ARGUMENTS`
     """
 
+    from selenium.webdriver.chrome.options import Options as ChromeOptions
+
     options = ChromeOptions()
 
     ## regular
@@ -112,9 +160,23 @@ def chrome_defaults(
     # headless
     if headless:
         options.add_argument("--headless=new")
+    if dense:
+        for argument in DENSE_ARGUMENTS:
+            options.add_argument(argument)
+    if block_resources:
+        if config.resource_blocking.images:
+            options.add_experimental_option(
+                "prefs", {"profile.managed_default_content_settings.images": 2}
+            )
+        if config.resource_blocking.media:
+            options.add_argument("--autoplay-policy=user-gesture-required")
     if proxy:
         if "user" in proxy.keys() and "pass" in proxy.keys():
             # This can fail if you are executing the function more than once in the same time
+            from tiktok_uploader.proxy_auth_extension.proxy_auth_extension import (
+                generate_proxy_auth_extension,
+            )
+
             extension_file = "temp_proxy_auth_extension.zip"
             generate_proxy_auth_extension(
                 proxy["host"],
@@ -137,6 +199,8 @@ def firefox_defaults(
     Creates Firefox with default options
     """
 
+    from selenium.webdriver.firefox.options import Options as FirefoxOptions
+
     options = FirefoxOptions()
 
     # default options
@@ -154,6 +218,8 @@ def safari_defaults(
     """
     Creates Safari with default options
     """
+    from selenium.webdriver.safari.options import Options as SafariOptions
+
     options = SafariOptions()
 
     # default options
@@ -171,6 +237,8 @@ def edge_defaults(
     """
     Creates Edge with default options
     """
+    from selenium.webdriver.edge.options import Options as EdgeOptions
+
     options = EdgeOptions()
 
     # default options
@@ -182,6 +250,556 @@ def edge_defaults(
     return options
 
 
+def blocked_url_patterns() -> list[str]:
+    """
+    Returns the URL patterns blocked by `apply_resource_blocking`
+    """
+    blocking = config.resource_blocking
+    patterns = list(blocking.urls)
+    if blocking.media:
+        patterns += [f"*.{ext}" for ext in MEDIA_EXTENSIONS]
+    if blocking.fonts:
+        patterns += [f"*.{ext}" for ext in FONT_EXTENSIONS]
+    return patterns
+
+
+def apply_resource_blocking(
+    driver: WebDriver, patterns: list[str] | None = None
+) -> bool:
+    """
+    Makes a Chromium based driver drop every request matching the patterns
+
+    Uses the DevTools protocol, which applies to every page the driver opens
+    afterwards. Returns False for browsers without it (Firefox, Safari)
+
+    Parameters
+    ----------
+    driver : selenium.webdriver
+    patterns : list[str]
+        URL patterns (* matches anything), defaults to `blocked_url_patterns`
+    """
+    execute_cdp_cmd = getattr(driver, "execute_cdp_cmd", None)
+    if execute_cdp_cmd is None:
+        logger.debug("Resource blocking needs a Chromium based browser, skipping it")
+        return False
+
+    urls = blocked_url_patterns() if patterns is None else patterns
+    execute_cdp_cmd("Network.enable", {})
+    execute_cdp_cmd("Network.setBlockedURLs", {"urls": urls})
+    logger.debug(green(f"Blocking {len(urls)} URL patterns"))
+    return True
+
+
+class BrowserPool:
+    """
+    Keeps authenticated drivers warm, already sitting on the upload page
+
+    Each account gets up to `size` idle drivers which have their cookies
+    injected and `config.paths.upload` loaded, so checking one out skips the
+    browser start, the login and the first navigation. A background thread
+    refills the pool after every checkout and evicts drivers that have been
+    idle longer than `idle_ttl` or whose process tree grew past `max_rss_mb`.
+
+    Parameters
+    ----------
+    size : int
+        The number of warm drivers to keep per account
+    idle_ttl : float
+        Seconds a driver (or an unused account) may sit idle before eviction
+    max_rss_mb : int
+        Evicts idle drivers whose browser processes use more memory than this
+    browser : str
+        The browser to launch, see `get_browser`
+    refill_interval : float
+        Seconds between two housekeeping passes of the background thread
+    """
+
+    def __init__(
+        self,
+        size: int = 1,
+        idle_ttl: float = 600,
+        max_rss_mb: int | None = None,
+        browser: browser_t = "chrome",
+        refill_interval: float = 5,
+        *args,
+        **kwargs,
+    ):
+        self.size = size
+        self.idle_ttl = idle_ttl
+        self.max_rss_mb = max_rss_mb
+        self.browser = browser
+        self.refill_interval = refill_interval
+        self.args = args
+        self.kwargs = kwargs
+
+        self._accounts: dict[str, _PoolAccount] = {}
+        self._condition = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+    def warm(self, auth: "AuthBackend", key: str | None = None) -> None:
+        """
+        Registers an account so the background thread starts warming drivers for it
+        """
+        with self._condition:
+            self._account(auth, key).last_used = time.monotonic()
+            self._ensure_thread()
+            self._condition.notify_all()
+
+    def checkout(self, auth: "AuthBackend", key: str | None = None) -> WebDriver:
+        """
+        Hands out a warm driver for the account, or starts one if none is ready
+        """
+        with self._condition:
+            account = self._account(auth, key)
+            account.last_used = time.monotonic()
+            self._ensure_thread()
+
+            driver = None
+            while account.idle:
+                candidate, _ = account.idle.popleft()
+                if _is_responsive(candidate):
+                    driver = candidate
+                    break
+                _quit_quietly(candidate)
+
+            # lets the background thread top the pool up again
+            self._condition.notify_all()
+
+        if driver is not None:
+            logger.debug(green("Checked out a warm browser"))
+            return driver
+
+        logger.debug("No warm browser available, starting one")
+        return self._start_warm_driver(account.auth)
+
+    def checkin(
+        self, driver: WebDriver, auth: "AuthBackend", key: str | None = None
+    ) -> None:
+        """
+        Returns a driver to the pool, it is sent back to the upload page first
+        """
+        try:
+            driver.get(str(config.paths.upload))
+            _wait_for_upload_page(driver)
+        except Exception as e:
+            logger.debug(f"Discarding browser which could not be reused: {e}")
+            _quit_quietly(driver)
+            return
+
+        with self._condition:
+            account = self._account(auth, key)
+            if self._closed or len(account.idle) >= self.size:
+                _quit_quietly(driver)
+                return
+            account.idle.append((driver, time.monotonic()))
+            self._condition.notify_all()
+
+    def discard(self, driver: WebDriver) -> None:
+        """
+        Quits a driver which should not be handed out again
+        """
+        _quit_quietly(driver)
+        with self._condition:
+            self._condition.notify_all()
+
+    def close(self) -> None:
+        """
+        Stops the background thread and quits every idle driver
+        """
+        with self._condition:
+            self._closed = True
+            drivers = [
+                driver
+                for account in self._accounts.values()
+                for driver, _ in account.idle
+            ]
+            self._accounts.clear()
+            self._condition.notify_all()
+
+        for driver in drivers:
+            _quit_quietly(driver)
+
+    def __enter__(self) -> "BrowserPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _account(self, auth: "AuthBackend", key: str | None) -> "_PoolAccount":
+        key = key or auth.account_id or str(id(auth))
+        if key not in self._accounts:
+            self._accounts[key] = _PoolAccount(auth)
+        return self._accounts[key]
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _start_warm_driver(self, auth: "AuthBackend") -> WebDriver:
+        driver = get_browser(self.browser, *self.args, **self.kwargs)
+        try:
+            auth.authenticate_agent(driver)
+            driver.get(str(config.paths.upload))
+            _wait_for_upload_page(driver)
+        except Exception:
+            _quit_quietly(driver)
+            raise
+        return driver
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if self._closed:
+                    return
+                evicted = self._collect_evictions()
+                target = self._next_to_warm()
+                if target is not None:
+                    target.starting += 1
+                else:
+                    self._condition.wait(self.refill_interval)
+
+            for driver in evicted:
+                _quit_quietly(driver)
+
+            if target is None:
+                continue
+
+            try:
+                driver = self._start_warm_driver(target.auth)
+            except Exception as e:
+                logger.error(f"Could not warm a browser: {e}")
+                with self._condition:
+                    target.starting -= 1
+                # back off instead of hammering a failing login
+                time.sleep(self.refill_interval)
+                continue
+
+            with self._condition:
+                target.starting -= 1
+                if not self._closed and target in self._accounts.values():
+                    target.idle.append((driver, time.monotonic()))
+                    continue
+
+            _quit_quietly(driver)
+
+    def _collect_evictions(self) -> list[WebDriver]:
+        now = time.monotonic()
+        evicted = []
+        for key, account in list(self._accounts.items()):
+            keep: deque[tuple[WebDriver, float]] = deque()
+            for driver, since in account.idle:
+                too_old = now - since > self.idle_ttl
+                too_big = (
+                    self.max_rss_mb is not None
+                    and (driver_rss(driver) or 0) > self.max_rss_mb * 1024 * 1024
+                )
+                if too_old or too_big:
+                    logger.debug(
+                        "Evicting idle browser (%s)", "ttl" if too_old else "rss"
+                    )
+                    evicted.append(driver)
+                else:
+                    keep.append((driver, since))
+            account.idle = keep
+
+            # accounts nobody asked for in a while stop being kept warm
+            if now - account.last_used > self.idle_ttl and not account.starting:
+                evicted.extend(driver for driver, _ in account.idle)
+                del self._accounts[key]
+        return evicted
+
+    def _next_to_warm(self) -> "_PoolAccount | None":
+        for account in self._accounts.values():
+            if len(account.idle) + account.starting < self.size:
+                return account
+        return None
+
+
+class _PoolAccount:
+    """
+    The warm drivers kept for a single account
+    """
+
+    def __init__(self, auth: "AuthBackend"):
+        self.auth = auth
+        self.idle: deque[tuple[WebDriver, float]] = deque()
+        self.starting = 0
+        self.last_used = time.monotonic()
+
+
+def _wait_for_upload_page(driver: WebDriver) -> None:
+    """
+    Waits until the upload page can take a file
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    WebDriverWait(driver, config.explicit_wait).until(
+        EC.presence_of_element_located((By.XPATH, config.selectors.upload.upload_video))
+    )
+
+
+def _is_responsive(driver: WebDriver) -> bool:
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+
+def _quit_quietly(driver: WebDriver) -> None:
+    try:
+        driver.quit()
+    except Exception as e:
+        logger.debug(f"Could not quit driver cleanly: {e}")
+
+
+def can_inspect_processes() -> bool:
+    """
+    Returns whether the memory and the child processes of a local driver can
+    be found, with psutil (`pip install tiktok-uploader[memory]`) or /proc
+    """
+    return psutil is not None or os.path.isdir("/proc")
+
+
+def warn_without_process_inspection(feature: str) -> None:
+    """
+    Warns that `feature` can not work on this host
+    """
+    if not can_inspect_processes():
+        logger.warning(
+            f"{feature} bu sistemde calismaz, psutil kurun:"
+            " pip install tiktok-uploader[memory]"
+        )
+
+
+def driver_rss(driver: WebDriver) -> int | None:
+    """
+    Returns the resident memory in bytes of the driver and every browser process it spawned
+
+    Returns None when the process tree can not be inspected (remote drivers,
+    or platforms without /proc when psutil is not installed)
+    """
+    service = getattr(driver, "service", None)
+    process = getattr(service, "process", None)
+    pid = getattr(process, "pid", None)
+    if pid is None:
+        return None
+
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            tree = [root, *root.children(recursive=True)]
+            return sum(p.memory_info().rss for p in tree if p.is_running())
+        except psutil.Error:
+            return None
+
+    return _proc_tree_rss(pid)
+
+
+class RssSampler:
+    """
+    Watches the memory of drivers so they can be recycled before the host runs out
+
+    A background thread samples every registered driver's process tree,
+    keeping the latest and the peak value and logging when one crosses
+    `max_rss_mb`. `should_recycle` takes a fresh sample and is meant to be
+    called between two uploads, where a driver can be replaced safely.
+
+    Parameters
+    ----------
+    max_rss_mb : int
+        Drivers using more than this (browser and child processes) are recycled
+    interval : float
+        Seconds between two samples of the background thread
+    """
+
+    def __init__(self, max_rss_mb: int, interval: float = 5):
+        self.max_rss_mb = max_rss_mb
+        self.interval = interval
+        warn_without_process_inspection("max_rss_mb bellek siniri")
+        self._samples: dict[int, tuple[WebDriver, int, int]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def limit(self) -> int:
+        return self.max_rss_mb * 1024 * 1024
+
+    def add(self, driver: WebDriver) -> None:
+        """
+        Starts sampling the driver
+        """
+        with self._lock:
+            self._samples.setdefault(id(driver), (driver, 0, 0))
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="tiktok-rss-sampler", daemon=True
+                )
+                self._thread.start()
+
+    def remove(self, driver: WebDriver) -> None:
+        with self._lock:
+            self._samples.pop(id(driver), None)
+
+    def rss(self, driver: WebDriver) -> int:
+        """
+        Returns the latest sample in bytes, 0 before the first one
+        """
+        with self._lock:
+            return self._samples.get(id(driver), (driver, 0, 0))[1]
+
+    def peak(self, driver: WebDriver) -> int:
+        """
+        Returns the highest sample in bytes since the driver was added
+        """
+        with self._lock:
+            return self._samples.get(id(driver), (driver, 0, 0))[2]
+
+    def sample(self, driver: WebDriver) -> int | None:
+        """
+        Measures the driver now, returns None if its processes can not be read
+        """
+        value = driver_rss(driver)
+        if value is None:
+            return None
+        with self._lock:
+            if id(driver) in self._samples:
+                _, _, peak = self._samples[id(driver)]
+                self._samples[id(driver)] = (driver, value, max(peak, value))
+        return value
+
+    def should_recycle(self, driver: WebDriver) -> bool:
+        """
+        Returns whether the driver currently uses more memory than allowed
+        """
+        value = self.sample(driver)
+        return value is not None and value > self.limit
+
+    def close(self) -> None:
+        """
+        Stops the background thread
+        """
+        self._stop.set()
+        with self._lock:
+            self._samples.clear()
+
+    def __enter__(self) -> RssSampler:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                drivers = [driver for driver, _, _ in self._samples.values()]
+                if not drivers:
+                    # started again by the next `add`
+                    self._thread = None
+                    return
+            for driver in drivers:
+                before = self.rss(driver)
+                value = self.sample(driver)
+                if value is not None and value > self.limit >= before:
+                    logger.debug(
+                        f"Browser uses {value // (1024 * 1024)} MB, more than "
+                        f"{self.max_rss_mb} MB, it is recycled after its upload"
+                    )
+
+
+def kill_driver(driver: WebDriver) -> bool:
+    """
+    Kills the driver and every browser process it spawned, without asking it
+
+    For drivers which stopped answering, where `quit()` would hang as well.
+    Returns False when the processes can not be found (remote drivers)
+    """
+    service = getattr(driver, "service", None)
+    process = getattr(service, "process", None)
+    pid = getattr(process, "pid", None)
+    if pid is None:
+        return False
+
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            tree = [*root.children(recursive=True), root]
+        except psutil.Error:
+            return False
+        for proc in tree:
+            try:
+                proc.kill()
+            except psutil.Error:
+                pass
+        return True
+
+    pids = _proc_tree_pids(pid) or [pid]
+    for child in reversed(pids):
+        try:
+            os.kill(child, getattr(signal, "SIGKILL", signal.SIGTERM))
+        except OSError:
+            pass
+    return True
+
+
+def _proc_table() -> tuple[dict[int, list[int]], dict[int, int]] | None:
+    """
+    Reads the children and VmRSS of every process from /proc (Linux only)
+    """
+    if not os.path.isdir("/proc"):
+        return None
+
+    children: dict[int, list[int]] = {}
+    rss: dict[int, int] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/status", encoding="utf-8") as file:
+                status = file.read()
+        except OSError:
+            continue
+        fields = dict(line.split(":", 1) for line in status.splitlines() if ":" in line)
+        pid = int(entry)
+        children.setdefault(int(fields.get("PPid", "0").strip()), []).append(pid)
+        rss[pid] = int(fields.get("VmRSS", "0 kB").split()[0]) * 1024
+    return children, rss
+
+
+def _proc_tree_pids(root_pid: int, table=None) -> list[int] | None:
+    """
+    Returns the process and all of its descendants, parents first
+    """
+    table = table or _proc_table()
+    if table is None or root_pid not in table[1]:
+        return None
+
+    children = table[0]
+    pids, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(children.get(pid, []))
+    return pids
+
+
+def _proc_tree_rss(root_pid: int) -> int | None:
+    """
+    Sums VmRSS over a process tree using /proc (Linux only)
+    """
+    table = _proc_table()
+    pids = _proc_tree_pids(root_pid, table)
+    if table is None or pids is None:
+        return None
+    return sum(table[1].get(pid, 0) for pid in pids)
+
+
 # Misc
 class UnsupportedBrowserException(Exception):
     """
@@ -205,11 +823,12 @@ def _clean_name(name: str) -> str:
     return name.strip().lower()
 
 
-drivers: dict[str, type[WebDriver]] = {
-    "chrome": webdriver.Chrome,
-    "firefox": webdriver.Firefox,
-    "safari": webdriver.Safari,
-    "edge": webdriver.ChromiumEdge,
+# "module:attribute" of each driver class, imported by `get_driver`
+drivers: dict[str, str] = {
+    "chrome": "selenium.webdriver.chrome.webdriver:WebDriver",
+    "firefox": "selenium.webdriver.firefox.webdriver:WebDriver",
+    "safari": "selenium.webdriver.safari.webdriver:WebDriver",
+    "edge": "selenium.webdriver.edge.webdriver:WebDriver",
 }
 
 defaults: dict[str, Callable[..., BaseOptions]] = {
@@ -220,8 +839,26 @@ defaults: dict[str, Callable[..., BaseOptions]] = {
 }
 
 
+def _chrome_service() -> Service:
+    from selenium.webdriver.chrome.service import Service as ChromeService
+
+    return ChromeService(resolve_driver("chrome"))
+
+
+def _firefox_service() -> Service:
+    from selenium.webdriver.firefox.service import Service as FirefoxService
+
+    return FirefoxService(resolve_driver("firefox"))
+
+
+def _edge_service() -> Service:
+    from selenium.webdriver.edge.service import Service as EdgeService
+
+    return EdgeService(resolve_driver("edge"))
+
+
 services: dict[str, Callable[[], Service]] = {
-    "chrome": lambda: ChromeService(ChromeDriverManager().install()),
-    "firefox": lambda: FirefoxService(GeckoDriverManager().install()),
-    "edge": lambda: EdgeService(EdgeChromiumDriverManager().install()),
+    "chrome": _chrome_service,
+    "firefox": _firefox_service,
+    "edge": _edge_service,
 }
@@ -2,13 +2,17 @@
 CLI is a controller for the command line use of this library
 """
 
+from __future__ import annotations
+
 import datetime
 from argparse import ArgumentParser, Namespace
 from os.path import exists, join
+from typing import TYPE_CHECKING
 
-from tiktok_uploader.auth import login_accounts, save_cookies
-from tiktok_uploader.types import ProxyDict
-from tiktok_uploader.upload import upload_video
+# the commands import the uploader (and with it selenium) only once their
+# arguments are valid, so --help and usage errors return immediately
+if TYPE_CHECKING:
+    from tiktok_uploader.types import ProxyDict
 
 
 def main() -> None:
@@ -24,6 +28,8 @@ def main() -> None:
     product_id = args.product_id
     visibility = args.visibility
 
+    from tiktok_uploader.upload import upload_video
+
     # runs the program using the arguments provided
     result = upload_video(
         filename=args.video,
@@ -134,6 +140,8 @@ def auth() -> None:
     else:
         login_info = [(args.username, args.password)]
 
+    from tiktok_uploader.auth import login_accounts, save_cookies
+
     username_and_cookies = login_accounts(accounts=login_info)
 
     for username, cookies in username_and_cookies.items():
@@ -170,6 +178,78 @@ def validate_auth_args(args: Namespace) -> None:
         raise ValueError("You can not pass in both username / password and input file")
 
 
+def batch() -> None:
+    """
+    Uploads a manifest of (account, video) jobs in parallel
+    """
+    args = get_batch_args()
+
+    if not exists(args.manifest):
+        raise FileNotFoundError(f"Could not find the manifest at {args.manifest}")
+
+    from tiktok_uploader.scheduler import load_manifest, run_jobs
+
+    jobs = load_manifest(args.manifest)
+
+    failed = 0
+    results = run_jobs(
+        jobs,
+        max_workers=args.workers,
+        headless=not args.attach,
+        dense=args.dense,
+        max_rss_mb=args.max_rss_mb,
+    )
+    for result in results:
+        status = "OK" if result["success"] else f"FAILED: {result['error']}"
+        print(f"[{result['account']}] {result['path']} -> {status}")
+        failed += not result["success"]
+
+    print("-------------------------")
+    print(f"{len(jobs) - failed}/{len(jobs)} videos uploaded successfully")
+    print("-------------------------")
+
+
+def get_batch_args() -> Namespace:
+    """
+    Generates a parser which is used to get the batch manifest and worker count
+    """
+    parser = ArgumentParser(
+        description="TikTok Batch uploads a manifest of videos for many accounts in parallel"
+    )
+
+    parser.add_argument(
+        "-m", "--manifest", required=True, help="A JSON file listing the jobs"
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=None,
+        help="The maximum number of browsers open at once (defaults to the CPU count)",
+    )
+    parser.add_argument(
+        "--attach",
+        "-a",
+        action="store_true",
+        default=False,
+        help="Shows the browser windows instead of running headless",
+    )
+    parser.add_argument(
+        "--dense",
+        action="store_true",
+        default=False,
+        help="Starts Chrome with memory saving switches to fit more workers per host",
+    )
+    parser.add_argument(
+        "--max-rss-mb",
+        type=int,
+        default=None,
+        help="Restarts a worker's browser between videos once it uses more memory than this",
+    )
+
+    return parser.parse_args()
+
+
 def get_login_info(path: str, header: bool = True) -> list[tuple[str, str]]:
     """
     Parses the input file into a list of usernames and passwords
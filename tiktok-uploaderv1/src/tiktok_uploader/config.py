@@ -18,6 +18,7 @@ class VisibilityOption(str, Enum):
 
 PositiveSeconds = Annotated[int, Field(ge=0)]
 PositiveChars = Annotated[int, Field(ge=1)]
+PositiveDelay = Annotated[float, Field(ge=0)]
 
 
 class Paths(StrictModel):
@@ -37,6 +38,41 @@ class Disguising(StrictModel):
         return v
 
 
+class ResourceBlocking(StrictModel):
+    images: bool
+    media: bool
+    fonts: bool
+    urls: list[str]
+
+
+class RetryPolicy(StrictModel):
+    attempts: Annotated[int, Field(ge=1)]
+    base_delay: PositiveDelay
+    max_delay: PositiveDelay
+    multiplier: Annotated[float, Field(ge=1)]
+    jitter: Annotated[float, Field(ge=0, le=1)]
+
+    video_budget: Annotated[int, Field(ge=0)]
+    worker_budget: Annotated[int, Field(ge=0)]
+    worker_window: PositiveSeconds
+
+    # exception class names
+    fatal: list[str]
+    no_backoff: list[str]
+
+    # attempts of individual retry loops
+    stages: dict[str, Annotated[int, Field(ge=1)]]
+
+
+class TimeoutPolicy(StrictModel):
+    adaptive: bool
+    percentile: Annotated[float, Field(gt=0, le=1)]
+    margin: Annotated[float, Field(ge=1)]
+    floor: PositiveDelay
+    min_samples: Annotated[int, Field(ge=1)]
+    min_throughput: PositiveDelay
+
+
 class CookiesBanner(StrictModel):
     banner: str
     button: str
@@ -67,6 +103,7 @@ class UploadSelectors(StrictModel):
     upload_finished: str
     upload_confirmation: str
     process_confirmation: str
+    upload_progress: str
     description: str
     cover: Cover
 
@@ -83,6 +120,7 @@ class UploadSelectors(StrictModel):
     post: str
     post_now: str
     post_confirmation: str
+    post_link: str
 
     cookies_banner: CookiesBanner
 
@@ -123,6 +161,9 @@ class TikTokConfig(StrictModel):
     explicit_wait: PositiveSeconds
     uploading_wait: PositiveSeconds
     add_hashtag_wait: PositiveSeconds
+    probe_settle: PositiveDelay
+    stall_timeout: PositiveDelay
+    progress_interval: Annotated[float, Field(gt=0)]
 
     # Files / text
     supported_file_types: list[str]
@@ -132,6 +173,9 @@ class TikTokConfig(StrictModel):
     # Nested
     paths: Paths
     disguising: Disguising
+    resource_blocking: ResourceBlocking
+    timeouts: TimeoutPolicy
+    retry: RetryPolicy
     selectors: Selectors
 
     @field_validator("valid_path_names", "valid_descriptions")
@@ -0,0 +1,113 @@
+"""
+Cached snapshots of the validated config
+
+Parsing config.toml and validating it with pydantic is most of the time it
+takes to import the package. After the first successful validation the
+result is written as JSON to the cache directory, keyed by the contents of
+the config file and of the schema in config.py, so later starts only read a
+small JSON file and never import toml or pydantic.
+
+Key Classes
+-----------
+ConfigSnapshot : Attribute access to a validated config
+
+Key Functions
+-------------
+load_settings : Returns the config, from the snapshot when it is still valid
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any
+
+from tiktok_uploader.utils import cache_dir
+
+NO_CACHE_ENV = "TIKTOK_UPLOADER_NO_CONFIG_CACHE"
+
+# the schema, a change to it invalidates every snapshot
+SCHEMA_FILE = Path(__file__).with_name("config.py")
+
+# the package logger may not be set up yet when the config is loaded
+_logger = logging.getLogger("tiktok_uploader")
+
+
+class ConfigSnapshot:
+    """
+    A validated config, nested tables become nested snapshots
+
+    URLs are plain strings and visibility options their string values, which
+    is how the rest of the package already uses them
+    """
+
+    def __init__(self, data: dict[str, Any]):
+        for key, value in data.items():
+            setattr(
+                self, key, ConfigSnapshot(value) if isinstance(value, dict) else value
+            )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            key: value.to_dict() if isinstance(value, ConfigSnapshot) else value
+            for key, value in vars(self).items()
+        }
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, ConfigSnapshot) and vars(self) == vars(other)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{key}={value!r}" for key, value in vars(self).items())
+        return f"ConfigSnapshot({fields})"
+
+
+def load_settings(path: str | Path) -> ConfigSnapshot:
+    """
+    Returns the validated config at `path`
+
+    The snapshot is reused as long as neither the file nor the schema changed,
+    otherwise the file is validated with `load_config` (raising
+    pydantic.ValidationError on any mismatch) and a new snapshot is written.
+    Set TIKTOK_UPLOADER_NO_CONFIG_CACHE=1 to always validate.
+    """
+    path = Path(path)
+    use_cache = not os.environ.get(NO_CACHE_ENV)
+    snapshot = _snapshot_path(path) if use_cache else None
+
+    if snapshot is not None:
+        try:
+            with open(snapshot, encoding="utf-8") as file:
+                return ConfigSnapshot(json.load(file))
+        except (OSError, ValueError):
+            pass  # missing or unreadable, validated again below
+
+    from tiktok_uploader.config import load_config
+
+    data = load_config(path).model_dump(mode="json")
+    if snapshot is not None:
+        _write_snapshot(snapshot, data)
+    return ConfigSnapshot(data)
+
+
+def _snapshot_path(path: Path) -> Path | None:
+    digest = hashlib.sha256()
+    try:
+        digest.update(path.read_bytes())
+        digest.update(SCHEMA_FILE.read_bytes())
+    except OSError:
+        return None  # the error is raised by load_config
+    return cache_dir() / f"config-{digest.hexdigest()[:16]}.json"
+
+
+def _write_snapshot(snapshot: Path, data: dict[str, Any]) -> None:
+    # written next to the target and renamed, so readers never see half a file
+    temporary = snapshot.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        snapshot.parent.mkdir(parents=True, exist_ok=True)
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+        os.replace(temporary, snapshot)
+    except OSError as e:
+        _logger.debug(f"Could not cache the validated config: {e}")
+        temporary.unlink(missing_ok=True)
@@ -0,0 +1,274 @@
+"""
+Batched queries and changes of the page's state
+
+Every `find_element`, `is_selected` or `click` is its own HTTP round-trip to
+the driver. The functions here send one script instead, which evaluates a
+whole set of XPaths at once (or flips a set of checkboxes and waits until
+the page applied them), so a form step costs one command however many
+fields it looks at.
+
+    states = query(driver, {"comment": xpath_a, "duet": xpath_b})
+    if states["comment"]["checked"]:
+        ...
+
+Key Functions
+-------------
+query : Returns the state of the elements of several XPaths
+state : Returns the state of the element of one XPath
+query_all : Returns the state of every element of an XPath
+set_checked : Checks or unchecks several checkboxes
+click : Scrolls to an element and clicks it
+dismiss : Closes a banner rendered in a shadow root
+find_now : Returns the element of an XPath without waiting
+"""
+
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import WebElement
+
+from tiktok_uploader import config
+from tiktok_uploader.types import ElementState
+from tiktok_uploader.waits import MAX_SCRIPT_WAIT
+
+# shared by the scripts, the same rules as the conditions of `wait_for`
+_HELPERS = """
+function find(xpath) {
+  return document.evaluate(
+    xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+  ).singleNodeValue;
+}
+
+function visible(el) {
+  return el.getClientRects().length > 0
+    && getComputedStyle(el).visibility !== 'hidden';
+}
+
+function enabled(el) {
+  return !el.disabled
+    && el.getAttribute('aria-disabled') !== 'true'
+    && el.getAttribute('data-disabled') !== 'true';
+}
+
+function state(el) {
+  return el ? {
+    present: true,
+    visible: visible(el),
+    enabled: enabled(el),
+    checked: !!el.checked,
+    text: el.innerText ?? el.textContent ?? '',
+    href: el.href ?? null,
+    src: el.getAttribute('src'),
+  } : {
+    present: false, visible: false, enabled: false, checked: false, text: '', href: null,
+    src: null,
+  };
+}
+"""
+
+QUERY_SCRIPT = (
+    _HELPERS
+    + """
+const result = {};
+for (const [name, xpath] of Object.entries(arguments[0])) {
+  result[name] = state(find(xpath));
+}
+return result;
+"""
+)
+
+QUERY_ALL_SCRIPT = (
+    _HELPERS
+    + """
+const found = document.evaluate(
+  arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null
+);
+const result = [];
+for (let i = 0; i < found.snapshotLength; i++) result.push(state(found.snapshotItem(i)));
+return result;
+"""
+)
+
+SET_CHECKED_SCRIPT = (
+    _HELPERS
+    + """
+const [toggles, timeoutMs, done] = arguments;
+
+function states() {
+  const result = {};
+  for (const [name, [xpath]] of Object.entries(toggles)) {
+    const el = find(xpath);
+    result[name] = el ? !!el.checked : null;
+  }
+  return result;
+}
+
+function applied(current) {
+  return Object.entries(toggles).every(
+    ([name, [, checked]]) => current[name] === null || current[name] === checked
+  );
+}
+
+for (const [name, [xpath, checked]] of Object.entries(toggles)) {
+  const el = find(xpath);
+  if (el && !!el.checked !== checked) el.click();
+}
+
+// a checked property changing is no DOM mutation, so the state is polled
+const deadline = Date.now() + timeoutMs;
+(function check() {
+  const current = states();
+  if (applied(current) || Date.now() >= deadline) { done(current); return; }
+  setTimeout(check, 50);
+})();
+"""
+)
+
+CLICK_SCRIPT = (
+    _HELPERS
+    + """
+const [target, scroll] = arguments;
+const el = typeof target === 'string' ? find(target) : target;
+if (!el || !enabled(el)) return false;
+if (scroll) el.scrollIntoView({block: 'center', inline: 'nearest'});
+el.click();
+return true;
+"""
+)
+
+DISMISS_SCRIPT = """
+const [tag, selector] = arguments;
+const host = document.querySelector(tag);
+if (!host) return 'absent';
+const container = host.shadowRoot && host.shadowRoot.querySelector(selector);
+const button = container && container.querySelector('button');
+if (button) { button.click(); return 'clicked'; }
+host.remove();
+return 'removed';
+"""
+
+# finds an element without waiting, `find_elements` would wait `implicit_wait`
+# when it is missing
+FIND_SCRIPT = """
+return document.evaluate(
+  arguments[0], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+).singleNodeValue;
+"""
+
+
+def query(driver: WebDriver, selectors: dict[str, str]) -> dict[str, ElementState]:
+    """
+    Returns the state of the first element of each XPath, in one command
+
+    Parameters
+    ----------
+    driver : selenium.webdriver
+    selectors : dict
+        Names mapped to the XPaths to look at
+
+    Returns
+    -------
+    states : dict
+        The same names mapped to whether the element is present, visible,
+        enabled (clickable by the rules of `wait_for`) and checked, its
+        visible text, its link and its src; a missing element is neither of them
+    """
+    return driver.execute_script(QUERY_SCRIPT, selectors)
+
+
+def state(driver: WebDriver, xpath: str) -> ElementState:
+    """
+    Returns the state of the first element of the XPath, see `query`
+    """
+    return query(driver, {"element": xpath})["element"]
+
+
+def query_all(driver: WebDriver, xpath: str) -> list[ElementState]:
+    """
+    Returns the state of every element of the XPath in document order, in one command
+    """
+    return driver.execute_script(QUERY_ALL_SCRIPT, xpath)
+
+
+def set_checked(
+    driver: WebDriver,
+    toggles: dict[str, tuple[str, bool]],
+    timeout: float | None = None,
+) -> dict[str, bool | None]:
+    """
+    Clicks every checkbox which is not in the wanted state and waits until
+    the page applied them all, in one command
+
+    Parameters
+    ----------
+    driver : selenium.webdriver
+    toggles : dict
+        Names mapped to the XPath of a checkbox and whether it should be checked
+    timeout : float
+        Seconds to wait for the new states, defaults to `config.implicit_wait`
+        and is at most `MAX_SCRIPT_WAIT`
+
+    Returns
+    -------
+    states : dict
+        The same names mapped to whether the checkbox is checked in the end,
+        None for a checkbox which is not on the page
+    """
+    timeout = min(config.implicit_wait if timeout is None else timeout, MAX_SCRIPT_WAIT)
+    toggles_js = {name: [xpath, checked] for name, (xpath, checked) in toggles.items()}
+    return driver.execute_async_script(
+        SET_CHECKED_SCRIPT, toggles_js, int(timeout * 1000)
+    )
+
+
+def click(driver: WebDriver, target: str | WebElement, scroll: bool = True) -> bool:
+    """
+    Scrolls an element to the middle of the view and clicks it, in one command
+
+    The click is dispatched by the page, so an overlay on top of the element
+    does not intercept it
+
+    Parameters
+    ----------
+    driver : selenium.webdriver
+    target : str or WebElement
+        The element or its XPath
+    scroll : bool
+        Whether to scroll the element into view first
+
+    Returns
+    -------
+    clicked : bool
+        False when the element is missing or disabled
+    """
+    return bool(driver.execute_script(CLICK_SCRIPT, target, scroll))
+
+
+def dismiss(driver: WebDriver, tag: str, selector: str) -> str:
+    """
+    Clicks the first button of a banner rendered in a shadow root (usually
+    the one declining), or removes the banner when it has none, in one command
+
+    Parameters
+    ----------
+    driver : selenium.webdriver
+    tag : str
+        The tag name of the banner's custom element
+    selector : str
+        The CSS selector of the buttons' container inside the shadow root
+
+    Returns
+    -------
+    result : str
+        'clicked', 'removed' or 'absent'
+    """
+    return driver.execute_script(DISMISS_SCRIPT, tag, selector)
+
+
+def find_now(driver: WebDriver, xpath: str) -> WebElement | None:
+    """
+    Returns the element matching the XPath right now, None if there is none
+    """
+    return driver.execute_script(FIND_SCRIPT, xpath)
+
+
+def present(driver: WebDriver, xpath: str) -> bool:
+    return find_now(driver, xpath) is not None
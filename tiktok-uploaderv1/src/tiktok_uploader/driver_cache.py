@@ -0,0 +1,275 @@
+"""
+Cached resolution of webdriver binaries
+
+`webdriver_manager` probes the installed browser, checks its own cache and
+often the network every time `install()` is called. The path it returns
+only changes when the browser is updated, so it is stored in `drivers.json`
+in the cache directory, keyed by the browser and its version. The version
+itself is read once per browser binary (and again when the binary changes)
+and stored in the same file, so starting another browser costs a `stat`
+and a small JSON read.
+
+Set TIKTOK_UPLOADER_OFFLINE_DRIVERS=1 to never call webdriver_manager: the
+newest cached driver is used, or selenium finds one itself when there is none.
+
+Key Functions
+-------------
+resolve_driver : Returns the path of a driver matching the installed browser
+browser_version : Returns the version of the installed browser
+"""
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from tiktok_uploader import logger
+from tiktok_uploader.utils import cache_dir
+
+OFFLINE_ENV = "TIKTOK_UPLOADER_OFFLINE_DRIVERS"
+CACHE_FILE = "drivers.json"
+
+_VERSION = re.compile(r"\d+(\.\d+){1,3}")
+
+# executables looked up on PATH, then absolute locations per platform
+_BINARIES: dict[str, list[str]] = {
+    "chrome": ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser"],
+    "firefox": ["firefox"],
+    "edge": ["microsoft-edge", "microsoft-edge-stable", "msedge"],
+}
+_LOCATIONS: dict[str, dict[str, list[str]]] = {
+    "darwin": {
+        "chrome": ["/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"],
+        "firefox": ["/Applications/Firefox.app/Contents/MacOS/firefox"],
+        "edge": ["/Applications/Microsoft Edge.app/Contents/MacOS/Microsoft Edge"],
+    },
+    "win32": {
+        "chrome": [
+            r"%PROGRAMFILES%\Google\Chrome\Application\chrome.exe",
+            r"%PROGRAMFILES(X86)%\Google\Chrome\Application\chrome.exe",
+            r"%LOCALAPPDATA%\Google\Chrome\Application\chrome.exe",
+        ],
+        "firefox": [
+            r"%PROGRAMFILES%\Mozilla Firefox\firefox.exe",
+            r"%PROGRAMFILES(X86)%\Mozilla Firefox\firefox.exe",
+        ],
+        "edge": [
+            r"%PROGRAMFILES(X86)%\Microsoft\Edge\Application\msedge.exe",
+            r"%PROGRAMFILES%\Microsoft\Edge\Application\msedge.exe",
+        ],
+    },
+}
+# browsers on Windows do not print their version, the installer records it
+_REGISTRY: dict[str, tuple[str, str]] = {
+    "chrome": (r"Software\Google\Chrome\BLBeacon", "version"),
+    "edge": (r"Software\Microsoft\Edge\BLBeacon", "version"),
+    "firefox": (r"Software\Mozilla\Mozilla Firefox", "CurrentVersion"),
+}
+
+_lock = threading.Lock()
+
+
+def resolve_driver(name: str, offline: bool | None = None) -> str | None:
+    """
+    Returns the path of a webdriver for the installed version of the browser
+
+    Parameters
+    ----------
+    name : str
+        'chrome', 'firefox' or 'edge'
+    offline : bool
+        Never call webdriver_manager, defaults to TIKTOK_UPLOADER_OFFLINE_DRIVERS
+
+    Returns None when no driver is known in offline mode, selenium then
+    looks for one on its own
+    """
+    if offline is None:
+        offline = bool(os.environ.get(OFFLINE_ENV))
+
+    # one lock for the whole lookup, browsers started in parallel by a pool
+    # would otherwise all download the same driver
+    with _lock:
+        cache = _read_cache()
+        version, probed = _browser_version(name, cache)
+        entries: dict[str, Any] = cache.setdefault("drivers", {}).setdefault(name, {})
+
+        entry = entries.get(version) if version else None
+        if entry and os.path.isfile(entry["path"]):
+            if probed:
+                _write_cache(cache)
+            return entry["path"]
+
+        if offline:
+            path = _newest(entries)
+            if path:
+                logger.debug(f"Offline, using the cached {name} driver {path}")
+            else:
+                logger.debug(
+                    f"Offline and no cached {name} driver, selenium will look for one"
+                )
+            return path
+
+        try:
+            path = _INSTALLERS[name]()
+        except Exception as e:
+            path = _newest(entries)
+            if path is None:
+                raise
+            logger.debug(f"Could not resolve the {name} driver ({e}), using {path}")
+            return path
+
+        # an unknown version can not be validated later, webdriver_manager
+        # (which has its own cache) is asked again next time
+        if version:
+            entries[version] = {"path": path, "resolved_at": time.time()}
+        _write_cache(cache)
+        return path
+
+
+def browser_version(name: str) -> str | None:
+    """
+    Returns the version of the installed browser, None if it can not be found
+    """
+    with _lock:
+        cache = _read_cache()
+        version, probed = _browser_version(name, cache)
+        if probed:
+            _write_cache(cache)
+        return version
+
+
+def browser_binary(name: str) -> str | None:
+    """
+    Returns the path of the installed browser
+    """
+    for candidate in _BINARIES.get(name, []):
+        path = shutil.which(candidate)
+        if path:
+            return path
+    for location in _LOCATIONS.get(sys.platform, {}).get(name, []):
+        path = os.path.expandvars(location)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def _browser_version(name: str, cache: dict[str, Any]) -> tuple[str | None, bool]:
+    """
+    Returns the browser's version and whether it was read from the binary
+
+    The binary is only asked when it changed since its version was stored
+    """
+    binary = browser_binary(name)
+    if binary is None:
+        return None, False
+    try:
+        mtime = os.stat(binary).st_mtime_ns
+    except OSError:
+        return None, False
+
+    known = cache.setdefault("browsers", {}).get(binary)
+    if known and known["mtime"] == mtime:
+        return known["version"], False
+
+    version = _read_version(name, binary)
+    if version:
+        cache["browsers"][binary] = {"mtime": mtime, "version": version}
+    return version, version is not None
+
+
+def _read_version(name: str, binary: str) -> str | None:
+    if sys.platform == "win32":
+        return _registry_version(name)
+    try:
+        output = subprocess.run(
+            [binary, "--version"], capture_output=True, text=True, timeout=10
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = _VERSION.search(output)
+    return match.group(0) if match else None
+
+
+def _registry_version(name: str) -> str | None:
+    # the check on sys.platform also tells type checkers winreg exists
+    if name not in _REGISTRY or sys.platform != "win32":
+        return None
+    import winreg
+
+    key, value = _REGISTRY[name]
+    for root in (winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE):
+        try:
+            with winreg.OpenKey(root, key) as handle:
+                return str(winreg.QueryValueEx(handle, value)[0]).split()[0]
+        except OSError:
+            continue
+    return None
+
+
+def _newest(entries: dict[str, Any]) -> str | None:
+    """
+    Returns the most recently resolved driver which still exists
+    """
+    for entry in sorted(entries.values(), key=lambda e: e["resolved_at"], reverse=True):
+        if os.path.isfile(entry["path"]):
+            return entry["path"]
+    return None
+
+
+def _install_chrome() -> str:
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    return ChromeDriverManager().install()
+
+
+def _install_firefox() -> str:
+    from webdriver_manager.firefox import GeckoDriverManager
+
+    return GeckoDriverManager().install()
+
+
+def _install_edge() -> str:
+    from webdriver_manager.microsoft import EdgeChromiumDriverManager
+
+    return EdgeChromiumDriverManager().install()
+
+
+_INSTALLERS: dict[str, Callable[[], str]] = {
+    "chrome": _install_chrome,
+    "firefox": _install_firefox,
+    "edge": _install_edge,
+}
+
+
+def _cache_file() -> Path:
+    return cache_dir() / CACHE_FILE
+
+
+def _read_cache() -> dict[str, Any]:
+    try:
+        with open(_cache_file(), encoding="utf-8") as file:
+            cache = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def _write_cache(cache: dict[str, Any]) -> None:
+    # other processes may read it at the same time, so it is replaced whole
+    path = _cache_file()
+    temporary = path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(cache, file, indent=2)
+        os.replace(temporary, path)
+    except OSError as e:
+        logger.debug(f"Could not save the driver cache: {e}")
+        temporary.unlink(missing_ok=True)
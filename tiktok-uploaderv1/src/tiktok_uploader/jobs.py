@@ -0,0 +1,463 @@
+"""
+Durable upload queue backed by SQLite
+
+Every video goes through the lifecycle
+
+    queued -> uploading -> form_filled -> posted
+                        \\-> failed
+
+and each transition is committed before the next step starts, so a process
+that gets killed can be restarted and picks up exactly the jobs that were not
+posted yet. A job interrupted in `form_filled` may already have been posted,
+it is put under `review` instead of being uploaded a second time.
+
+A worker holds its jobs under a lease: it renews a heartbeat on them every
+few seconds, and jobs whose heartbeat is older than the lease are taken to
+belong to a dead worker, on whatever host it ran.
+
+Key Classes
+-----------
+JobStore : The persistent queue
+
+Key Functions
+-------------
+process_queue : Uploads queued jobs with an UploadSession until none are left
+resolve_reviews : Marks interrupted posts which the ledger knows as posted
+"""
+
+import datetime
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Literal, TypedDict
+
+from tiktok_uploader import logger, metrics
+from tiktok_uploader.types import UploadStatus, VideoDict
+from tiktok_uploader.upload import UploadSession
+from tiktok_uploader.utils import green
+
+JobStatus = Literal["queued", "uploading", "form_filled", "posted", "failed", "review"]
+
+IN_FLIGHT: tuple[JobStatus, ...] = ("uploading", "form_filled")
+
+# seconds a worker's jobs stay its own without a heartbeat
+LEASE_TIMEOUT = 120
+
+INTERRUPTED_POST = "Interrupted while posting, the video may already be posted"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    account TEXT NOT NULL DEFAULT '',
+    path TEXT NOT NULL,
+    video TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    heartbeat REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    UNIQUE (account, path)
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, account, id);
+"""
+
+
+class Job(TypedDict):
+    id: int
+    account: str
+    video: VideoDict
+    status: JobStatus
+    attempts: int
+    error: str | None
+
+
+class JobStore:
+    """
+    A persistent, multi-process safe queue of upload jobs
+
+    Parameters
+    ----------
+    path : str
+        The SQLite database file, created if it does not exist
+    recover : bool
+        Requeues jobs left in flight by workers which are no longer running,
+        when the store is opened and before every claim
+    lease : float
+        Seconds without a heartbeat after which a worker is taken to be dead,
+        the heartbeat is renewed three times per lease
+    """
+
+    def __init__(self, path: str, recover: bool = True, lease: float = LEASE_TIMEOUT):
+        self.path = path
+        self.lease = lease
+        # unique per store, a reused pid or hostname is never mistaken for it
+        self.worker = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._recover = recover
+
+        # autocommit mode, transactions are opened explicitly where needed
+        self._connection = sqlite3.connect(
+            path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._connection.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._heartbeat: threading.Thread | None = None
+
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(SCHEMA)
+            columns = {
+                row["name"]
+                for row in self._connection.execute("PRAGMA table_info(jobs)")
+            }
+            if "heartbeat" not in columns:
+                # a queue created before leases
+                self._connection.execute("ALTER TABLE jobs ADD COLUMN heartbeat REAL")
+
+        if recover:
+            self.recover()
+        metrics.track_queue(self)
+
+    def enqueue(self, video: VideoDict, account: str = "") -> int | None:
+        """
+        Adds a video to the queue, returns its job id
+
+        A video already known for the account (whatever its status) is not
+        added twice and None is returned
+        """
+        ids = self.enqueue_many([video], account)
+        return ids[0] if ids else None
+
+    def enqueue_many(self, videos: list[VideoDict], account: str = "") -> list[int]:
+        """
+        Adds many videos in a single transaction, returns the ids of the new jobs
+        """
+        now = time.time()
+        ids = []
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                for video in videos:
+                    cursor = self._connection.execute(
+                        "INSERT OR IGNORE INTO jobs"
+                        " (account, path, video, created_at, updated_at)"
+                        " VALUES (?, ?, ?, ?, ?)",
+                        (
+                            account,
+                            os.path.abspath(video["path"]),
+                            _dump_video(video),
+                            now,
+                            now,
+                        ),
+                    )
+                    if cursor.rowcount:
+                        ids.append(cursor.lastrowid)
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+        return ids  # type: ignore
+
+    def claim(self, account: str | None = None) -> Job | None:
+        """
+        Atomically takes the oldest queued job (of the account if given)
+
+        Returns None when nothing is queued
+        """
+        query = "SELECT * FROM jobs WHERE status = 'queued'"
+        params: tuple[Any, ...] = ()
+        if account is not None:
+            query += " AND account = ?"
+            params = (account,)
+        query += " ORDER BY id LIMIT 1"
+
+        if self._recover:
+            self.recover()
+        self._start_heartbeat()
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock, so no other worker can
+            # claim the same row between the select and the update
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._connection.execute(query, params).fetchone()
+                if row is None:
+                    self._connection.execute("COMMIT")
+                    return None
+                now = time.time()
+                self._connection.execute(
+                    "UPDATE jobs SET status = 'uploading', worker = ?, heartbeat = ?,"
+                    " attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (self.worker, now, now, row["id"]),
+                )
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+
+        job = _row_to_job(row)
+        job["status"] = "uploading"
+        job["attempts"] += 1
+        return job
+
+    def mark(self, job_id: int, status: JobStatus, error: str | None = None) -> None:
+        """
+        Records a job's new status (and the error for failed jobs)
+        """
+        with self._lock:
+            self._connection.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, error, time.time(), job_id),
+            )
+
+    def requeue_failed(self, max_attempts: int | None = None) -> int:
+        """
+        Puts failed jobs back in the queue, returns how many were requeued
+        """
+        query = (
+            "UPDATE jobs SET status = 'queued', error = NULL WHERE status = 'failed'"
+        )
+        params: tuple[Any, ...] = ()
+        if max_attempts is not None:
+            query += " AND attempts < ?"
+            params = (max_attempts,)
+        with self._lock:
+            return self._connection.execute(query, params).rowcount
+
+    def heartbeat(self) -> None:
+        """
+        Renews the lease on the jobs this store's worker holds
+
+        Called in the background while jobs are claimed
+        """
+        with self._lock:
+            if self._closed.is_set():
+                return
+            self._connection.execute(
+                "UPDATE jobs SET heartbeat = ? WHERE worker = ? AND status IN (?, ?)",
+                (time.time(), self.worker, *IN_FLIGHT),
+            )
+
+    def _start_heartbeat(self) -> None:
+        with self._lock:
+            if self._heartbeat is not None or self._closed.is_set():
+                return
+            self._heartbeat = threading.Thread(
+                target=self._beat, name="tiktok-job-heartbeat", daemon=True
+            )
+            self._heartbeat.start()
+
+    def _beat(self) -> None:
+        while not self._closed.wait(self.lease / 3):
+            try:
+                self.heartbeat()
+            except sqlite3.Error as e:
+                # a busy database, the next beat is still within the lease
+                logger.debug(f"Could not renew the job lease: {e}")
+
+    def recover(self) -> int:
+        """
+        Requeues the uploading jobs whose worker died (its lease expired),
+        returns how many were requeued
+
+        The post button of a job interrupted in `form_filled` may already
+        have been clicked, so it is put under `review` rather than queued
+        again, see `resolve_reviews`
+        """
+        expired = time.time() - self.lease
+        with self._lock:
+            # a job claimed before leases existed has no heartbeat yet
+            dead = self._connection.execute(
+                "SELECT id, status FROM jobs WHERE status IN (?, ?)"
+                " AND COALESCE(heartbeat, updated_at) < ? AND worker IS NOT ?",
+                (*IN_FLIGHT, expired, self.worker),
+            ).fetchall()
+            requeued = [row["id"] for row in dead if row["status"] == "uploading"]
+            review = [row["id"] for row in dead if row["status"] == "form_filled"]
+            self._connection.executemany(
+                "UPDATE jobs SET status = 'queued', worker = NULL, heartbeat = NULL"
+                " WHERE id = ?",
+                [(job_id,) for job_id in requeued],
+            )
+            self._connection.executemany(
+                "UPDATE jobs SET status = 'review', worker = NULL, heartbeat = NULL,"
+                " error = ? WHERE id = ?",
+                [(INTERRUPTED_POST, job_id) for job_id in review],
+            )
+
+        if requeued:
+            logger.debug(green(f"Resuming {len(requeued)} interrupted upload(s)"))
+        if review:
+            logger.warning(
+                f"{len(review)} video paylasim sirasinda yarida kaldi, yayinlanmis"
+                " olabilir, tekrar yuklenmeden once kontrol edilmeli"
+            )
+        return len(requeued)
+
+    def counts(self, account: str | None = None) -> dict[str, int]:
+        """
+        Returns the number of jobs per status
+        """
+        query = "SELECT status, COUNT(*) FROM jobs"
+        params: tuple[Any, ...] = ()
+        if account is not None:
+            query += " WHERE account = ?"
+            params = (account,)
+        query += " GROUP BY status"
+        with self._lock:
+            return dict(self._connection.execute(query, params).fetchall())
+
+    def find(self, status: JobStatus, account: str | None = None) -> list[Job]:
+        """
+        Returns every job with the given status, oldest first
+        """
+        query = "SELECT * FROM jobs WHERE status = ?"
+        params: tuple[Any, ...] = (status,)
+        if account is not None:
+            query += " AND account = ?"
+            params += (account,)
+        query += " ORDER BY id"
+        with self._lock:
+            rows = self._connection.execute(query, params).fetchall()
+        return [_row_to_job(row) for row in rows]
+
+    def get(self, job_id: int) -> Job | None:
+        """
+        Returns a job by id
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT * FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return _row_to_job(row) if row else None
+
+    def close(self) -> None:
+        metrics.untrack_queue(self)
+        self._closed.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self) -> "JobStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def process_queue(
+    store: JobStore, session: UploadSession, account: str | None = None
+) -> int:
+    """
+    Claims and uploads queued jobs with the session until the queue is empty
+
+    Parameters
+    ----------
+    store : JobStore
+        The queue to take jobs from
+    session : UploadSession
+        The session (and browser) used to upload
+    account : str
+        Only processes this account's jobs, the session's account by default
+        (the jobs of other accounts would be posted with its cookies)
+
+    Returns
+    -------
+    posted : int
+        The number of videos which were posted
+    """
+    if account is None:
+        account = session.auth.account_id
+    resolve_reviews(store, session, account)
+
+    current: dict[str, int] = {}
+    previous = session.on_status
+
+    def on_status(video: VideoDict, status: UploadStatus) -> None:
+        if status == "form_filled":
+            store.mark(current["id"], "form_filled")
+        if previous is not None:
+            previous(video, status)
+
+    session.on_status = on_status
+    posted = 0
+    try:
+        first = True
+        while job := store.claim(account):
+            if not first:
+                session.wait_between_videos()
+            first = False
+
+            current["id"] = job["id"]
+            video = job["video"]
+            if session.upload(video, label=f"[job {job['id']}]"):
+                store.mark(job["id"], "posted")
+                posted += 1
+            else:
+                store.mark(job["id"], "failed", video.get("error"))
+    finally:
+        session.on_status = previous
+
+    return posted
+
+
+def resolve_reviews(
+    store: JobStore, session: UploadSession, account: str | None = None
+) -> int:
+    """
+    Marks the jobs under review which the session's ledger knows as posted
+
+    The rest stay under review, a job whose post was never recorded can be
+    queued again by hand with `store.mark(job_id, "queued")`. Only the jobs of
+    `account` are checked, the session's account by default, since its ledger
+    only knows that account's posts
+
+    Returns
+    -------
+    posted : int
+        The number of jobs which turned out to be posted
+    """
+    ledger = session.ledger
+    if ledger is None:
+        return 0
+    if account is None:
+        account = session.auth.account_id
+    posted = 0
+    for job in store.find("review", account):
+        path = job["video"]["path"]
+        try:
+            uploaded = ledger.is_uploaded(path, session.auth.account_id)
+        except OSError:
+            continue  # the file is gone, it can only be checked by hand
+        if uploaded:
+            store.mark(job["id"], "posted")
+            posted += 1
+    return posted
+
+
+def _dump_video(video: VideoDict) -> str:
+    data: dict[str, Any] = dict(video)
+    if isinstance(data.get("schedule"), datetime.datetime):
+        data["schedule"] = data["schedule"].isoformat()
+    return json.dumps(data)
+
+
+def _row_to_job(row: sqlite3.Row) -> Job:
+    video = json.loads(row["video"])
+    if isinstance(video.get("schedule"), str):
+        video["schedule"] = datetime.datetime.fromisoformat(video["schedule"])
+    return {
+        "id": row["id"],
+        "account": row["account"],
+        "video": video,
+        "status": row["status"],
+        "attempts": row["attempts"],
+        "error": row["error"],
+    }
@@ -0,0 +1,144 @@
+"""
+Remembers which files were already posted so the same video is never uploaded twice
+
+Files are identified by a content fingerprint (their size plus a hash of the
+first and last chunk), so a renamed or copied video is still recognised.
+Fingerprints are cached by (path, mtime, size), which makes re-scanning a
+folder of large videos cost a stat call per file.
+
+Key Classes
+-----------
+UploadLedger : The persistent (fingerprint, account) index
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from tiktok_uploader import logger
+
+CHUNK_SIZE = 1024 * 1024  # bytes hashed at each end of the file
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS uploads (
+    fingerprint TEXT NOT NULL,
+    account TEXT NOT NULL,
+    path TEXT NOT NULL,
+    posted_at REAL NOT NULL,
+    PRIMARY KEY (fingerprint, account)
+);
+"""
+
+
+def fingerprint(path: str) -> str:
+    """
+    Returns a fast content fingerprint of a file
+
+    Only the first and last `CHUNK_SIZE` bytes are read, whatever the file size
+    """
+    size = os.path.getsize(path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as file:
+        digest.update(file.read(CHUNK_SIZE))
+        if size > CHUNK_SIZE:
+            file.seek(max(CHUNK_SIZE, size - CHUNK_SIZE))
+            digest.update(file.read(CHUNK_SIZE))
+    return f"{size:x}-{digest.hexdigest()}"
+
+
+class UploadLedger:
+    """
+    A persistent index of the videos already posted, per account
+
+    Parameters
+    ----------
+    path : str
+        The SQLite database file, may be shared with a JobStore
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection = sqlite3.connect(
+            path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        self._cache: dict[str, tuple[int, int, str]] = {}
+        self._uploaded: set[tuple[str, str]] = set()
+
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(SCHEMA)
+
+    def fingerprint(self, path: str) -> str:
+        """
+        Returns the file's fingerprint, only hashing it if it changed since last time
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+
+        cached = self._cache.get(path)
+        if cached is None:
+            with self._lock:
+                cached = self._connection.execute(
+                    "SELECT mtime_ns, size, fingerprint FROM fingerprints WHERE path = ?",
+                    (path,),
+                ).fetchone()
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            self._cache[path] = cached
+            return cached[2]
+
+        value = fingerprint(path)
+        self._cache[path] = (stat.st_mtime_ns, stat.st_size, value)
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?)",
+                (path, stat.st_mtime_ns, stat.st_size, value),
+            )
+        return value
+
+    def is_uploaded(self, path: str, account: str = "") -> bool:
+        """
+        Returns whether or not this content was already posted to the account
+        """
+        key = (self.fingerprint(path), account)
+        if key in self._uploaded:
+            return True
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT 1 FROM uploads WHERE fingerprint = ? AND account = ?", key
+            ).fetchone()
+        if row is not None:
+            self._uploaded.add(key)
+        return row is not None
+
+    def record(self, path: str, account: str = "") -> None:
+        """
+        Remembers that the file was posted to the account
+        """
+        key = (self.fingerprint(path), account)
+        self._uploaded.add(key)
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO uploads VALUES (?, ?, ?, ?)",
+                (*key, os.path.abspath(path), time.time()),
+            )
+        logger.debug("Recorded %s as uploaded", os.path.basename(path))
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self) -> "UploadLedger":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,392 @@
+"""
+Prometheus metrics for long-running uploaders
+
+Metrics are always recorded in memory (it only costs a few dictionary
+updates per upload), `start_metrics_server` exposes them in the Prometheus
+text format on a local HTTP endpoint using only the standard library.
+
+Key Functions
+-------------
+start_metrics_server : Serves /metrics from a background thread
+observe_upload : Records the outcome and stage timings of an upload
+track_driver : Counts a driver as active and reports its memory
+track_queue : Reports the depth of a JobStore
+"""
+
+import os
+import threading
+from collections.abc import Callable, Iterable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, TypeVar
+
+from tiktok_uploader import logger
+from tiktok_uploader.types import TimingRecord
+
+# seconds, from quick clicks to waiting for a large upload to be processed
+DEFAULT_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+METRICS_PORT_ENV = "TIKTOK_METRICS_PORT"
+
+Sample = tuple[str, dict[str, str], float]
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, Any]) -> tuple[str, ...]:
+        return tuple(str(labels.get(label, "")) for label in self.labels)
+
+    def samples(self) -> list[Sample]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """
+    A value which only goes up
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        super().__init__(name, documentation, labels)
+        # an unlabelled metric is reported as 0 before its first update
+        self._values: dict[tuple[str, ...], float] = {} if self.labels else {(): 0}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def samples(self) -> list[Sample]:
+        with self._lock:
+            return [
+                (self.name, dict(zip(self.labels, key)), value)
+                for key, value in self._values.items()
+            ]
+
+
+class Gauge(Counter):
+    """
+    A value which goes up and down
+    """
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """
+    Counts observations in cumulative buckets
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            # one count per bucket, then the sum and the total count
+            counts = self._values.setdefault(key, [0] * (len(self.buckets) + 2))
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[idx] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    def samples(self) -> list[Sample]:
+        samples = []
+        with self._lock:
+            for key, counts in self._values.items():
+                labels = dict(zip(self.labels, key))
+                for bound, count in zip(self.buckets, counts):
+                    samples.append(
+                        (f"{self.name}_bucket", {**labels, "le": _number(bound)}, count)
+                    )
+                samples.append(
+                    (f"{self.name}_bucket", {**labels, "le": "+Inf"}, counts[-1])
+                )
+                samples.append((f"{self.name}_sum", labels, counts[-2]))
+                samples.append((f"{self.name}_count", labels, counts[-1]))
+        return samples
+
+
+M = TypeVar("M", bound=_Metric)
+
+
+class Registry:
+    """
+    The set of metrics served by the endpoint
+
+    Collectors are called on every scrape, for values which are cheaper to
+    read when asked for (like a driver's memory) than to keep up to date
+    """
+
+    def __init__(self) -> None:
+        self.metrics: list[_Metric] = []
+        self.collectors: list[Callable[[], None]] = []
+
+    def register(self, metric: M) -> M:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        for collector in list(self.collectors):
+            try:
+                collector()
+            except Exception as e:
+                logger.debug(f"Metrics collector failed: {e}")
+
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+UPLOADS_STARTED = REGISTRY.register(
+    Counter("tiktok_uploads_started_total", "Uploads sent to the browser")
+)
+UPLOADS_SUCCEEDED = REGISTRY.register(
+    Counter("tiktok_uploads_succeeded_total", "Videos posted")
+)
+UPLOADS_FAILED = REGISTRY.register(
+    Counter(
+        "tiktok_uploads_failed_total",
+        "Uploads which failed, by the stage they failed in",
+        ["stage"],
+    )
+)
+UPLOADS_SKIPPED = REGISTRY.register(
+    Counter("tiktok_uploads_skipped_total", "Videos skipped as already posted")
+)
+UPLOAD_DURATION = REGISTRY.register(
+    Histogram("tiktok_upload_duration_seconds", "Duration of a whole upload")
+)
+STAGE_DURATION = REGISTRY.register(
+    Histogram(
+        "tiktok_stage_duration_seconds", "Duration of each upload stage", ["stage"]
+    )
+)
+STAGE_COMMANDS = REGISTRY.register(
+    Counter(
+        "tiktok_stage_commands_total", "WebDriver commands sent per stage", ["stage"]
+    )
+)
+RETRIES = REGISTRY.register(
+    Counter(
+        "tiktok_retries_total",
+        "Retries inside upload stages, by exception type",
+        ["stage", "exception"],
+    )
+)
+RETRY_WAIT = REGISTRY.register(
+    Counter(
+        "tiktok_retry_wait_seconds_total",
+        "Seconds spent backing off between retries, by retry loop",
+        ["stage"],
+    )
+)
+RETRY_BUDGET_EXHAUSTED = REGISTRY.register(
+    Counter(
+        "tiktok_retry_budget_exhausted_total",
+        "Retries refused because the video's or the worker's budget ran out",
+        ["scope"],
+    )
+)
+SELECTORS_ABSENT = REGISTRY.register(
+    Counter(
+        "tiktok_selectors_absent_total",
+        "Probed selectors whose element was not on the upload page",
+        ["selector"],
+    )
+)
+ACTIVE_DRIVERS = REGISTRY.register(
+    Gauge("tiktok_active_drivers", "Browsers currently used by upload sessions")
+)
+DRIVER_RSS = REGISTRY.register(
+    Gauge(
+        "tiktok_driver_rss_bytes",
+        "Resident memory of each browser and its child processes",
+        ["account"],
+    )
+)
+QUEUE_DEPTH = REGISTRY.register(
+    Gauge("tiktok_queue_jobs", "Jobs in the upload queue by status", ["status"])
+)
+
+_drivers: dict[int, tuple[Any, str]] = {}
+_queues: dict[int, Any] = {}
+_tracking_lock = threading.Lock()
+
+
+def observe_upload(record: TimingRecord) -> None:
+    """
+    Records the outcome, duration, retries and stage latencies of a finished upload
+    """
+    UPLOAD_DURATION.observe(record["total"])
+    failed_stage = "unknown"
+    for span in record["stages"]:
+        STAGE_DURATION.observe(span["duration"], stage=span["stage"])
+        STAGE_COMMANDS.inc(span["commands"], stage=span["stage"])
+        for exception in span["retry_errors"]:
+            RETRIES.inc(stage=span["stage"], exception=exception)
+        if span["error"]:
+            failed_stage = span["stage"]
+
+    if record["success"]:
+        UPLOADS_SUCCEEDED.inc()
+    else:
+        UPLOADS_FAILED.inc(stage=failed_stage)
+
+
+def track_driver(driver: Any, account: str = "") -> None:
+    """
+    Counts the driver as active until `untrack_driver` is called
+    """
+    with _tracking_lock:
+        if id(driver) not in _drivers:
+            _drivers[id(driver)] = (driver, account)
+            ACTIVE_DRIVERS.inc()
+
+
+def untrack_driver(driver: Any) -> None:
+    with _tracking_lock:
+        if _drivers.pop(id(driver), None) is not None:
+            ACTIVE_DRIVERS.dec()
+
+
+def track_queue(store: Any) -> None:
+    """
+    Reports the job counts of the store on every scrape
+    """
+    with _tracking_lock:
+        _queues[id(store)] = store
+
+
+def untrack_queue(store: Any) -> None:
+    with _tracking_lock:
+        _queues.pop(id(store), None)
+
+
+def _collect_drivers() -> None:
+    # imported here, browsers loads the config which metrics does not need
+    from tiktok_uploader.browsers import driver_rss
+
+    with _tracking_lock:
+        drivers = list(_drivers.values())
+
+    rss: dict[str, float] = {}
+    for driver, account in drivers:
+        driver_bytes = driver_rss(driver)
+        if driver_bytes is not None:
+            rss[account] = rss.get(account, 0) + driver_bytes
+    DRIVER_RSS.clear()
+    for account, total in rss.items():
+        DRIVER_RSS.set(total, account=account)
+
+
+def _collect_queues() -> None:
+    with _tracking_lock:
+        stores = list(_queues.values())
+
+    depth: dict[str, float] = {}
+    for store in stores:
+        for status, count in store.counts().items():
+            depth[status] = depth.get(status, 0) + count
+    for status in ("queued", "uploading", "form_filled", "posted", "failed", "review"):
+        QUEUE_DEPTH.set(depth.get(status, 0), status=status)
+
+
+REGISTRY.collectors += [_collect_drivers, _collect_queues]
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        pass  # scrapes every few seconds would flood the log
+
+
+def start_metrics_server(
+    port: int = 9464, host: str = "127.0.0.1"
+) -> ThreadingHTTPServer:
+    """
+    Serves the metrics on http://host:port/metrics from a daemon thread
+
+    Call `shutdown()` on the returned server to stop it
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(
+        target=server.serve_forever, name="tiktok-metrics", daemon=True
+    )
+    thread.start()
+    logger.debug(f"Serving metrics on http://{host}:{server.server_port}/metrics")
+    return server
+
+
+def start_metrics_server_from_env() -> ThreadingHTTPServer | None:
+    """
+    Starts the server if the TIKTOK_METRICS_PORT environment variable is set
+    """
+    port = os.environ.get(METRICS_PORT_ENV)
+    if not port:
+        return None
+    return start_metrics_server(int(port))
+
+
+def _labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = (f'{key}="{_escape(value)}"' for key, value in labels.items())
+    return "{" + ",".join(pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
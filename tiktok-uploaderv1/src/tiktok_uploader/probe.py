@@ -0,0 +1,183 @@
+"""
+Finds out up front which elements of the upload page are there
+
+Some elements only show up now and then (the cookies banner, the split
+window prompt, the stitch and duet boxes on some accounts). A stage looking
+for one of them used to wait `implicit_wait` seconds whenever it was
+missing. `SelectorProbe` instead checks every selector of the form with one
+script once the page loaded, once the video was selected and once it was
+processed, giving
+late elements a short shared moment (`probe_settle`) to appear, so a stage
+whose element is known to be absent is skipped right away.
+
+Every probe is logged as a selector health report, a selector the upload
+needs which is missing usually means TikTok changed the page.
+
+Key Classes
+-----------
+SelectorProbe : The state of the upload page's selectors
+"""
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from tiktok_uploader import config, logger, metrics
+from tiktok_uploader.utils import red
+from tiktok_uploader.waits import MAX_SCRIPT_WAIT
+
+# when a selector's element is on the page: once it loaded, once the video was
+# selected, once it was processed, or only in response to an action (never
+# known to be absent)
+PHASES = ("page", "form", "processed")
+
+# the selectors an upload cannot go without
+REQUIRED = frozenset({"upload_video", "description", "post"})
+
+PROBE_SCRIPT = """
+const [selectors, expected, timeoutMs, done] = arguments;
+
+function found() {
+  const present = [];
+  for (const [name, xpath] of Object.entries(selectors)) {
+    const el = document.evaluate(
+      xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+    ).singleNodeValue;
+    if (el) present.push(name);
+  }
+  return present;
+}
+
+function complete(present) {
+  return expected.every(name => present.includes(name));
+}
+
+const present = found();
+if (complete(present) || timeoutMs <= 0) { done(present); return; }
+
+const observer = new MutationObserver(() => {
+  const now = found();
+  if (complete(now)) finish(now);
+});
+const timer = setTimeout(() => finish(found()), timeoutMs);
+
+function finish(value) {
+  observer.disconnect();
+  clearTimeout(timer);
+  done(value);
+}
+
+observer.observe(document, { subtree: true, childList: true });
+"""
+
+
+def probed_selectors() -> dict[str, tuple[str, str | None]]:
+    """
+    Returns the probed selectors with their XPath and the phase from which
+    their element is on the page (None if it appears in response to an action)
+    """
+    upload = config.selectors.upload
+    return {
+        "upload_video": (upload.upload_video, "page"),
+        # a custom element, its tag name is enough for XPath
+        "cookies_banner": (f"//{upload.cookies_banner.banner}", "page"),
+        "description": (upload.description, "form"),
+        # offered for long videos once TikTok processed them
+        "split_window": (upload.split_window, "processed"),
+        "comment": (upload.comment, "form"),
+        "duet": (upload.duet, "form"),
+        "stitch": (upload.stitch, "form"),
+        "post": (upload.post, "form"),
+        "process_confirmation": (upload.process_confirmation, None),
+        "mention_box": (upload.mention_box, None),
+        "post_now": (upload.post_now, None),
+        "post_confirmation": (upload.post_confirmation, None),
+    }
+
+
+class SelectorProbe:
+    """
+    The state of the upload page's selectors, each one is 'present',
+    'absent' or 'pending' (not known yet)
+
+    Parameters
+    ----------
+    driver : selenium.webdriver
+    settle : float
+        Seconds missing elements are given to show up, `config.probe_settle`
+        by default
+    """
+
+    def __init__(self, driver: WebDriver, settle: float | None = None):
+        self.driver = driver
+        self.settle = config.probe_settle if settle is None else settle
+        self.states: dict[str, str] = {}
+
+    def run(self, phase: str) -> dict[str, str]:
+        """
+        Probes the selectors of `phase` and the later ones in one script,
+        the page has just reached `phase`
+
+        The selectors of earlier phases keep the state they were probed with,
+        the stages using them already ran. A failing probe leaves the
+        selectors pending, the stages then look for their elements like they
+        would without a probe.
+        """
+        later = PHASES[PHASES.index(phase) :]
+        selectors, expected = {}, []
+        for name, (xpath, when) in probed_selectors().items():
+            if when is None or when in later:
+                selectors[name] = xpath
+            if when == phase:
+                expected.append(name)
+        for name in selectors:
+            self.states.pop(name, None)
+        try:
+            present = set(
+                self.driver.execute_async_script(
+                    PROBE_SCRIPT,
+                    selectors,
+                    expected,
+                    int(min(self.settle, MAX_SCRIPT_WAIT) * 1000),
+                )
+            )
+        except WebDriverException as e:
+            logger.debug(f"Selector probe failed: {e}")
+            return self.states
+
+        for name in selectors:
+            if name in present:
+                self.states[name] = "present"
+            else:
+                self.states[name] = "absent" if name in expected else "pending"
+        self._report(phase, expected)
+        return self.states
+
+    def absent(self, name: str) -> bool:
+        """
+        Returns whether the element is known not to be on the page
+        """
+        return self.states.get(name) == "absent"
+
+    def report(self) -> str:
+        """
+        Returns the selector health report, like 'present: a, b | absent: c'
+        """
+        groups = []
+        for state in ("present", "absent", "pending"):
+            names = [name for name, value in self.states.items() if value == state]
+            if names:
+                groups.append(f"{state}: {', '.join(names)}")
+        return " | ".join(groups)
+
+    def _report(self, phase: str, probed: list[str]) -> None:
+        logger.debug(f"Selector health ({phase}): {self.report()}")
+        for name in probed:
+            if self.states[name] != "absent":
+                continue
+            metrics.SELECTORS_ABSENT.inc(selector=name)
+            if name in REQUIRED:
+                logger.warning(
+                    red(
+                        f"Secici sayfada bulunamadi, TikTok sayfasi degismis olabilir: {name}"
+                    )
+                )
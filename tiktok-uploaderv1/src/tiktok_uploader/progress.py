@@ -0,0 +1,206 @@
+"""
+Progress of the video's transfer, and detection of transfers which stalled
+
+After the file is given to the file input, TikTok uploads it in the
+background and shows how far it got in a progress indicator. `watch_transfer`
+reads that indicator about once per `progress_interval` (a single script
+which answers early when the upload finishes) and turns it into the bytes
+sent, the throughput and the time left. A transfer whose indicator did not
+move for `stall_timeout` seconds (or longer, for a large video which needs
+more time per percent at `timeouts.min_throughput`) is given up right away
+instead of waiting for the whole timeout, so it can be tried again.
+
+Key Classes
+-----------
+UploadStalled : The transfer stopped making progress
+
+Key Functions
+-------------
+watch_transfer : Waits for the transfer to finish and reports its progress
+"""
+
+import time
+from collections import deque
+from collections.abc import Callable
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from tiktok_uploader import config
+from tiktok_uploader.timeouts import MIB
+from tiktok_uploader.types import UploadProgress
+from tiktok_uploader.waits import MAX_SCRIPT_WAIT
+
+# the throughput is averaged over the samples of this many seconds
+THROUGHPUT_WINDOW = 10
+
+PROGRESS_SCRIPT = """
+const [doneXpath, progressXpath, timeoutMs, done] = arguments;
+
+function find(xpath) {
+  return document.evaluate(
+    xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+  ).singleNodeValue;
+}
+
+// a progress bar, a <progress> element or a text like "Uploading 42%"
+function percent() {
+  const el = find(progressXpath);
+  if (!el) return null;
+  const now = parseFloat(el.getAttribute('aria-valuenow') ?? el.value);
+  if (!isNaN(now)) {
+    const max = parseFloat(el.getAttribute('aria-valuemax') ?? el.max) || 100;
+    return 100 * now / max;
+  }
+  const text = (el.textContent || '').match(/(\\d+(?:\\.\\d+)?)\\s*%/);
+  if (text) return parseFloat(text[1]);
+  const width = (el.style && el.style.width || '').match(/(\\d+(?:\\.\\d+)?)%/);
+  return width ? parseFloat(width[1]) : null;
+}
+
+function state() {
+  return { finished: !!find(doneXpath), percent: percent() };
+}
+
+const now = state();
+if (now.finished) { done(now); return; }
+
+const observer = new MutationObserver(() => {
+  if (find(doneXpath)) finish();
+});
+const timer = setTimeout(finish, timeoutMs);
+
+function finish() {
+  observer.disconnect();
+  clearTimeout(timer);
+  done(state());
+}
+
+observer.observe(document, {
+  subtree: true, childList: true, attributes: true, characterData: true
+});
+"""
+
+
+class UploadStalled(Exception):
+    """
+    The transfer of the video made no progress for its stall window
+    """
+
+
+def watch_transfer(
+    driver: WebDriver,
+    path: str,
+    size: int,
+    timeout: float,
+    on_progress: Callable[[UploadProgress], None] | None = None,
+    stall_timeout: float | None = None,
+    interval: float | None = None,
+    started: float | None = None,
+) -> None:
+    """
+    Waits until the video was uploaded and processed (`process_confirmation`)
+
+    Parameters
+    ----------
+    driver : selenium.webdriver
+    path : str
+        The video being uploaded
+    size : int
+        The video's bytes
+    timeout : float
+        Seconds the transfer may take, raises TimeoutException once they are over
+    on_progress : function
+        Called with the progress after every sample
+    stall_timeout : float
+        Seconds the indicator may stand still before UploadStalled is raised,
+        `config.stall_timeout` by default, 0 disables the detection. A video
+        whose percent takes longer at `timeouts.min_throughput` is given that
+        long instead. The detection starts with the first reading of the
+        indicator, a page without one is only bounded by `timeout`
+    interval : float
+        Seconds between two samples, `config.progress_interval` by default
+    started : float
+        The `time.monotonic()` the file was given to the page, the elapsed
+        time is counted from it (from the call by default)
+    """
+    stall_timeout = config.stall_timeout if stall_timeout is None else stall_timeout
+    interval = config.progress_interval if interval is None else interval
+    selectors = config.selectors.upload
+    window = _stall_window(size, stall_timeout)
+
+    start = time.monotonic() if started is None else started
+    deadline = time.monotonic() + timeout
+    # (time, bytes sent) of the recent samples
+    samples: deque[tuple[float, int]] = deque()
+    last_change: float | None = None
+
+    while True:
+        remaining = deadline - time.monotonic()
+        wait = max(0.0, min(interval, remaining, MAX_SCRIPT_WAIT))
+        state = driver.execute_async_script(
+            PROGRESS_SCRIPT,
+            selectors.process_confirmation,
+            selectors.upload_progress,
+            int(wait * 1000),
+        )
+        now = time.monotonic()
+        percent = state["percent"]
+        if state["finished"]:
+            percent = 100.0
+
+        if percent is not None:
+            sent = int(size * min(100.0, max(0.0, percent)) / 100)
+            if not samples or sent != samples[-1][1]:
+                last_change = now
+            samples.append((now, sent))
+            while len(samples) > 2 and now - samples[0][0] > THROUGHPUT_WINDOW:
+                samples.popleft()
+
+            if on_progress is not None:
+                on_progress(_progress(path, size, sent, samples, now - start))
+
+        if state["finished"]:
+            return
+        if now >= deadline:
+            raise TimeoutException(
+                f"Timed out after {timeout:.0f}s waiting for the upload of {path}"
+            )
+        # a transfer at 100% is being processed, which shows no progress
+        transferring = percent is not None and percent < 100
+        stalled = last_change is not None and now - last_change > window
+        if transferring and stall_timeout and stalled:
+            raise UploadStalled(
+                f"Upload made no progress for {window:.0f}s at {percent:.0f}%"
+            )
+
+
+def _stall_window(size: int, stall_timeout: float) -> float:
+    """
+    Seconds the indicator may stand still before the transfer counts as stalled
+
+    The indicator often only shows whole percents, so a healthy transfer of a
+    large video can stand still for as long as a percent of it takes at
+    `timeouts.min_throughput`
+    """
+    min_throughput = config.timeouts.min_throughput
+    if not min_throughput:
+        return stall_timeout
+    return max(stall_timeout, size / 100 / (min_throughput * MIB))
+
+
+def _progress(
+    path: str, size: int, sent: int, samples: deque[tuple[float, int]], elapsed: float
+) -> UploadProgress:
+    (first_time, first_sent), (last_time, last_sent) = samples[0], samples[-1]
+    span = last_time - first_time
+    throughput = (last_sent - first_sent) / span if span > 0 else 0.0
+    return {
+        "path": path,
+        "bytes_sent": sent,
+        "total_bytes": size,
+        "percent": round(100 * sent / size, 1) if size else 100.0,
+        "throughput": throughput,
+        "eta": (size - sent) / throughput if throughput > 0 else None,
+        "elapsed": elapsed,
+    }
@@ -0,0 +1,230 @@
+"""
+Retries with exponential backoff, jitter and retry budgets
+
+Every retry loop of the upload stages goes through a `Retry`, configured by
+the `[retry]` table of config.toml:
+
+- exceptions are classified by name: `fatal` ones are never retried,
+  `no_backoff` ones (like a stale element, which is fixed by finding the
+  element again) wait a short fixed delay, any other waits
+  `base_delay * multiplier ** n`, capped at `max_delay`, with random jitter
+- a video may retry `video_budget` times across all of its stages and a
+  worker (an `UploadSession`) `worker_budget` times per `worker_window`
+  seconds, so a page which is broken for good fails fast instead of every
+  stage using up its own attempts
+
+Key Classes
+-----------
+Retry : The attempts of one retry loop
+RetryBudget : Retries allowed within a sliding window
+
+Key Functions
+-------------
+retry_budgets : Puts the budgets of an upload in place for the stages it runs
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from tiktok_uploader import config, logger, metrics
+from tiktok_uploader.timing import record_retry
+
+
+class RetryBudget:
+    """
+    Allows `limit` retries, within any `window` seconds when a window is given
+
+    Parameters
+    ----------
+    limit : int
+        Retries allowed, unlimited if None
+    window : float
+        Length of the sliding window in seconds, the limit is for the
+        lifetime of the budget if None
+    scope : str
+        Reported in the metrics when the budget runs out
+    """
+
+    def __init__(self, limit: int | None, window: float | None = None, scope: str = ""):
+        self.limit = limit
+        self.window = window
+        self.scope = scope
+        self._spent: deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        """
+        Spends one retry, returns False when none is left
+        """
+        if self.limit is None:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            if self.window is not None:
+                while self._spent and now - self._spent[0] > self.window:
+                    self._spent.popleft()
+            if len(self._spent) >= self.limit:
+                metrics.RETRY_BUDGET_EXHAUSTED.inc(scope=self.scope)
+                return False
+            self._spent.append(now)
+            return True
+
+    @property
+    def spent(self) -> int:
+        with self._lock:
+            return len(self._spent)
+
+
+# the budgets of the upload running in the current thread (or copied context)
+_video_budget: ContextVar[RetryBudget | None] = ContextVar(
+    "tiktok_uploader_video_budget", default=None
+)
+_worker_budget: ContextVar[RetryBudget | None] = ContextVar(
+    "tiktok_uploader_worker_budget", default=None
+)
+
+
+def worker_budget() -> RetryBudget:
+    """
+    Returns a new budget for a worker, from the config
+    """
+    policy = config.retry
+    return RetryBudget(policy.worker_budget, policy.worker_window, "worker")
+
+
+@contextmanager
+def retry_budgets(worker: RetryBudget | None = None) -> Iterator[RetryBudget]:
+    """
+    Gives the stages run inside the `with` block a new video budget and the
+    worker's budget, yields the video budget
+    """
+    video = RetryBudget(config.retry.video_budget, scope="video")
+    video_token = _video_budget.set(video)
+    worker_token = _worker_budget.set(worker)
+    try:
+        yield video
+    finally:
+        _worker_budget.reset(worker_token)
+        _video_budget.reset(video_token)
+
+
+def classify(exception: BaseException) -> str:
+    """
+    Returns 'fatal', 'no_backoff' or 'backoff' for the exception
+
+    The names in the config are matched against the exception's class and
+    its base classes
+    """
+    names = {cls.__name__ for cls in type(exception).__mro__}
+    policy = config.retry
+    if names.intersection(policy.fatal):
+        return "fatal"
+    if names.intersection(policy.no_backoff):
+        return "no_backoff"
+    return "backoff"
+
+
+def backoff_delay(retry: int, kind: str = "backoff") -> float:
+    """
+    Returns the seconds to wait before the `retry`-th retry (counted from 0)
+    """
+    policy = config.retry
+    if kind == "no_backoff":
+        delay = policy.base_delay
+    else:
+        delay = min(policy.max_delay, policy.base_delay * policy.multiplier**retry)
+    # the delay is spread over [1 - jitter, 1] of itself, so workers which
+    # failed together do not all come back at the same moment
+    return delay * (1 - policy.jitter * random.random())
+
+
+class Retry:
+    """
+    The attempts of one retry loop
+
+    Iterating yields the attempt numbers, `failed` is called with the
+    exception of a failed attempt and either waits before the next one or
+    raises the exception again
+
+        retry = Retry("set_description")
+        for attempt in retry:
+            try:
+                ...
+                break
+            except StaleElementReferenceException as e:
+                retry.failed(e)
+
+    Parameters
+    ----------
+    name : str
+        The loop's name, its attempts are read from `[retry.stages]`
+    attempts : int
+        Overrides the configured number of attempts
+    sleep : function
+        Used to wait between attempts
+    """
+
+    def __init__(
+        self,
+        name: str,
+        attempts: int | None = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        policy = config.retry
+        if attempts is None:
+            attempts = getattr(policy.stages, name, policy.attempts)
+        self.name = name
+        self.attempts = max(1, attempts)
+        self.sleep = sleep
+        self.attempt = 0
+        self.retries = 0
+
+    def __iter__(self) -> Iterator[int]:
+        while self.attempt < self.attempts:
+            self.attempt += 1
+            yield self.attempt
+
+    @property
+    def last(self) -> bool:
+        """
+        Whether the running attempt is the last one
+        """
+        return self.attempt >= self.attempts
+
+    def allow(self, exception: BaseException) -> bool:
+        """
+        Returns whether another attempt may follow the failed one, spending
+        a retry of the budgets when it may
+        """
+        if self.last or classify(exception) == "fatal":
+            return False
+        for budget in (_video_budget.get(), _worker_budget.get()):
+            if budget is not None and not budget.take():
+                logger.debug(
+                    f"Retry budget of the {budget.scope} used up, {self.name} is not retried"
+                )
+                return False
+        return True
+
+    def failed(self, exception: BaseException) -> None:
+        """
+        Waits before the next attempt, raises the exception when there is none
+        """
+        if not self.allow(exception):
+            raise exception
+        self.wait(exception)
+
+    def wait(self, exception: BaseException) -> None:
+        """
+        Records the retry and sleeps its backoff, after `allow` returned True
+        """
+        delay = backoff_delay(self.retries, classify(exception))
+        self.retries += 1
+        record_retry(exception)
+        metrics.RETRY_WAIT.inc(delay, stage=self.name)
+        self.sleep(delay)
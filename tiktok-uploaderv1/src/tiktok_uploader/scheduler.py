@@ -0,0 +1,221 @@
+"""
+Runs uploads for many accounts in parallel, one browser per worker process
+
+Key Functions
+-------------
+run_jobs : Uploads a manifest of (account, video) jobs concurrently
+load_manifest : Reads jobs from a JSON manifest
+"""
+
+import datetime
+import json
+import multiprocessing
+import os
+import queue
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, cast
+
+from tiktok_uploader import logger
+from tiktok_uploader.auth import AuthBackend
+from tiktok_uploader.types import JobResult, UploadJob, VideoDict
+from tiktok_uploader.upload import UploadSession
+from tiktok_uploader.utils import green, red
+
+
+def run_jobs(
+    jobs: list[UploadJob],
+    max_workers: int | None = None,
+    headless: bool = True,
+    **session_kwargs,
+) -> Iterator[JobResult]:
+    """
+    Uploads every job, yielding one result per job as soon as it finishes
+
+    Jobs of the same account run one after another in a single worker (and a
+    single browser), while different accounts run in parallel. At most
+    `max_workers` browsers are open at any time.
+
+    Parameters
+    ----------
+    jobs : list
+        The (account, video) pairs to upload, `account` is a cookies file path
+    max_workers : int
+        The global cap on concurrent browsers, defaults to the number of cores
+    headless : bool
+        Whether or not the browsers should be run in headless mode
+    **session_kwargs :
+        Additional keyword arguments passed to each worker's UploadSession
+
+    Yields
+    ------
+    result : dict
+        The account, path, success flag, error and stage timings of a finished job
+    """
+    by_account: dict[str, list[VideoDict]] = {}
+    for job in jobs:
+        by_account.setdefault(job["account"], []).append(job["video"])
+
+    if not by_account:
+        return
+
+    max_workers = min(max_workers or os.cpu_count() or 1, len(by_account))
+    logger.debug(
+        "Scheduling %d jobs for %d accounts on %d workers",
+        len(jobs),
+        len(by_account),
+        max_workers,
+    )
+
+    with multiprocessing.Manager() as manager:
+        results = manager.Queue()
+        reported: dict[str, int] = {account: 0 for account in by_account}
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures: dict[Future, str] = {
+                executor.submit(
+                    _run_account_jobs,
+                    account,
+                    videos,
+                    results,
+                    headless,
+                    session_kwargs,
+                ): account
+                for account, videos in by_account.items()
+            }
+
+            while futures:
+                try:
+                    result: JobResult = results.get(timeout=0.5)
+                except queue.Empty:
+                    pass
+                else:
+                    reported[result["account"]] += 1
+                    yield result
+                    continue
+
+                for future in [f for f in futures if f.done()]:
+                    account = futures.pop(future)
+                    yield from _drain(results, reported)
+                    yield from _report_crash(
+                        future, account, by_account[account], reported[account]
+                    )
+
+            yield from _drain(results, reported)
+
+
+def _drain(results: Any, reported: dict[str, int]) -> Iterator[JobResult]:
+    """
+    Yields every result which is already waiting in the queue
+    """
+    while True:
+        try:
+            result: JobResult = results.get_nowait()
+        except queue.Empty:
+            return
+        reported[result["account"]] += 1
+        yield result
+
+
+def _report_crash(
+    future: Future, account: str, videos: list[VideoDict], reported: int
+) -> Iterator[JobResult]:
+    """
+    Reports the jobs a worker never got to when it died
+    """
+    exception = future.exception()
+    if exception is None:
+        return
+
+    logger.error(red(f"Worker for {account} crashed: {exception}"))
+    for video in videos[reported:]:
+        yield {
+            "account": account,
+            "path": video.get("path", ""),
+            "success": False,
+            "error": f"Worker crashed: {exception}",
+            "timings": None,
+        }
+
+
+def _run_account_jobs(
+    account: str,
+    videos: list[VideoDict],
+    results: Any,
+    headless: bool,
+    session_kwargs: dict[str, Any],
+) -> None:
+    """
+    Uploads an account's videos sequentially with one browser (runs in a worker process)
+    """
+    auth = AuthBackend(cookies=account)
+    with UploadSession(auth, headless=headless, **session_kwargs) as session:
+        total = len(videos)
+        for idx, video in enumerate(videos, 1):
+            success = session.upload(video, label=f"[{account} {idx}/{total}]")
+            results.put(
+                {
+                    "account": account,
+                    "path": video.get("path", ""),
+                    "success": success,
+                    "error": video.get("error", ""),
+                    "timings": video.get("timings"),
+                }
+            )
+
+    logger.debug(green(f"Finished uploads for {account}"))
+
+
+def load_manifest(path: str) -> list[UploadJob]:
+    """
+    Reads a JSON manifest of upload jobs
+
+    The manifest is a list of objects, each with an `account` (cookies file)
+    and either the video's keys inline or a `videos` list. Schedules are
+    given as ISO 8601 strings:
+
+        [
+            {"account": "tmp/user1.txt", "path": "a.mp4", "description": "#a"},
+            {"account": "tmp/user2.txt", "videos": [{"path": "b.mp4"}]}
+        ]
+
+    The whole manifest is checked before any job runs: a ValueError names the
+    first entry without an account or with a video without a path or with an
+    invalid schedule, a FileNotFoundError the first account whose cookies file
+    does not exist.
+    """
+    with open(path, encoding="utf-8") as file:
+        entries = json.load(file)
+    if not isinstance(entries, list):
+        raise ValueError(f"The manifest at {path} must be a list of jobs")
+
+    jobs: list[UploadJob] = []
+    for index, entry in enumerate(entries, 1):
+        if not isinstance(entry, dict) or not entry.get("account"):
+            raise ValueError(f"Manifest entry {index} has no account")
+        entry = dict(entry)
+        account = entry.pop("account")
+        if not os.path.isfile(account):
+            raise FileNotFoundError(
+                f"Could not find the cookies of manifest entry {index} at {account}"
+            )
+
+        videos = entry.pop("videos", None) or [entry]
+        for video in videos:
+            if not isinstance(video, dict) or not video.get("path"):
+                raise ValueError(f"Manifest entry {index} has a video without a path")
+            schedule = video.get("schedule")
+            if isinstance(schedule, str):
+                try:
+                    video["schedule"] = datetime.datetime.fromisoformat(schedule)
+                except ValueError:
+                    raise ValueError(
+                        f"Manifest entry {index} has an invalid schedule: {schedule}"
+                    ) from None
+            elif schedule is not None:
+                raise ValueError(
+                    f"Manifest entry {index} has an invalid schedule: {schedule}"
+                )
+            jobs.append({"account": account, "video": cast(VideoDict, video)})
+
+    return jobs
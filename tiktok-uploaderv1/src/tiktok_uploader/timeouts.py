@@ -0,0 +1,302 @@
+"""
+Timeouts learned from the latencies uploads actually saw
+
+`explicit_wait` and `uploading_wait` are guesses which fit no wait well: a
+page which stopped loading is only noticed after a minute, while a large
+file on a slow proxy may need far longer than three minutes to transfer.
+The long waits of an upload are measured instead and kept in a small
+histogram store on disk, per wait, account and proxy. Once a wait was seen
+`min_samples` times its deadline is a high percentile of those latencies
+times a safety margin, configured by the `[timeouts]` table of config.toml.
+
+The transfer of the video is measured in seconds per MiB, so its deadline
+grows with the file. Before anything was learned it is given at least the
+time the file takes at `min_throughput`.
+
+    with measure("transfer", config.explicit_wait, size=file_size) as deadline:
+        wait_for(driver, xpath, timeout=deadline)
+
+Key Classes
+-----------
+LatencyStore : Histograms of observed latencies, kept on disk
+AdaptiveTimeouts : The deadlines of one account and proxy
+
+Key Functions
+-------------
+adaptive_timeouts : Puts the timeouts of an upload in place for the waits it runs
+measure : Returns the deadline of a wait and records how long it took
+wait_deadline : Returns the deadline `measure` gives a wait
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from selenium.common.exceptions import TimeoutException
+
+from tiktok_uploader import config, logger
+from tiktok_uploader.utils import cache_dir
+
+CACHE_FILE = "latencies.json"
+
+# upper bounds of the histogram buckets in seconds, 25% apart from 50 ms to
+# about two hours, so a percentile is at most a quarter off
+BUCKETS = tuple(round(0.05 * 1.25**i, 3) for i in range(54))
+
+MIB = 1024 * 1024
+
+# the waits measured in seconds per MiB of the video
+PER_MIB = frozenset({"transfer"})
+
+
+class LatencyStore:
+    """
+    Histograms of observed latencies, saved as JSON
+
+    Every latency is counted under the exact (wait, account, proxy) key and
+    under the account's and the wait's aggregates, so a new proxy or account
+    starts from what the others have seen. Several processes may share the
+    file: `save` adds what this store observed to what is on disk.
+
+    Parameters
+    ----------
+    path : str
+        The JSON file, `latencies.json` in the cache directory by default
+    """
+
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path) if path is not None else cache_dir() / CACHE_FILE
+        self._lock = threading.Lock()
+        self._counts = self._read()
+        # observed since the last save
+        self._new: dict[str, list[int]] = {}
+
+    def observe(
+        self, wait: str, seconds: float, account: str = "", proxy: str = ""
+    ) -> None:
+        """
+        Counts a latency of the wait
+        """
+        bucket = min(bisect.bisect_left(BUCKETS, seconds), len(BUCKETS) - 1)
+        with self._lock:
+            for key in _keys(wait, account, proxy):
+                for counts in (self._counts, self._new):
+                    counts.setdefault(key, [0] * len(BUCKETS))[bucket] += 1
+
+    def quantile(
+        self,
+        wait: str,
+        q: float,
+        account: str = "",
+        proxy: str = "",
+        min_samples: int = 1,
+    ) -> float | None:
+        """
+        Returns the upper bound of the bucket holding the q-quantile of the
+        most specific key with `min_samples` latencies, None if there is none
+        """
+        with self._lock:
+            for key in _keys(wait, account, proxy):
+                counts = self._counts.get(key, [])
+                total = sum(counts)
+                if total < max(1, min_samples):
+                    continue
+                rank = q * total
+                seen = 0
+                for bound, count in zip(BUCKETS, counts):
+                    seen += count
+                    if seen >= rank:
+                        return bound
+                return BUCKETS[-1]
+        return None
+
+    def save(self) -> None:
+        """
+        Adds the latencies observed since the last save to the file
+        """
+        with self._lock:
+            if not self._new:
+                return
+            new, self._new = self._new, {}
+            counts = self._read()
+            for key, added in new.items():
+                stored = counts.setdefault(key, [0] * len(BUCKETS))
+                counts[key] = [a + b for a, b in zip(stored, added)]
+            self._counts = counts
+
+            # other processes may read it at the same time, so it is replaced whole
+            temporary = self.path.with_suffix(f".{os.getpid()}.tmp")
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(temporary, "w", encoding="utf-8") as file:
+                    json.dump({"buckets": BUCKETS, "counts": counts}, file)
+                os.replace(temporary, self.path)
+            except OSError as e:
+                logger.debug(f"Could not save the latencies: {e}")
+                temporary.unlink(missing_ok=True)
+
+    def _read(self) -> dict[str, list[int]]:
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        # a file written with other buckets can not be read, it is started over
+        if not isinstance(data, dict) or data.get("buckets") != list(BUCKETS):
+            return {}
+        return {
+            key: counts
+            for key, counts in data.get("counts", {}).items()
+            if isinstance(counts, list) and len(counts) == len(BUCKETS)
+        }
+
+
+def _keys(wait: str, account: str, proxy: str) -> list[str]:
+    """
+    The keys a latency is counted under, the most specific one first
+    """
+    return [f"{wait}|{account}|{proxy}", f"{wait}|{account}|*", f"{wait}|*|*"]
+
+
+_default_store: LatencyStore | None = None
+_default_lock = threading.Lock()
+
+
+def default_store() -> LatencyStore:
+    """
+    Returns the store in the cache directory, shared by every session of the process
+    """
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = LatencyStore()
+        return _default_store
+
+
+class AdaptiveTimeouts:
+    """
+    The deadlines of the waits of one account behind one proxy
+
+    Parameters
+    ----------
+    store : LatencyStore
+        Where the latencies are counted, `default_store()` by default
+    account : str
+        The account's key, see `AuthBackend.account_id`
+    proxy : str
+        The proxy's host, empty without a proxy
+    """
+
+    def __init__(
+        self, store: LatencyStore | None = None, account: str = "", proxy: str = ""
+    ):
+        self.store = store if store is not None else default_store()
+        self.account = account
+        self.proxy = proxy
+
+    def deadline(self, wait: str, default: float, size: int | None = None) -> float:
+        """
+        Returns the seconds the wait may take
+
+        Parameters
+        ----------
+        wait : str
+            The wait's name
+        default : float
+            The configured timeout, used until the wait was seen often enough
+        size : int
+            The video's bytes, for the waits measured per MiB
+        """
+        policy = config.timeouts
+        per_mib = wait in PER_MIB and size is not None
+        mib = max(1.0, size / MIB) if per_mib else 1.0  # type: ignore[operator]
+        if per_mib and policy.min_throughput:
+            # a transfer is never cut short of the slowest expected throughput
+            default = max(default, mib / policy.min_throughput)
+
+        learned = self.store.quantile(
+            wait, policy.percentile, self.account, self.proxy, policy.min_samples
+        )
+        if learned is None:
+            return default
+        return max(policy.floor, learned * mib * policy.margin)
+
+    def observe(self, wait: str, seconds: float, size: int | None = None) -> None:
+        if wait in PER_MIB:
+            if size is None:
+                return
+            seconds /= max(1.0, size / MIB)
+        self.store.observe(wait, seconds, self.account, self.proxy)
+
+
+# the timeouts of the upload running in the current thread (or copied context)
+_timeouts: ContextVar[AdaptiveTimeouts | None] = ContextVar(
+    "tiktok_uploader_timeouts", default=None
+)
+
+
+@contextmanager
+def adaptive_timeouts(timeouts: AdaptiveTimeouts | None) -> Iterator[None]:
+    """
+    Makes the waits run inside the `with` block use and teach `timeouts`
+    """
+    token = _timeouts.set(timeouts)
+    try:
+        yield
+    finally:
+        _timeouts.reset(token)
+
+
+def wait_deadline(
+    timeouts: AdaptiveTimeouts | None,
+    wait: str,
+    default: float,
+    size: int | None = None,
+) -> float:
+    """
+    Returns the deadline `measure` gives the wait with these timeouts, the
+    configured `default` when there are none or `[timeouts] adaptive` is off
+    """
+    if timeouts is None or not config.timeouts.adaptive:
+        return default
+    return timeouts.deadline(wait, default, size)
+
+
+@contextmanager
+def measure(
+    wait: str, default: float, size: int | None = None, since: float | None = None
+) -> Iterator[float]:
+    """
+    Yields the deadline of the wait and records how long the `with` block took
+
+    The configured `default` is yielded unchanged outside of
+    `adaptive_timeouts` or when `[timeouts] adaptive` is off. A block which
+    timed out is counted with its full deadline, so deadlines which turned
+    out too short grow again.
+
+    A wait which began before the block, like the transfer of the video
+    which runs while the form is filled, passes the `time.monotonic()` it
+    began at as `since`: it is measured from then, and what is left of its
+    deadline is yielded.
+    """
+    start = time.monotonic() if since is None else since
+    timeouts = _timeouts.get()
+    deadline = wait_deadline(timeouts, wait, default, size)
+    if timeouts is None or not config.timeouts.adaptive:
+        yield max(0.0, deadline - (time.monotonic() - start))
+        return
+
+    if deadline != default:
+        logger.debug(f"{wait} timeout {deadline:.1f}s (configured {default}s)")
+    try:
+        yield max(0.0, deadline - (time.monotonic() - start))
+    except TimeoutException:
+        timeouts.observe(wait, max(deadline, time.monotonic() - start), size)
+        raise
+    timeouts.observe(wait, time.monotonic() - start, size)
@@ -0,0 +1,233 @@
+"""
+Per-stage timing of uploads
+
+Every stage of `complete_upload_form` runs inside a span which records its
+wall time, the number of WebDriver commands it sent and how many times it
+had to retry. The spans of one video form an `UploadTrace`, which is stored
+on the video under 'timings' and can be appended to a JSONL trace file.
+
+Key Classes
+-----------
+UploadTrace : The timing record of one upload
+
+Key Functions
+-------------
+count_commands : Makes a driver count the WebDriver commands it sends
+command_activity : Tells whether a driver is waiting on a command, and since when
+record_retry : Counts a retry against the stage that is running
+write_trace : Appends a timing record to a JSONL file
+"""
+
+import json
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from tiktok_uploader.types import StageTiming, TimingRecord
+
+# the span of the stage running in the current thread (or copied context)
+_current_span: ContextVar[StageTiming | None] = ContextVar(
+    "tiktok_uploader_span", default=None
+)
+
+_trace_lock = threading.Lock()
+
+
+class _CommandCounter:
+    """
+    Wraps a driver's `execute`, which every WebDriver command goes through
+    """
+
+    def __init__(self, execute):
+        self.execute = execute
+        self.count = 0
+        # commands still waiting for an answer and when one last started or
+        # finished, which tells a hung driver from a busy one
+        self.pending = 0
+        self.last_activity = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            self.count += 1
+            self.pending += 1
+            self.last_activity = time.monotonic()
+        try:
+            return self.execute(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.last_activity = time.monotonic()
+
+
+def count_commands(driver: WebDriver) -> None:
+    """
+    Makes the driver count its WebDriver commands, does nothing if it already does
+    """
+    if not isinstance(driver.execute, _CommandCounter):
+        driver.execute = _CommandCounter(driver.execute)  # type: ignore[method-assign]
+
+
+def command_count(driver: WebDriver | None) -> int:
+    """
+    Returns the number of commands the driver sent since `count_commands`
+    """
+    execute = getattr(driver, "execute", None)
+    return execute.count if isinstance(execute, _CommandCounter) else 0
+
+
+def command_activity(driver: WebDriver | None) -> tuple[int, float] | None:
+    """
+    Returns the number of unanswered commands and the monotonic time of the
+    last command which started or finished, None if commands are not counted
+    """
+    execute = getattr(driver, "execute", None)
+    if not isinstance(execute, _CommandCounter):
+        return None
+    with execute._lock:
+        return execute.pending, execute.last_activity
+
+
+def record_retry(exception: BaseException | None = None) -> None:
+    """
+    Counts a retry against the current stage, if any
+    """
+    span = _current_span.get()
+    if span is None:
+        return
+    span["retries"] += 1
+    if exception is not None:
+        span["retry_errors"].append(type(exception).__name__)
+
+
+class UploadTrace:
+    """
+    Collects the stage spans of a single upload
+
+    Parameters
+    ----------
+    path : str
+        The video being uploaded
+    account : str
+        The account it is uploaded to
+    driver : selenium.webdriver
+        The driver whose commands are counted, can be set later
+    """
+
+    def __init__(
+        self, path: str = "", account: str = "", driver: WebDriver | None = None
+    ):
+        self.path = path
+        self.account = account
+        self.driver = driver
+        self.attempt = 1
+        self.success = False
+        self.stages: list[StageTiming] = []
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        # the stage running right now and when it started, for the watchdog
+        self._running: tuple[str, float] | None = None
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[StageTiming]:
+        """
+        Times the stage run inside the `with` block
+        """
+        span: StageTiming = {
+            "stage": stage,
+            "attempt": self.attempt,
+            "start": round(time.perf_counter() - self._start, 3),
+            "duration": 0.0,
+            "commands": 0,
+            "retries": 0,
+            "retry_errors": [],
+            "error": None,
+            "background": False,
+        }
+        commands = command_count(self.driver)
+        token = _current_span.set(span)
+        start = time.perf_counter()
+        running, self._running = self._running, (stage, start)
+        try:
+            yield span
+        except BaseException as exception:
+            span["error"] = f"{type(exception).__name__}: {exception}"
+            raise
+        finally:
+            span["duration"] = round(time.perf_counter() - start, 3)
+            span["commands"] = command_count(self.driver) - commands
+            _current_span.reset(token)
+            self._running = running
+            self.stages.append(span)
+
+    def add_span(self, stage: str, duration: float) -> StageTiming:
+        """
+        Records a stage which ran in the background for the last `duration`
+        seconds, overlapping the spans of the stages run meanwhile
+        """
+        span: StageTiming = {
+            "stage": stage,
+            "attempt": self.attempt,
+            "start": round(time.perf_counter() - self._start - duration, 3),
+            "duration": round(duration, 3),
+            "commands": 0,
+            "retries": 0,
+            "retry_errors": [],
+            "error": None,
+            "background": True,
+        }
+        self.stages.append(span)
+        return span
+
+    def running(self) -> tuple[str, float] | None:
+        """
+        Returns the stage running right now and for how many seconds it has run
+        """
+        running = self._running
+        if running is None:
+            return None
+        stage, start = running
+        return stage, time.perf_counter() - start
+
+    def to_dict(self) -> TimingRecord:
+        """
+        Returns the structured timing record of the upload
+        """
+        return {
+            "path": self.path,
+            "account": self.account,
+            "started_at": self.started_at,
+            "total": round(time.perf_counter() - self._start, 3),
+            "attempts": self.attempt,
+            "success": self.success,
+            "commands": sum(span["commands"] for span in self.stages),
+            "retries": sum(span["retries"] for span in self.stages),
+            "stages": list(self.stages),
+        }
+
+    def report(self) -> str:
+        """
+        Returns a one line summary of the stage timings, for logging
+        """
+        stages = ", ".join(
+            f"{span['stage']} {span['duration']:.2f}s/{span['commands']}cmd"
+            + (f"/{span['retries']}retry" if span["retries"] else "")
+            + (" (background)" if span["background"] else "")
+            for span in self.stages
+        )
+        # background spans overlap the others, they would be counted twice
+        total = sum(span["duration"] for span in self.stages if not span["background"])
+        return f"{stages} (total {total:.2f}s)"
+
+
+def write_trace(path: str, record: TimingRecord) -> None:
+    """
+    Appends a timing record as one JSON line to the trace file
+    """
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    with _trace_lock, open(path, "a", encoding="utf-8") as file:
+        file.write(line)
@@ -20,6 +20,97 @@ class VideoDict(TypedDict, total=False):
     product_id: str
     cover: str
     visibility: Literal["everyone", "friends", "only_you"]
+    error: str
+    error_details: str
+    timings: "TimingRecord"
+    post_url: str
+
+
+class StageTiming(TypedDict):
+    stage: str
+    attempt: int
+    start: float
+    duration: float
+    commands: int
+    retries: int
+    retry_errors: list[str]
+    error: str | None
+    background: bool  # ran alongside the other stages, like the transfer
+
+
+class TimingRecord(TypedDict):
+    path: str
+    account: str
+    started_at: float
+    total: float
+    attempts: int
+    success: bool
+    commands: int
+    retries: int
+    stages: list[StageTiming]
+
+
+class UploadJob(TypedDict):
+    account: str
+    video: VideoDict
+
+
+class JobResult(TypedDict):
+    account: str
+    path: str
+    success: bool
+    error: str
+    timings: TimingRecord | None
+
+
+UploadStatus = Literal[
+    "preparing",
+    "uploading",
+    "form_filled",
+    "requeued",
+    "success",
+    "skipped",
+    "failed",
+]
+
+
+class UploadResult(TypedDict):
+    video: VideoDict
+    path: str
+    status: UploadStatus  # success, skipped or failed
+    stage: str | None  # the last stage the upload reached
+    timings: TimingRecord | None
+    error: str
+    post_url: str | None
+
+
+class UploadProgress(TypedDict):
+    path: str
+    bytes_sent: int
+    total_bytes: int
+    percent: float
+    throughput: float  # bytes per second over the last seconds
+    eta: float | None  # seconds left, None while nothing moves
+    elapsed: float  # seconds since the file was given to the page
+
+
+class ElementState(TypedDict):
+    present: bool
+    visible: bool
+    enabled: bool  # not disabled, aria-disabled or data-disabled
+    checked: bool
+    text: str
+    href: str | None
+    src: str | None  # the src attribute as written, of images and media
+
+
+class WatchdogLimits(TypedDict, total=False):
+    max_rss_mb: int
+    hang_timeout: float
+    stage_deadline: float
+    stage_deadlines: dict[str, float]
+    interval: float
+    max_requeues: int
 
 
 class Cookie(TypedDict, total=False):
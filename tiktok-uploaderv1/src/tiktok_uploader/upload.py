@@ -5,23 +5,24 @@ Key Functions
 -------------
 upload_video : Uploads a single TikTok video
 upload_videos : Uploads multiple TikTok videos
+UploadSession : Reuses one authenticated browser across many uploads
 """
 
 import datetime
 import os
+import random
 import threading
 import time
-from collections.abc import Callable
+from collections.abc import Callable, Iterator
 from os.path import abspath, exists
 from typing import Any, Literal
 
 import pytz
 from selenium.common.exceptions import (
-    ElementClickInterceptedException,
     NoSuchElementException,
-    NoSuchShadowRootException,
     StaleElementReferenceException,
     TimeoutException,
+    WebDriverException,
 )
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
@@ -29,12 +30,34 @@ from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
-from tiktok_uploader import config, logger
+from tiktok_uploader import config, dom, logger, metrics
 from tiktok_uploader.auth import AuthBackend
-from tiktok_uploader.browsers import get_browser
+from tiktok_uploader.browsers import BrowserPool, RssSampler, get_browser, kill_driver
+from tiktok_uploader.ledger import UploadLedger
+from tiktok_uploader.probe import SelectorProbe
+from tiktok_uploader.progress import UploadStalled, watch_transfer
 from tiktok_uploader.proxy_auth_extension.proxy_auth_extension import proxy_is_working
-from tiktok_uploader.types import Cookie, ProxyDict, VideoDict
+from tiktok_uploader.retry import Retry, RetryBudget, retry_budgets, worker_budget
+from tiktok_uploader.timeouts import (
+    AdaptiveTimeouts,
+    LatencyStore,
+    adaptive_timeouts,
+    measure,
+    wait_deadline,
+)
+from tiktok_uploader.timing import UploadTrace, count_commands, write_trace
+from tiktok_uploader.types import (
+    Cookie,
+    ProxyDict,
+    UploadProgress,
+    UploadResult,
+    UploadStatus,
+    VideoDict,
+    WatchdogLimits,
+)
 from tiktok_uploader.utils import bold, green, red
+from tiktok_uploader.waits import settle, wait_for
+from tiktok_uploader.watchdog import DriverWatchdog
 
 
 def upload_video(
@@ -73,6 +96,47 @@ def upload_video(
         The `sessionid` is the only required cookie for uploading,
             but it is recommended to use all cookies to avoid detection
     """
+    video_dict, auth = _single_video(
+        filename,
+        description,
+        cookies,
+        schedule,
+        username,
+        password,
+        sessionid,
+        cookies_list,
+        cookies_str,
+        product_id,
+        cover,
+        visibility,
+    )
+
+    return upload_videos(
+        [video_dict],
+        auth,
+        proxy,
+        *args,
+        **kwargs,
+    )
+
+
+def _single_video(
+    filename: str,
+    description: str | None,
+    cookies: str,
+    schedule: datetime.datetime | None,
+    username: str,
+    password: str,
+    sessionid: str | None,
+    cookies_list: list[Cookie],
+    cookies_str: str | None,
+    product_id: str | None,
+    cover: str | None,
+    visibility: Literal["everyone", "friends", "only_you"],
+) -> tuple[VideoDict, AuthBackend]:
+    """
+    Returns the video and the authentication of `upload_video`'s arguments
+    """
     auth = AuthBackend(
         username=username,
         password=password,
@@ -89,16 +153,11 @@ def upload_video(
         video_dict["schedule"] = schedule
     if product_id:
         video_dict["product_id"] = product_id
+    if cover:
+        video_dict["cover"] = cover
     if visibility != "everyone":
         video_dict["visibility"] = visibility
-
-    return upload_videos(
-        [video_dict],
-        auth,
-        proxy,
-        *args,
-        **kwargs,
-    )
+    return video_dict, auth
 
 
 def upload_videos(
@@ -111,7 +170,6 @@ def upload_videos(
     headless: bool = False,
     num_retries: int = 1,
     skip_split_window: bool = False,
-    *args,
     **kwargs,
 ) -> list[VideoDict]:
     """
@@ -132,158 +190,739 @@ def upload_videos(
     headless : bool
         Whether or not the browser should be run in headless mode
     num_retries : int
-        The number of retries to attempt if the upload fails
+        Times a failed upload form is resumed from its first unfinished stage
     options : SeleniumOptions
         The options to pass into the browser -> custom privacy settings, etc.
-    *args :
-        Additional arguments to pass into the upload function
     **kwargs :
-        Additional keyword arguments to pass into the upload function
+        Additional keyword arguments to pass into the upload session
 
     Returns
     -------
     failed : list
         A list of videos which failed to upload
     """
+    failed = []
+    for result in upload_videos_iter(
+        videos,
+        auth,
+        proxy,
+        browser,
+        browser_agent,
+        headless,
+        num_retries,
+        skip_split_window,
+        **kwargs,
+    ):
+        if result["status"] == "failed":
+            failed.append(result["video"])
+        if on_complete is not None:  # calls the user-specified on-complete function
+            on_complete(result["video"])
+
+    return failed
+
+
+def upload_videos_iter(
+    videos: list[VideoDict],
+    auth: AuthBackend,
+    proxy: ProxyDict | None = None,
+    browser: Literal["chrome", "safari", "chromium", "edge", "firefox"] = "chrome",
+    browser_agent: WebDriver | None = None,
+    headless: bool = False,
+    num_retries: int = 1,
+    skip_split_window: bool = False,
+    **kwargs,
+) -> Iterator[UploadResult]:
+    """
+    Uploads multiple videos to TikTok, yielding the result of each video as
+    soon as it is done
+
+    Takes the parameters of `upload_videos` except `on_complete`. The browser
+    is started with the first upload and closed once the generator is
+    exhausted or closed.
+
+    Yields
+    ------
+    result : dict
+        The video, its path, final status (success, skipped or failed), the
+        last stage it reached, its timings, the error and the post's URL
+        when it could be found
+    """
     videos = _convert_videos_dict(videos)  # type: ignore
 
     if videos and len(videos) > 1:
         logger.debug("Uploading %d videos", len(videos))
 
-    if not browser_agent:  # user-specified browser agent
-        logger.debug(
-            "Create a %s browser instance %s",
-            browser,
-            "in headless mode" if headless else "",
+    session = UploadSession(
+        auth,
+        proxy=proxy,
+        browser=browser,
+        browser_agent=browser_agent,
+        headless=headless,
+        num_retries=num_retries,
+        skip_split_window=skip_split_window,
+        **kwargs,
+    )
+    try:
+        yield from session.iter_upload(videos)
+    finally:
+        if config.quit_on_end:
+            session.close()
+
+
+class UploadSession:
+    """
+    Keeps one authenticated browser alive across many uploads
+
+    The driver is created on the first upload and reused for every following
+    video, so a batch pays for `get_browser` and `authenticate_agent` once. If
+    the browser dies in the middle of a batch it is replaced, re-authenticated
+    and the video that was in flight is tried again.
+
+    Parameters
+    ----------
+    auth : AuthBackend
+        The authentication backend used to log the browser in
+    proxy: dict
+        A dictionary containing the proxy user, pass, host and port
+    browser : str
+        The browser to use for uploading
+    browser_agent : selenium.webdriver
+        A selenium webdriver object to use instead of launching one
+    headless : bool
+        Whether or not the browser should be run in headless mode
+    num_retries : int
+        Times a failed upload form is resumed from its first unfinished stage
+    skip_split_window : bool
+        Whether or not to skip closing the split window
+    delay : tuple
+        The (min, max) bounds in seconds of a random pause between two videos
+    on_status : function
+        Called with (video, status) every time a video changes state
+    sleep : function
+        Used for the random pause between videos, lets callers render a countdown
+    pool : BrowserPool
+        Checks warm drivers out of this pool instead of launching new ones
+    pool_key : str
+        The account key the pool keeps the drivers under
+    ledger : UploadLedger
+        Videos this account already posted are skipped without opening a browser
+    trace_path : str
+        Appends the timing record of every upload to this JSONL file
+    max_rss_mb : int
+        Replaces the browser after an upload once it uses more memory than this,
+        pair it with `dense=True` (see `chrome_defaults`) on crowded hosts
+    rss_sampler : RssSampler
+        Shares one sampler between sessions, one is created from `max_rss_mb` otherwise
+    watchdog : bool or dict
+        Watches the browser from a background thread and replaces it when it
+        hangs, overruns a stage or uses too much memory, the video in flight is
+        tried again. True uses the defaults of `DriverWatchdog`, a dict
+        (WatchdogLimits) overrides them
+    retry_budget : RetryBudget
+        Retries this session may spend, shared by every video it uploads. One
+        is created from the `[retry]` worker budget of the config when not given
+    on_progress : function
+        Called with (video, progress) about once a second while the video's
+        file is transferred, see `UploadProgress`
+    latency_store : LatencyStore
+        Where the latencies of the long waits are learned, the waits then get
+        deadlines fitting this account and proxy (see `[timeouts]` in the
+        config). The store in the cache directory by default
+    """
+
+    def __init__(
+        self,
+        auth: AuthBackend,
+        proxy: ProxyDict | None = None,
+        browser: Literal["chrome", "safari", "chromium", "edge", "firefox"] = "chrome",
+        browser_agent: WebDriver | None = None,
+        headless: bool = False,
+        num_retries: int = 1,
+        skip_split_window: bool = False,
+        delay: tuple[float, float] | None = None,
+        on_status: Callable[[VideoDict, UploadStatus], None] | None = None,
+        sleep: Callable[[float], None] = time.sleep,
+        pool: BrowserPool | None = None,
+        pool_key: str | None = None,
+        ledger: UploadLedger | None = None,
+        trace_path: str | None = None,
+        max_rss_mb: int | None = None,
+        rss_sampler: RssSampler | None = None,
+        watchdog: bool | WatchdogLimits = False,
+        retry_budget: RetryBudget | None = None,
+        latency_store: LatencyStore | None = None,
+        on_progress: Callable[[VideoDict, UploadProgress], None] | None = None,
+        *args,
+        **kwargs,
+    ):
+        self.auth = auth
+        self.proxy = proxy
+        self.browser = browser
+        self.headless = headless
+        self.num_retries = num_retries
+        self.skip_split_window = skip_split_window
+        self.delay = delay
+        self.on_status = on_status
+        self.on_progress = on_progress
+        self.sleep = sleep
+        self.pool = pool
+        self.pool_key = pool_key
+        self.ledger = ledger
+        self.trace_path = trace_path
+        self.args = args
+        self.kwargs = kwargs
+
+        # a sampler made here is stopped with the session, a shared one is not
+        self._owns_sampler = rss_sampler is None and max_rss_mb is not None
+        if self._owns_sampler:
+            rss_sampler = RssSampler(max_rss_mb)  # type: ignore[arg-type]
+        self.rss_sampler = rss_sampler
+
+        self.watchdog_limits: WatchdogLimits | None = (
+            watchdog if isinstance(watchdog, dict) else ({} if watchdog else None)
         )
-        driver = get_browser(browser, headless=headless, proxy=proxy, *args, **kwargs)
-    else:
-        logger.debug("Using user-defined browser agent")
-        driver = browser_agent
-    if proxy:
-        if proxy_is_working(driver, proxy["host"]):
-            logger.debug(green("Proxy is working"))
+        self.max_requeues = (self.watchdog_limits or {}).get("max_requeues", 2)
+        self._watchdog: DriverWatchdog | None = None
+        self.retry_budget = retry_budget if retry_budget is not None else worker_budget()
+        self.timeouts = AdaptiveTimeouts(
+            latency_store, auth.account_id, proxy["host"] if proxy else ""
+        )
+
+        self._browser_agent = browser_agent
+        self._driver: WebDriver | None = None
+        # a pooled driver is handed out already sitting on the upload page
+        self._on_upload_page = False
+        # how many times a video was sent to the browser
+        self._attempts = 0
+        # why `cancel` stopped the upload in flight
+        self._cancelled: str | None = None
+        # the last status of the video being uploaded
+        self._status: UploadStatus | None = None
+
+    @property
+    def driver(self) -> WebDriver:
+        """
+        The authenticated driver, started on first use
+        """
+        if self._driver is None:
+            self._driver = self._start_driver()
+            count_commands(self._driver)
+            metrics.track_driver(self._driver, self.auth.account_id)
+            if self.rss_sampler is not None:
+                self.rss_sampler.add(self._driver)
+            if self.watchdog_limits is not None:
+                self._watchdog = DriverWatchdog.from_limits(
+                    self._driver, self.watchdog_limits
+                ).start()
+        return self._driver
+
+    def _start_driver(self) -> WebDriver:
+        """
+        Creates (or adopts) a browser, checks the proxy and authenticates it
+        """
+        if self.pool is not None and not self._browser_agent:
+            driver = self.pool.checkout(self.auth, self.pool_key)
+            self._on_upload_page = True
+            return driver
+
+        if not self._browser_agent:  # user-specified browser agent
+            logger.debug(
+                "Create a %s browser instance %s",
+                self.browser,
+                "in headless mode" if self.headless else "",
+            )
+            driver = get_browser(
+                self.browser,
+                headless=self.headless,
+                proxy=self.proxy,
+                *self.args,
+                **self.kwargs,
+            )
         else:
-            logger.error("Proxy is not working")
-            driver.quit()
-            raise Exception("Proxy is not working")
-    driver = auth.authenticate_agent(driver)
+            logger.debug("Using user-defined browser agent")
+            driver = self._browser_agent
 
-    failed = []
-    total_videos = len(videos)
-    
-    # uploads each video
-    for idx, video in enumerate(videos, 1):
-        video_path = video.get("path", "")
-        path = abspath(video_path)
-        
+        if self.proxy:
+            if proxy_is_working(driver, self.proxy["host"]):
+                logger.debug(green("Proxy is working"))
+            else:
+                logger.error("Proxy is not working")
+                driver.quit()
+                raise Exception("Proxy is not working")
+
+        return self.auth.authenticate_agent(driver)
+
+    def is_alive(self) -> bool:
+        """
+        Returns whether or not the current driver still answers commands
+        """
+        if self._driver is None:
+            return False
         try:
-            logger.info(f"[{idx}/{total_videos}] Yukleme basladi: {os.path.basename(path)}")
-            
+            self._driver.current_url
+            return True
+        except WebDriverException:
+            return False
+
+    def warm_up(self) -> None:
+        """
+        Starts the browser if needed and loads the upload page, the next
+        upload then skips the navigation
+
+        A browser which stopped answering is replaced
+        """
+        if self._driver is not None and not self.is_alive():
+            self.restart()
+        _go_to_upload(self.driver)
+        self._on_upload_page = True
+
+    def restart(self) -> WebDriver:
+        """
+        Throws away the current driver and starts a freshly authenticated one
+        """
+        logger.debug(red("Browser is not responding, starting a new one"))
+        self._quit_driver(healthy=False)
+        # a dead user-defined agent can not be revived, launch our own instead
+        self._browser_agent = None
+        return self.driver
+
+    def close(self) -> None:
+        """
+        Quits the browser if one was started
+        """
+        self._quit_driver()
+        if self._owns_sampler:
+            self.rss_sampler.close()  # type: ignore[union-attr]
+
+    def recycle_if_needed(self) -> bool:
+        """
+        Quits the browser if it grew past `max_rss_mb`, the next upload starts a new one
+
+        Returns whether the browser was recycled
+        """
+        if self._driver is None or self.rss_sampler is None:
+            return False
+        # a user-defined agent is not ours to replace
+        if self._browser_agent is not None:
+            return False
+        if not self.rss_sampler.should_recycle(self._driver):
+            return False
+
+        rss_mb = self.rss_sampler.rss(self._driver) // (1024 * 1024)
+        logger.info(f"Tarayici {rss_mb} MB bellek kullaniyor, yeniden baslatilacak")
+        self._quit_driver(healthy=False)
+        return True
+
+    def _quit_driver(self, healthy: bool = True) -> None:
+        if self._driver is None:
+            return
+        if self._watchdog is not None:
+            healthy = healthy and not self._watchdog.tripped
+            self._watchdog.stop()
+            self._watchdog = None
+        metrics.untrack_driver(self._driver)
+        if self.rss_sampler is not None:
+            self.rss_sampler.remove(self._driver)
+        if self.pool is not None and self._browser_agent is None:
+            if healthy:
+                self.pool.checkin(self._driver, self.auth, self.pool_key)
+            else:
+                self.pool.discard(self._driver)
+        else:
+            try:
+                self._driver.quit()
+            except Exception as e:
+                logger.debug(f"Could not quit driver cleanly: {e}")
+        self._driver = None
+        self._on_upload_page = False
+
+    def __enter__(self) -> "UploadSession":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def upload_many(
+        self,
+        videos: list[VideoDict],
+        on_complete: Callable[[VideoDict], None] | None = None,
+    ) -> list[VideoDict]:
+        """
+        Uploads each video with the session's driver
+
+        Parameters
+        ----------
+        videos : list
+            A list of dictionaries containing the video's ('path') and description ('description')
+        on_complete : function
+            A function to call with each video once its upload is finished
+
+        Returns
+        -------
+        failed : list
+            A list of videos which failed to upload
+        """
+        failed = []
+        for result in self.iter_upload(videos):
+            if result["status"] == "failed":
+                failed.append(result["video"])
+
+            if on_complete is not None:  # calls the user-specified on-complete function
+                on_complete(result["video"])
+
+        return failed
+
+    def iter_upload(self, videos: list[VideoDict]) -> Iterator[UploadResult]:
+        """
+        Uploads each video with the session's driver, yielding its result as
+        soon as it is done
+
+        Stopping the iteration leaves the remaining videos alone
+        """
+        total_videos = len(videos)
+        succeeded = 0
+
+        used_browser = False
+        for idx, video in enumerate(videos, 1):
             # Birden fazla video varsa, onceki yuklemeden sonra bekle
-            if idx > 1:
-                logger.debug("Onceki yuklemeden sonra bekleniyor...")
-                time.sleep(2)  # 2 saniye bekle
-            
-            description = video.get("description", "")
-            schedule = video.get("schedule", None)
-            product_id = video.get("product_id", None)
-            cover_path = video.get("cover", None)
-            if cover_path is not None:
-                cover_path = abspath(cover_path)
+            if used_browser:
+                self.wait_between_videos()
+
+            attempts = self._attempts
+            success = self.upload(video, label=f"[{idx}/{total_videos}]")
+            # skipped and invalid videos never reach the browser
+            used_browser = self._attempts > attempts
+
+            succeeded += success
+            yield upload_result(video, self._status or ("success" if success else "failed"))
+
+        logger.info(f"Yukleme tamamlandi: {succeeded}/{total_videos} basarili")
+
+    def upload(self, video: VideoDict, label: str = "[1/1]") -> bool:
+        """
+        Uploads a single video, returns whether or not it was posted
+
+        On failure the reason is stored under the video's 'error' key
+        """
+        # the browser of a cancelled upload was killed, a cancel from here on
+        # is meant for this upload
+        if self._cancelled is not None:
+            self._cancelled = None
+            self._quit_driver(healthy=False)
+
+        path = abspath(video.get("path", ""))
+        # the outcome of an earlier upload of the same video
+        for key in ("error", "error_details", "timings", "post_url"):
+            video.pop(key, None)  # type: ignore[misc]
+        self._set_status(video, "preparing")
+        logger.info(f"{label} Yukleme basladi: {os.path.basename(path)}")
 
-            visibility = video.get("visibility", "everyone")
+        try:
+            form = _prepare_upload_form(video)
+        except InvalidVideo as exception:
+            return self._fail(video, label, str(exception))
+
+        if self.ledger is not None and self.ledger.is_uploaded(
+            path, self.auth.account_id
+        ):
+            logger.info(f"{label} Daha once yuklendi, atlandi: {os.path.basename(path)}")
+            self._set_status(video, "skipped")
+            metrics.UPLOADS_SKIPPED.inc()
+            return True
+
+        # a browser that can't be started or authenticated fails the whole batch
+        self.driver
+        # a cancel while the browser started had no browser to kill
+        if self._cancelled is not None:
+            return self._fail(video, label, f"Yukleme durduruldu: {self._cancelled}")
+
+        trace = UploadTrace(path, self.auth.account_id)
+        metrics.UPLOADS_STARTED.inc()
+        try:
+            with retry_budgets(self.retry_budget), adaptive_timeouts(self.timeouts):
+                return self._upload_attempts(video, form, label, trace)
+        finally:
+            self.timeouts.store.save()
+            video["timings"] = trace.to_dict()
+            metrics.observe_upload(video["timings"])
+            logger.debug(f"{label} Asama sureleri: {trace.report()}")
+            if self.trace_path:
+                write_trace(self.trace_path, video["timings"])
+            # between two uploads is the only safe moment to swap the browser
+            self.recycle_if_needed()
+
+    def _upload_attempts(
+        self, video: VideoDict, form: dict[str, Any], label: str, trace: UploadTrace
+    ) -> bool:
+        """
+        Sends the video to the browser, once more if the browser crashed
+
+        A video whose browser was killed by the watchdog is put back in line
+        on a new browser up to `max_requeues` times
+        """
+        path = abspath(video.get("path", ""))
+        attempt = requeues = 0
+        crashed = False
+        while True:
+            # the watchdog may have killed the browser between two uploads
+            if self._watchdog is not None and self._watchdog.tripped:
+                self.restart()
+            self._attempts += 1
+            attempt += 1
+            trace.attempt = attempt
+            trace.driver = self.driver
+            if self._watchdog is not None:
+                self._watchdog.watch(trace, self._stage_deadlines(path))
+            try:
+                self._set_status(video, "uploading")
+                fresh_page, self._on_upload_page = self._on_upload_page, False
+                logger.info(f"{label} Video yukleniyor: {os.path.basename(path)}")
+                complete_upload_form(
+                    self.driver,
+                    path,
+                    form["description"],
+                    form["schedule"],
+                    self.skip_split_window,
+                    form["cover"],
+                    form["product_id"],
+                    form["visibility"],
+                    self.num_retries,
+                    self.headless,
+                    *self.args,
+                    fresh_page=fresh_page,
+                    on_form_filled=lambda: self._set_status(video, "form_filled"),
+                    cancelled=lambda: self._cancelled,
+                    trace=trace,
+                    on_progress=self._progress_callback(video),
+                    **self.kwargs,
+                )
+                trace.success = True
+                post_url = _find_post_url(self.driver)
+                if post_url:
+                    video["post_url"] = post_url
+                logger.info(f"{label} Basarili: {os.path.basename(path)}")
+                if self.ledger is not None:
+                    self.ledger.record(path, self.auth.account_id)
+                self._set_status(video, "success")
+                return True
+            except Exception as exception:
+                if self._cancelled is not None:
+                    return self._fail(
+                        video, label, f"Yukleme durduruldu: {self._cancelled}"
+                    )
 
-            logger.debug(
-                "Posting %s%s",
-                bold(video.get("path", "")),
-                (
-                    f"\n{' ' * 15}with description: {bold(description)}"
-                    if description
-                    else ""
-                ),
-            )
+                reason = self._watchdog.tripped if self._watchdog is not None else None
+                if reason is not None:
+                    stage = _failed_stage(trace)
+                    self.restart()
+                    # a post that may have gone through must not be sent twice
+                    if stage == "post_video":
+                        return self._fail(
+                            video,
+                            label,
+                            f"Tarayici paylasim sirasinda kapatildi ({reason}),"
+                            " video paylasilmis olabilir",
+                        )
+                    if requeues >= self.max_requeues:
+                        return self._fail(
+                            video, label, f"Tarayici tekrar tekrar kapatildi: {reason}"
+                        )
+                    requeues += 1
+                    logger.warning(f"{label} Video tekrar siraya alindi ({stage})")
+                    self._set_status(video, "requeued")
+                    continue
 
-            # Video must be of supported type
-            if not _check_valid_path(path):
-                error_msg = f"Dosya gecersiz veya desteklenmeyen formatta: {path}"
-                logger.error(f"[{idx}/{total_videos}] {error_msg}")
-                video["error"] = error_msg
-                failed.append(video)
-                continue
-
-            # Video must have a valid datetime for tiktok's scheduler
-            if schedule:
-                timezone = pytz.UTC
-                if schedule.tzinfo is None:
-                    schedule = schedule.astimezone(timezone)
-                elif (utc_offset := schedule.utcoffset()) is not None and int(
-                    utc_offset.total_seconds()
-                ) == 0:  # Equivalent to UTC
-                    schedule = timezone.localize(schedule)
-                else:
-                    error_msg = f"Zamanlama gecersiz: UTC timezone olmali"
-                    logger.error(f"[{idx}/{total_videos}] {error_msg}")
-                    video["error"] = error_msg
-                    failed.append(video)
+                # a crashed browser is replaced and the video is tried once more
+                if not crashed and not self.is_alive():
+                    crashed = True
+                    self.restart()
                     continue
 
-                valid_tiktok_minute_multiple = 5
-                schedule = _get_valid_schedule_minute(
-                    schedule, valid_tiktok_minute_multiple
+                if isinstance(exception, FailedToUpload):
+                    return self._fail(
+                        video, label, f"Yukleme basarisiz: {str(exception)}"
+                    )
+
+                import traceback
+
+                error_details = traceback.format_exc()
+                logger.debug(f"Hata detaylari:\n{error_details}")
+                video["error_details"] = error_details
+                return self._fail(
+                    video, label, f"Beklenmeyen hata: {str(exception)}"
                 )
-                if not _check_valid_schedule(schedule):
-                    error_msg = f"Zamanlama gecersiz: En az 20 dakika sonra, en fazla 10 gun sonra olmali"
-                    logger.error(f"[{idx}/{total_videos}] {error_msg}")
-                    video["error"] = error_msg
-                    failed.append(video)
-                    continue
 
-            logger.info(f"[{idx}/{total_videos}] Video yukleniyor: {os.path.basename(path)}")
-            complete_upload_form(
-                driver,
-                path,
-                description,
-                schedule,
-                skip_split_window,
-                cover_path,
-                product_id,
-                visibility,
-                num_retries,
-                headless,
-                *args,
-                **kwargs,
-            )
-            logger.info(f"[{idx}/{total_videos}] Basarili: {os.path.basename(path)}")
-            
-            # Basarili yuklemeden sonra kisa bekleme
-            if idx < total_videos:
-                time.sleep(1)
-            
-        except FailedToUpload as exception:
-            error_msg = f"Yukleme basarisiz: {str(exception)}"
-            logger.error(f"[{idx}/{total_videos}] {error_msg}")
-            video["error"] = error_msg
-            failed.append(video)
-        except Exception as exception:
-            import traceback
-            error_msg = f"Beklenmeyen hata: {str(exception)}"
-            error_details = traceback.format_exc()
-            logger.error(f"[{idx}/{total_videos}] {error_msg}")
-            logger.debug(f"Hata detaylari:\n{error_details}")
-            video["error"] = error_msg
-            video["error_details"] = error_details
-            failed.append(video)
-
-        if on_complete is callable:  # calls the user-specified on-complete function
-            on_complete(video)
-    
-    logger.info(f"Yukleme tamamlandi: {total_videos - len(failed)}/{total_videos} basarili")
+    def _stage_deadlines(self, path: str) -> dict[str, float]:
+        """
+        Returns the deadlines of the stages which wait for the video's
+        transfer, they grow with the file like the transfer's own deadline
+        """
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return {}
+        transfer = wait_deadline(self.timeouts, "transfer", config.explicit_wait, size)
+        return {"await_processing": transfer}
+
+    def _progress_callback(
+        self, video: VideoDict
+    ) -> Callable[[UploadProgress], None] | None:
+        on_progress = self.on_progress
+        if on_progress is None:
+            return None
+        return lambda progress: on_progress(video, progress)
+
+    def _fail(self, video: VideoDict, label: str, error_msg: str) -> bool:
+        logger.error(f"{label} {error_msg}")
+        video["error"] = error_msg
+        self._set_status(video, "failed")
+        return False
+
+    def _set_status(self, video: VideoDict, status: UploadStatus) -> None:
+        self._status = status
+        if self.on_status is not None:
+            self.on_status(video, status)
+
+    def wait_between_videos(self) -> None:
+        """
+        Pauses between two uploads, randomly within `delay` when it is set
+
+        Without a delay the next upload starts right away, `_go_to_upload`
+        waits for the page itself
+        """
+        delay_seconds = self.next_delay()
+        if delay_seconds:
+            self.sleep(delay_seconds)
+
+    def next_delay(self) -> float:
+        """
+        Returns the seconds to pause before the next upload, 0 without a `delay`
+        """
+        if not self.delay:
+            return 0.0
+        delay_seconds = random.uniform(*self.delay)
+        logger.debug(f"Sonraki video icin {delay_seconds:.0f} saniye bekleniyor...")
+        return delay_seconds
+
+    def cancel(self, reason: str = "iptal edildi") -> None:
+        """
+        Stops the upload in flight, can be called from any thread
+
+        The browser is killed so the blocked WebDriver command returns, the
+        upload then fails with `reason` instead of being tried again. An
+        upload whose browser is still starting fails once it started, and a
+        form stops before its next stage. The next upload starts a new browser.
+        """
+        self._cancelled = reason
+        driver = self._driver
+        if driver is None:
+            return
+        if not kill_driver(driver):
+            # a remote driver, quit can block as well so it gets its own thread
+            threading.Thread(target=_quit_quietly, args=(driver,), daemon=True).start()
+
 
-    if config.quit_on_end:
+def upload_result(video: VideoDict, status: UploadStatus) -> UploadResult:
+    """
+    Returns the result of a finished upload from the keys it left on the video
+    """
+    timings = video.get("timings")
+    stages = timings["stages"] if timings else []
+    return {
+        "video": video,
+        "path": video.get("path", ""),
+        "status": status,
+        "stage": stages[-1]["stage"] if stages else None,
+        "timings": timings,
+        "error": video.get("error", ""),
+        "post_url": video.get("post_url"),
+    }
+
+
+def _find_post_url(driver: WebDriver) -> str | None:
+    """
+    Returns the URL of the video just posted when the page links to it
+    """
+    try:
+        return dom.state(driver, config.selectors.upload.post_link)["href"]
+    except WebDriverException as e:
+        logger.debug(f"Could not look for the post's URL: {e}")
+        return None
+
+
+def _quit_quietly(driver: WebDriver) -> None:
+    try:
         driver.quit()
+    except Exception as e:
+        logger.debug(f"Could not quit driver cleanly: {e}")
 
-    return failed
+
+def _failed_stage(trace: UploadTrace) -> str | None:
+    """
+    Returns the stage the current attempt of the upload failed in
+    """
+    for span in reversed(trace.stages):
+        if span["attempt"] == trace.attempt and span["error"]:
+            return span["stage"]
+    return None
+
+
+def _prepare_upload_form(video: VideoDict) -> dict[str, Any]:
+    """
+    Validates a video and returns the values needed to fill the upload form
+
+    Raises InvalidVideo with a user facing message when the video can't be posted
+    """
+    path = abspath(video.get("path", ""))
+    description = video.get("description", "")
+    schedule = video.get("schedule", None)
+    product_id = video.get("product_id", None)
+    cover_path = video.get("cover", None)
+    if cover_path is not None:
+        cover_path = abspath(cover_path)
+
+    visibility = video.get("visibility", "everyone")
+
+    logger.debug(
+        "Posting %s%s",
+        bold(video.get("path", "")),
+        (
+            f"\n{' ' * 15}with description: {bold(description)}"
+            if description
+            else ""
+        ),
+    )
+
+    # Video must be of supported type
+    if not _check_valid_path(path):
+        raise InvalidVideo(f"Dosya gecersiz veya desteklenmeyen formatta: {path}")
+
+    # Video must have a valid datetime for tiktok's scheduler
+    if schedule:
+        timezone = pytz.UTC
+        if schedule.tzinfo is None:
+            schedule = schedule.astimezone(timezone)
+        elif (utc_offset := schedule.utcoffset()) is not None and int(
+            utc_offset.total_seconds()
+        ) == 0:  # Equivalent to UTC
+            schedule = timezone.localize(schedule)
+        else:
+            raise InvalidVideo("Zamanlama gecersiz: UTC timezone olmali")
+
+        valid_tiktok_minute_multiple = 5
+        schedule = _get_valid_schedule_minute(schedule, valid_tiktok_minute_multiple)
+        if not _check_valid_schedule(schedule):
+            raise InvalidVideo(
+                "Zamanlama gecersiz: En az 20 dakika sonra, en fazla 10 gun sonra olmali"
+            )
+
+    return {
+        "description": description,
+        "schedule": schedule,
+        "product_id": product_id,
+        "cover": cover_path,
+        "visibility": visibility,
+    }
 
 
 def complete_upload_form(
@@ -298,6 +937,11 @@ def complete_upload_form(
     num_retries: int = 1,
     headless: bool = False,
     *args,
+    fresh_page: bool = False,
+    on_form_filled: Callable[[], None] | None = None,
+    cancelled: Callable[[], str | None] | None = None,
+    trace: UploadTrace | None = None,
+    on_progress: Callable[[UploadProgress], None] | None = None,
     **kwargs,
 ) -> None:
     """
@@ -309,100 +953,402 @@ def complete_upload_form(
         The selenium webdriver to use for uploading
     path : str
         The path to the video to upload
+    fresh_page : bool
+        The driver was just loaded on the upload page (e.g. by a BrowserPool),
+        so the navigation is skipped
+    on_form_filled : function
+        Called once every field is set, right before the video is posted
+    cancelled : function
+        Returns why the upload was cancelled (None while it was not), checked
+        before each stage, a cancelled upload raises UploadCancelled
+    num_retries : int
+        Times the form is resumed from its first unfinished stage after a
+        stage failed
+    trace : UploadTrace
+        Records the timing of each stage, the timings are logged when not given
+    on_progress : function
+        Called with the progress of the video's transfer about once a second
+    """
+    count_commands(driver)
+    own_trace = trace is None
+    if trace is None:
+        trace = UploadTrace(path, driver=driver)
+
+    try:
+        _fill_upload_form(
+            driver,
+            trace,
+            path,
+            description,
+            schedule,
+            skip_split_window,
+            cover_path,
+            product_id,
+            visibility,
+            fresh_page,
+            on_form_filled,
+            num_retries,
+            on_progress=on_progress,
+            cancelled=cancelled,
+            **kwargs,
+        )
+    finally:
+        if own_trace:
+            logger.debug(f"Step timings: {trace.report()}")
+
+
+class FormStage:
     """
-    _go_to_upload(driver)
-    _remove_cookies_window(driver)
+    One step of filling the upload form
 
-    upload_complete_event = threading.Event()
-    upload_error = [None]  # Use list to allow modification from nested function
+    Every stage can be run again on a form it already filled, so a failed
+    attempt is resumed instead of starting over from a new page
 
-    # Function to call _set_video and set the event when it's done
-    def upload_video():
+    Parameters
+    ----------
+    name : str
+        The name of the stage's span in the trace
+    run : function
+        Fills the stage, called without arguments
+    done : function
+        Checks on the live page whether the stage's result is still in place,
+        a stage without a check is trusted once it ran
+    critical : bool
+        A failing critical stage fails the attempt, others are only logged
+    needs : str
+        The probed selector the stage works on, the stage is skipped when
+        the `SelectorProbe` found its element absent
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run: Callable[[], None],
+        done: Callable[[], bool] | None = None,
+        critical: bool = False,
+        needs: str | None = None,
+    ):
+        self.name = name
+        self.run = run
+        self.done = done
+        self.critical = critical
+        self.needs = needs
+
+    def satisfied(self, reached: set[str]) -> bool:
+        """
+        Returns whether the stage ran and its result is still on the page
+        """
+        if self.name not in reached:
+            return False
+        return self.done is None or self.done()
+
+
+def _fill_upload_form(
+    driver: WebDriver,
+    trace: UploadTrace,
+    path: str,
+    description: str,
+    schedule: datetime.datetime | None,
+    skip_split_window: bool,
+    cover_path: str | None,
+    product_id: str | None,
+    visibility: Literal["everyone", "friends", "only_you"],
+    fresh_page: bool,
+    on_form_filled: Callable[[], None] | None,
+    num_retries: int = 1,
+    on_progress: Callable[[UploadProgress], None] | None = None,
+    cancelled: Callable[[], str | None] | None = None,
+    **kwargs,
+) -> None:
+    """
+    Runs each stage of `complete_upload_form` in a span of the trace
+
+    When a critical stage fails, the stages are checked against the page and
+    the form is resumed from the first one whose result is missing, up to
+    `num_retries` times. A failed post is sent again without uploading the
+    file again, a reloaded page starts over from the file.
+
+    The page is probed once it loaded and once the video was selected,
+    stages whose element is missing are skipped without waiting for it.
+    A cancelled upload stops before its next stage and is not resumed.
+    """
+    stages = _form_stages(
+        driver,
+        trace,
+        path,
+        description,
+        schedule,
+        skip_split_window,
+        cover_path,
+        product_id,
+        visibility,
+        on_form_filled,
+        on_progress,
+        **kwargs,
+    )
+    # a page loaded by the pool counts as the navigation
+    reached = {"go_to_upload"} if fresh_page else set()
+    start = 1 if fresh_page else 0
+
+    probe = SelectorProbe(driver)
+    if fresh_page:
+        _run_probe(trace, probe, "go_to_upload")
+
+    retry = Retry("resume_form", num_retries + 1)
+    for _ in retry:
         try:
-            _set_video(driver, path=path, **kwargs)
-        except Exception as e:
-            upload_error[0] = e
-            logger.error(f"Error uploading video: {e}")
-        finally:
-            upload_complete_event.set()
+            for stage in stages[start:]:
+                if cancelled is not None and (reason := cancelled()) is not None:
+                    raise UploadCancelled(reason)
+                reached.add(stage.name)
+                if stage.needs is not None and probe.absent(stage.needs):
+                    logger.debug(f"Skipping {stage.name}, {stage.needs} is not on the page")
+                    continue
+                _run_stage(trace, stage)
+                _run_probe(trace, probe, stage.name)
+            return
+        except Exception as exception:
+            if isinstance(exception, UploadCancelled) or not retry.allow(exception):
+                raise
+            try:
+                start = _resume_index(stages, reached)
+            except WebDriverException:
+                # the browser is gone, there is nothing left to resume
+                raise exception
+            if start == len(stages):
+                logger.info(green("Form zaten tamamlanmis, video paylasildi"))
+                return
+            logger.warning(
+                f"{stages[start].name} adiminda kalinan yerden devam ediliyor: {exception}"
+            )
+            retry.wait(exception)
 
-    # Start the upload_video function in a separate thread
-    upload_thread = threading.Thread(target=upload_video)
-    upload_thread.start()
 
-    # Wait for the upload to complete before proceeding
-    upload_complete_event.wait()
-    
-    # Check if there was an error in the upload thread
-    if upload_error[0]:
-        raise FailedToUpload(f"Video upload failed: {upload_error[0]}")
+def _resume_index(stages: list[FormStage], reached: set[str]) -> int:
+    """
+    Returns the index of the first stage whose result is not on the page
+    """
+    for index, stage in enumerate(stages):
+        if not stage.satisfied(reached):
+            return index
+    return len(stages)
 
-    # Kritik olmayan adimlar - hata olsa bile devam et
-    try:
-        if cover_path:
-            _set_cover(driver, cover_path)
-    except Exception as e:
-        logger.debug(f"Failed to set cover (non-critical): {e}")
 
+# the stages after which the page is probed, and the phase it reached
+PROBE_AFTER = {
+    "go_to_upload": "page",
+    "set_video": "form",
+    "await_processing": "processed",
+}
+
+
+def _run_probe(trace: UploadTrace, probe: SelectorProbe, stage: str) -> None:
+    phase = PROBE_AFTER.get(stage)
+    if phase is not None:
+        with trace.span("probe_selectors"):
+            probe.run(phase)
+
+
+def _run_stage(trace: UploadTrace, stage: FormStage) -> None:
     try:
-        if not skip_split_window:
-            _remove_split_window(driver)
+        with trace.span(stage.name):
+            stage.run()
     except Exception as e:
-        logger.debug(f"Failed to remove split window (non-critical): {e}")
+        if stage.critical:
+            raise
+        logger.debug(f"Failed to {stage.name} (non-critical): {e}")
+
+
+def _form_stages(
+    driver: WebDriver,
+    trace: UploadTrace,
+    path: str,
+    description: str,
+    schedule: datetime.datetime | None,
+    skip_split_window: bool,
+    cover_path: str | None,
+    product_id: str | None,
+    visibility: Literal["everyone", "friends", "only_you"],
+    on_form_filled: Callable[[], None] | None,
+    on_progress: Callable[[UploadProgress], None] | None = None,
+    **kwargs,
+) -> list[FormStage]:
+    """
+    Returns the stages which fill the upload form of this video, in order
+
+    The browser transfers the file in the background from `set_video` on,
+    the fields are filled meanwhile and only `await_processing` waits for
+    the transfer, right before the stages which need the processed video.
+    The transfer is recorded in the trace as a background span.
+    """
+    transfer: dict[str, float] = {}
+
+    def set_video() -> None:
+        transfer["started"] = _set_video_or_fail(driver, path, **kwargs)
+
+    def await_processing() -> None:
+        duration = _await_processing(driver, path, transfer.get("started"), on_progress)
+        trace.add_span("transfer", duration)
+
+    stages = [
+        FormStage(
+            "go_to_upload",
+            lambda: _go_to_upload(driver),
+            lambda: _on_upload_page(driver),
+            critical=True,
+        ),
+        FormStage(
+            "remove_cookies_window",
+            lambda: _remove_cookies_window(driver),
+            needs="cookies_banner",
+        ),
+        FormStage(
+            "set_video",
+            set_video,
+            # the file was taken, it may still be transferring
+            lambda: dom.present(
+                driver,
+                f"{config.selectors.upload.upload_progress}"
+                f" | {config.selectors.upload.process_confirmation}",
+            ),
+            critical=True,
+        ),
+    ]
+    stages.append(
+        FormStage(
+            "set_interactivity",
+            lambda: _set_interactivity(driver, **kwargs),
+            needs="comment",
+        )
+    )
+    stages.append(
+        FormStage(
+            "set_description",
+            lambda: _set_description_logged(driver, description),
+            (lambda: _description_is_set(driver, description)) if description else None,
+        )
+    )
+    if visibility != "everyone":
+        stages.append(
+            FormStage("set_visibility", lambda: _set_visibility(driver, visibility))
+        )
+    if schedule:
+        stages.append(
+            FormStage(
+                "set_schedule_video",
+                lambda: _set_schedule_video(driver, schedule),
+                lambda: _schedule_is_set(driver, schedule),
+                critical=True,
+            )
+        )
+    if product_id:
+        stages.append(
+            FormStage("add_product_link", lambda: _add_product_link(driver, product_id))
+        )
+
+    stages.append(
+        FormStage(
+            "await_processing",
+            await_processing,
+            lambda: dom.present(driver, config.selectors.upload.process_confirmation),
+            critical=True,
+        )
+    )
+    # the cover is chosen from the frames of the processed video
+    if cover_path:
+        stages.append(FormStage("set_cover", lambda: _set_cover(driver, cover_path)))
+    if not skip_split_window:
+        stages.append(
+            FormStage(
+                "remove_split_window",
+                lambda: _remove_split_window(driver),
+                needs="split_window",
+            )
+        )
 
+    form_filled: list[bool] = []
+
+    def post() -> None:
+        # resuming the post alone does not announce the form a second time
+        if on_form_filled is not None and not form_filled:
+            form_filled.append(True)
+            on_form_filled()
+        _post_video_with_retries(driver)
+
+    stages.append(
+        FormStage(
+            "post_video",
+            post,
+            lambda: dom.present(driver, config.selectors.upload.post_confirmation),
+            critical=True,
+        )
+    )
+    return stages
+
+
+def _set_video_or_fail(driver: WebDriver, path: str, **kwargs) -> float:
     try:
-        _set_interactivity(driver, **kwargs)
+        return _set_video(driver, path=path, **kwargs)
     except Exception as e:
-        logger.debug(f"Failed to set interactivity (non-critical): {e}")
+        logger.error(f"Error uploading video: {e}")
+        raise FailedToUpload(f"Video upload failed: {e}") from e
 
+
+def _set_description_logged(driver: WebDriver, description: str) -> None:
+    # Aciklama kritik degil ama logla
     try:
         _set_description(driver, description)
     except StaleElementReferenceException as e:
         logger.error(f"Failed to set description (stale element): {e}")
-        # Aciklama kritik degil, devam et
     except Exception as e:
         logger.error(f"Failed to set description: {e}")
-        # Aciklama kritik degil ama logla
 
-    try:
-        if visibility != "everyone":
-            _set_visibility(driver, visibility)
-    except Exception as e:
-        logger.debug(f"Failed to set visibility (non-critical): {e}")
-
-    try:
-        if schedule:
-            _set_schedule_video(driver, schedule)
-    except Exception as e:
-        logger.error(f"Failed to set schedule: {e}")
-        raise FailedToUpload(f"Schedule setting failed: {e}")
-
-    try:
-        if product_id:
-            _add_product_link(driver, product_id)
-    except Exception as e:
-        logger.debug(f"Failed to add product link (non-critical): {e}")
 
+def _post_video_with_retries(driver: WebDriver) -> None:
     # Post video - bu kritik!
-    max_post_retries = 3
-    for post_attempt in range(max_post_retries):
+    retry = Retry("post_video")
+    for attempt in retry:
         try:
             _post_video(driver)
-            break
-        except StaleElementReferenceException as e:
-            logger.error(f"Stale element in post video on attempt {post_attempt + 1}/{max_post_retries}: {e}")
-            if post_attempt < max_post_retries - 1:
-                time.sleep(2)
-                continue
-            else:
-                raise FailedToUpload(f"Posting video failed after retries (stale element): {e}")
+            return
         except Exception as e:
-            logger.error(f"Failed to post video on attempt {post_attempt + 1}/{max_post_retries}: {e}")
-            if post_attempt < max_post_retries - 1:
-                time.sleep(2)
-                continue
-            else:
+            logger.error(f"Failed to post video on attempt {attempt}/{retry.attempts}: {e}")
+            if not retry.allow(e):
                 raise FailedToUpload(f"Posting video failed after retries: {e}")
+            retry.wait(e)
+
+
+def _on_upload_page(driver: WebDriver) -> bool:
+    """
+    Returns whether the upload page is open and loaded
+    """
+    upload_page = str(config.paths.upload).split("?")[0]
+    if driver.current_url.split("?")[0] != upload_page:
+        return False
+    return dom.present(driver, "//*[@id='root']")
+
+
+def _description_is_set(driver: WebDriver, description: str) -> bool:
+    """
+    Returns whether every word of the description is in the editor
+    """
+    editor = dom.state(driver, config.selectors.upload.description)
+    if not editor["present"]:
+        return False
+    description = description.encode("utf-8", "ignore").decode("utf-8")
+    text = editor["text"]
+    return all(word in text for word in description.split())
+
+
+def _schedule_is_set(driver: WebDriver, schedule: datetime.datetime) -> bool:
+    """
+    Returns whether the time picker shows the scheduled time
+    """
+    picker = dom.state(driver, config.selectors.schedule.time_picker_text)
+    if not picker["present"]:
+        return False
+    schedule = schedule.astimezone(__get_driver_timezone(driver))
+    return picker["text"].strip() == f"{schedule.hour:02d}:{schedule.minute:02d}"
 
 
 def _go_to_upload(driver: WebDriver) -> None:
@@ -415,19 +1361,17 @@ def _go_to_upload(driver: WebDriver) -> None:
     """
     logger.debug(green("Navigating to upload page"))
 
-    # if the upload page is not open, navigate to it
-    if driver.current_url != config.paths.upload:
-        driver.get(str(config.paths.upload))
-    # otherwise, refresh the page and accept the reload alert
-    else:
-        _refresh_with_alert(driver)
+    # always a fresh load, even when the upload page is already open: a
+    # refresh of a filled form first waits on the "leave site?" alert
+    driver.get(str(config.paths.upload))
 
     # changes to the iframe
     # _change_to_upload_iframe(driver)
 
     # waits for the iframe to load
     root_selector = EC.presence_of_element_located((By.ID, "root"))
-    WebDriverWait(driver, config.explicit_wait).until(root_selector)
+    with measure("page_load", config.explicit_wait) as timeout:
+        WebDriverWait(driver, timeout).until(root_selector)
 
     # Return to default webpage
     driver.switch_to.default_content()
@@ -469,48 +1413,30 @@ def _set_description(driver: WebDriver, description: str) -> None:
 
     saved_description = description  # save the description in case it fails
 
-    max_retries = 7  # Artirildi - daha garantili
-    for attempt in range(max_retries):
+    retry = Retry("set_description")
+    for attempt in retry:
         try:
-            # Element'i bul ve bekle
-            WebDriverWait(driver, config.implicit_wait).until(
-                EC.presence_of_element_located((By.XPATH, config.selectors.upload.description))
-            )
-
-            # Her seferinde element'i yeniden bul
-            desc = driver.find_element(By.XPATH, config.selectors.upload.description)
+            # the element is found again on every attempt (it may be stale)
+            desc = wait_for(driver, config.selectors.upload.description)
             desc.click()
-            time.sleep(0.5)  # Kucuk bekleme
+            settle(driver)
 
-            # Text kontrolunu güvenli şekilde yap
-            def check_text_not_empty(d):
-                try:
-                    elem = d.find_element(By.XPATH, config.selectors.upload.description)
-                    return elem.text != ""
-                except (StaleElementReferenceException, NoSuchElementException):
-                    return False
-            
-            WebDriverWait(driver, config.explicit_wait).until(check_text_not_empty)
-            
-            # Element'i tekrar bul (stale element'i onlemek icin)
-            desc = driver.find_element(By.XPATH, config.selectors.upload.description)
+            # TikTok fills in the file name once the editor is ready
+            with measure("description_ready", config.explicit_wait) as timeout:
+                wait_for(driver, config.selectors.upload.description, "filled", timeout)
             break
-        except StaleElementReferenceException:
-            logger.debug(f"Stale element in description on attempt {attempt + 1}/{max_retries}, retrying...")
-            if attempt < max_retries - 1:
-                time.sleep(1)
-                continue
-            else:
+        except StaleElementReferenceException as e:
+            logger.debug(f"Stale element in description on attempt {attempt}/{retry.attempts}, retrying...")
+            if not retry.allow(e):
                 logger.error("Stale element in description after all retries")
                 raise
-        except TimeoutException:
-            logger.debug(f"Timeout waiting for description element on attempt {attempt + 1}/{max_retries}")
-            if attempt < max_retries - 1:
-                time.sleep(1)
-                continue
-            else:
+            retry.wait(e)
+        except TimeoutException as e:
+            logger.debug(f"Timeout waiting for description element on attempt {attempt}/{retry.attempts}")
+            if not retry.allow(e):
                 logger.error("Timeout waiting for description element after all retries")
                 raise
+            retry.wait(e)
 
     # Element'i kullanmadan once tekrar bul
     try:
@@ -521,98 +1447,23 @@ def _set_description(driver: WebDriver, description: str) -> None:
         desc = driver.find_element(By.XPATH, config.selectors.upload.description)
         _clear(desc)
 
-        # Text kontrolunu güvenli şekilde yap
-        def check_text_empty(d):
-            try:
-                elem = d.find_element(By.XPATH, config.selectors.upload.description)
-                return elem.text == ""
-            except StaleElementReferenceException:
-                return False
-        
-        WebDriverWait(driver, config.explicit_wait).until(check_text_empty)
-
-        desc = driver.find_element(By.XPATH, config.selectors.upload.description)
+        desc = wait_for(
+            driver, config.selectors.upload.description, "empty", config.explicit_wait
+        )
         desc.click()
-
-        time.sleep(1)
+        settle(driver)
 
         try:
-            words = description.split(" ")
-            for word_idx, word in enumerate(words):
-                # Her kullanimdan once element'i yeniden bul
-                max_word_retries = 3
-                for word_attempt in range(max_word_retries):
-                    try:
-                        desc = driver.find_element(By.XPATH, config.selectors.upload.description)
-                        break
-                    except StaleElementReferenceException:
-                        logger.debug(f"Stale element in description word {word_idx}, refreshing...")
-                        if word_attempt < max_word_retries - 1:
-                            time.sleep(0.3)
-                            continue
-                        else:
-                            desc = WebDriverWait(driver, config.implicit_wait).until(
-                                EC.presence_of_element_located((By.XPATH, config.selectors.upload.description))
-                            )
-                
+            for token in _split_description(description):
                 try:
-                    if word[0] == "#":
-                        _safe_send_keys(driver, config.selectors.upload.description, word)
-                        _safe_send_keys(driver, config.selectors.upload.description, " " + Keys.BACKSPACE)
-                        WebDriverWait(driver, config.implicit_wait).until(
-                            EC.presence_of_element_located(
-                                (By.XPATH, config.selectors.upload.mention_box)
-                            )
-                        )
-                        time.sleep(config.add_hashtag_wait)
-                        _safe_send_keys(driver, config.selectors.upload.description, Keys.ENTER)
-                    elif word[0] == "@":
-                        logger.debug(green("- Adding Mention: " + word))
-                        _safe_send_keys(driver, config.selectors.upload.description, word)
-                        _safe_send_keys(driver, config.selectors.upload.description, " ")
-                        time.sleep(1)
-                        _safe_send_keys(driver, config.selectors.upload.description, Keys.BACKSPACE)
-
-                        WebDriverWait(driver, config.explicit_wait).until(
-                            EC.presence_of_element_located(
-                                (By.XPATH, config.selectors.upload.mention_box_user_id)
-                            )
-                        )
-
-                        found = False
-                        waiting_interval = 0.5
-                        timeout = 5
-                        start_time = time.time()
-
-                        while not found and (time.time() - start_time < timeout):
-                            user_id_elements = driver.find_elements(
-                                By.XPATH, config.selectors.upload.mention_box_user_id
-                            )
-                            time.sleep(1)
-
-                            for i in range(len(user_id_elements)):
-                                user_id_element = user_id_elements[i]
-                                if user_id_element and user_id_element.is_enabled():
-                                    username = user_id_element.text.split(" ")[0]
-                                    if username.lower() == word[1:].lower():
-                                        found = True
-                                        print("Matching User found : Clicking User")
-                                        for j in range(i):
-                                            _safe_send_keys(driver, config.selectors.upload.description, Keys.DOWN)
-                                        _safe_send_keys(driver, config.selectors.upload.description, Keys.ENTER)
-                                        break
-
-                                if not found:
-                                    print(
-                                        f"No match. Waiting for {waiting_interval} seconds..."
-                                    )
-                                    time.sleep(waiting_interval)
-
+                    if token[0] == "#":
+                        _add_hashtag(driver, token)
+                    elif token[0] == "@":
+                        _add_mention(driver, token)
                     else:
-                        _safe_send_keys(driver, config.selectors.upload.description, word + " ")
-                        
+                        _insert_text(driver, config.selectors.upload.description, token)
                 except StaleElementReferenceException:
-                    logger.debug(f"Stale element while typing word '{word}', skipping...")
+                    logger.debug(f"Stale element while typing '{token}', skipping...")
                     # Bu kelimeyi atla, devam et
                     continue
 
@@ -629,7 +1480,117 @@ def _set_description(driver: WebDriver, description: str) -> None:
         raise
 
 
-def _safe_send_keys(driver: WebDriver, xpath: str, keys: str, max_retries: int = 3) -> None:
+def _split_description(description: str) -> list[str]:
+    """
+    Splits a description into hashtags, mentions and the plain text between them
+
+    Consecutive plain words are joined into a single run (with the trailing
+    space typing them would have added), so they can be inserted at once
+    """
+    tokens = []
+    plain: list[str] = []
+    for word in description.split(" "):
+        if word[:1] in ("#", "@"):
+            if plain:
+                tokens.append(" ".join(plain) + " ")
+                plain = []
+            tokens.append(word)
+        else:
+            plain.append(word)
+    if plain:
+        tokens.append(" ".join(plain) + " ")
+    return tokens
+
+
+INSERT_TEXT_SCRIPT = """
+const [element, text] = arguments;
+element.focus();
+const range = document.createRange();
+range.selectNodeContents(element);
+range.collapse(false);
+const selection = window.getSelection();
+selection.removeAllRanges();
+selection.addRange(range);
+const before = element.textContent.length;
+return document.execCommand('insertText', false, text)
+    && element.textContent.length > before;
+"""
+
+
+def _insert_text(driver: WebDriver, xpath: str, text: str) -> None:
+    """
+    Appends plain text to the editor at `xpath` in a single command
+
+    The text goes through the browser's input events, so the editor's state
+    is updated like it would be by typing. Falls back to sending the keys
+    when the editor does not accept it.
+    """
+    element = driver.find_element(By.XPATH, xpath)
+    if not driver.execute_script(INSERT_TEXT_SCRIPT, element, text):
+        logger.debug("Editor rejected inserted text, typing it instead")
+        _safe_send_keys(driver, xpath, text)
+
+
+def _add_hashtag(driver: WebDriver, hashtag: str) -> None:
+    """
+    Types a hashtag and picks it from the suggestions popover
+
+    The popover is awaited until it lists the hashtag, `config.add_hashtag_wait`
+    is only the upper bound
+    """
+    logger.debug(green("- Adding Hashtag: " + hashtag))
+    _safe_send_keys(driver, config.selectors.upload.description, hashtag)
+    _safe_send_keys(driver, config.selectors.upload.description, " " + Keys.BACKSPACE)
+
+    mention_box = config.selectors.upload.mention_box
+    wait_for(driver, mention_box, "visible")
+    if "'" not in hashtag:
+        try:
+            wait_for(
+                driver,
+                f"({mention_box})[contains(., '{hashtag[1:]}')]",
+                "visible",
+                timeout=config.add_hashtag_wait,
+            )
+        except TimeoutException:
+            logger.debug(f"No suggestion matching {hashtag}")
+    settle(driver)
+    _safe_send_keys(driver, config.selectors.upload.description, Keys.ENTER)
+
+
+def _add_mention(driver: WebDriver, mention: str) -> None:
+    """
+    Types a mention and picks the matching user from the suggestions
+    """
+    logger.debug(green("- Adding Mention: " + mention))
+    _safe_send_keys(driver, config.selectors.upload.description, mention)
+    _safe_send_keys(driver, config.selectors.upload.description, " ")
+    settle(driver)
+    _safe_send_keys(driver, config.selectors.upload.description, Keys.BACKSPACE)
+
+    # the suggestions are loaded asynchronously, wait until
+    # the list contains the user instead of polling it
+    user_xpath = config.selectors.upload.mention_box_user_id
+    wait_for(driver, user_xpath, timeout=config.explicit_wait)
+    try:
+        wait_for(driver, f"({user_xpath})[contains(., '{mention[1:]}')]", timeout=5)
+    except TimeoutException:
+        logger.debug(f"No suggestion matching {mention}")
+
+    for i, user in enumerate(dom.query_all(driver, user_xpath)):
+        if user["enabled"]:
+            username = user["text"].split(" ")[0]
+            if username.lower() == mention[1:].lower():
+                logger.debug("Matching User found : Clicking User")
+                for _ in range(i):
+                    _safe_send_keys(driver, config.selectors.upload.description, Keys.DOWN)
+                _safe_send_keys(driver, config.selectors.upload.description, Keys.ENTER)
+                break
+
+
+def _safe_send_keys(
+    driver: WebDriver, xpath: str, keys: str, max_retries: int | None = None
+) -> None:
     """
     Güvenli şekilde send_keys yapar - stale element hatalarını handle eder
     
@@ -641,19 +1602,16 @@ def _safe_send_keys(driver: WebDriver, xpath: str, keys: str, max_retries: int =
     keys : str
         Gönderilecek tuşlar
     max_retries : int
-        Maksimum deneme sayısı
+        Maksimum deneme sayısı, varsayılanı config'deki [retry.stages] send_keys
     """
-    for attempt in range(max_retries):
+    retry = Retry("send_keys", max_retries)
+    for _ in retry:
         try:
             element = driver.find_element(By.XPATH, xpath)
             element.send_keys(keys)
             return
-        except StaleElementReferenceException:
-            if attempt < max_retries - 1:
-                time.sleep(0.3)
-                continue
-            else:
-                raise
+        except StaleElementReferenceException as e:
+            retry.failed(e)
 
 
 def _clear(element) -> None:
@@ -688,137 +1646,153 @@ def _clear(element) -> None:
 
 
 def _set_video(
-    driver: WebDriver, path: str = "", num_retries: int = 3, **kwargs
-) -> None:
+    driver: WebDriver, path: str = "", num_retries: int | None = None, **kwargs
+) -> float:
     """
-    Sets the video to upload
+    Gives the video to the upload page and waits until its form is shown,
+    the file is transferred in the background (see `_await_processing`)
 
     Parameters
     ----------
     driver : selenium.webdriver
     path : str
         The path to the video to upload
-    num_retries : number of retries (can occasionally fail)
+    num_retries : number of attempts (can occasionally fail), defaults to the config
+
+    Returns
+    -------
+    started : float
+        The `time.monotonic()` the transfer started at
     """
     # uploads the element
     logger.debug(green("Uploading video file"))
 
-    for attempt in range(num_retries):
+    retry = Retry("set_video", num_retries)
+    for attempt in retry:
         try:
             # Wait For Input File - always find fresh element
-            driverWait = WebDriverWait(driver, config.explicit_wait)
-            upload_boxWait = EC.presence_of_element_located(
-                (By.XPATH, config.selectors.upload.upload_video)
-            )
-            driverWait.until(upload_boxWait)
-            
-            # Find element fresh each time to avoid stale reference
-            upload_box = driver.find_element(
-                By.XPATH, config.selectors.upload.upload_video
-            )
+            with measure("file_input", config.explicit_wait) as timeout:
+                upload_box = wait_for(
+                    driver, config.selectors.upload.upload_video, timeout=timeout
+                )
             
             # Use absolute path to avoid issues
             abs_path = os.path.abspath(path)
-            upload_box.send_keys(abs_path)
+            size = os.path.getsize(abs_path)
 
-            # wait until a non-draggable image is found
-            process_confirmation = EC.presence_of_element_located(
-                (By.XPATH, config.selectors.upload.process_confirmation)
-            )
-            WebDriverWait(driver, config.explicit_wait).until(process_confirmation)
-            logger.debug(green("Video file uploaded successfully"))
-            return
-        except StaleElementReferenceException:
-            logger.debug(f"Stale element reference on attempt {attempt + 1}, retrying...")
-            time.sleep(1)  # Wait a bit before retry
-            if attempt == num_retries - 1:
+            started = time.monotonic()
+            upload_box.send_keys(abs_path)
+            # the form is shown once the page accepted the file
+            with measure("form_ready", config.explicit_wait) as timeout:
+                wait_for(driver, config.selectors.upload.description, timeout=timeout)
+            logger.debug(green(f"Video file selected, transferring {size} bytes"))
+            return started
+        except StaleElementReferenceException as e:
+            logger.debug(f"Stale element reference on attempt {attempt}, retrying...")
+            if not retry.allow(e):
                 raise FailedToUpload("Stale element reference after all retries")
+            retry.wait(e)
         except TimeoutException as exception:
-            logger.error(f"TimeoutException occurred on attempt {attempt + 1}: {exception}")
-            if attempt == num_retries - 1:
+            logger.error(f"TimeoutException occurred on attempt {attempt}: {exception}")
+            if not retry.allow(exception):
                 raise FailedToUpload(f"Timeout uploading video: {exception}")
+            retry.wait(exception)
         except Exception as exception:
-            logger.error(f"Exception on attempt {attempt + 1}: {exception}")
-            if attempt == num_retries - 1:
+            logger.error(f"Exception on attempt {attempt}: {exception}")
+            if not retry.allow(exception):
                 raise FailedToUpload(exception)
+            retry.wait(exception)
+    raise FailedToUpload("Video could not be selected")
 
 
-def _remove_cookies_window(driver) -> None:
+def _await_processing(
+    driver: WebDriver,
+    path: str,
+    started: float | None = None,
+    on_progress: Callable[[UploadProgress], None] | None = None,
+) -> float:
     """
-    Removes the cookies window if it is open
+    Waits until the video given to the page by `_set_video` was transferred
+    and processed
 
     Parameters
     ----------
     driver : selenium.webdriver
+    path : str
+        The path to the video
+    started : float
+        The `time.monotonic()` the transfer started at, the transfer's
+        deadline is counted from it
+    on_progress : function
+        Called with the progress of the transfer
+
+    Returns
+    -------
+    duration : float
+        Seconds since the transfer started
+
+    Raises
+    ------
+    FailedToUpload
+        The transfer timed out
+    UploadStalled
+        The transfer made no progress for `config.stall_timeout` seconds,
+        the upload page is loaded again so the form is resumed from the file
     """
+    abs_path = os.path.abspath(path)
+    size = os.path.getsize(abs_path)
+    if started is None:
+        started = time.monotonic()
 
-    logger.debug(green("Removing cookies window"))
-    
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            # Banner'i bul
-            cookies_banner = WebDriverWait(driver, config.implicit_wait).until(
-                EC.presence_of_element_located(
-                    (By.TAG_NAME, config.selectors.upload.cookies_banner.banner)
-                )
-            )
+    try:
+        # the deadline grows with the file
+        with measure("transfer", config.explicit_wait, size, since=started) as timeout:
+            watch_transfer(driver, abs_path, size, timeout, on_progress, started=started)
+    except UploadStalled as exception:
+        logger.warning(f"Yukleme ilerlemiyor, sayfa yeniden aciliyor: {exception}")
+        # the stalled transfer still holds the form, a new page starts clean
+        _go_to_upload(driver)
+        raise
+    except TimeoutException as exception:
+        raise FailedToUpload(f"Timeout uploading video: {exception}") from exception
 
-            try:
-                # Shadow root'u güvenli şekilde al
-                try:
-                    shadow_root = cookies_banner.shadow_root
-                except (StaleElementReferenceException, NoSuchShadowRootException):
-                    # Banner stale olduysa yeniden bul
-                    cookies_banner = driver.find_element(
-                        By.TAG_NAME, config.selectors.upload.cookies_banner.banner
-                    )
-                    shadow_root = cookies_banner.shadow_root
+    logger.debug(green("Video file uploaded successfully"))
+    return time.monotonic() - started
 
-                # Button'u shadow root içinde bul
-                item = shadow_root.find_element(
-                    By.CSS_SELECTOR,
-                    config.selectors.upload.cookies_banner.button,
-                )
 
-                # Butonları bul ve tıkla
-                buttons = item.find_elements(By.TAG_NAME, "button")
-                if buttons:
-                    # İlk butona tıkla (genellikle Decline/Reddet)
-                    buttons[0].click()
-                    logger.debug("Cookies banner closed")
-                    return
+def _remove_cookies_window(driver: WebDriver) -> None:
+    """
+    Removes the cookies window if it is open
 
-            # If shadow root is not found, we remove it with JS
-            except (NoSuchShadowRootException, NoSuchElementException, StaleElementReferenceException):
-                try:
-                    # JavaScript ile kaldır
-                    driver.execute_script(
-                        "const banner = document.querySelector(arguments[0]); if (banner) banner.remove();",
-                        config.selectors.upload.cookies_banner.banner,
-                    )
-                    logger.debug("Cookies banner removed via JavaScript")
-                    return
-                except Exception as e:
-                    logger.debug(f"Could not remove cookies banner via JS: {e}")
-                    if attempt < max_retries - 1:
-                        time.sleep(0.5)
-                        continue
-        
-        except (TimeoutException, NoSuchElementException):
-            logger.debug("Cookies banner not found, continuing without removing it")
+    Parameters
+    ----------
+    driver : selenium.webdriver
+    """
+
+    logger.debug(green("Removing cookies window"))
+    banner = config.selectors.upload.cookies_banner
+
+    try:
+        # a custom element, its tag name is enough for XPath
+        wait_for(driver, f"//{banner.banner}")
+    except TimeoutException:
+        logger.debug("Cookies banner not found, continuing without removing it")
+        return
+
+    # the button lives in the banner's shadow root, it is found and clicked
+    # (or the banner removed) by one script, so nothing can go stale
+    retry = Retry("remove_cookies_window")
+    for attempt in retry:
+        try:
+            result = dom.dismiss(driver, banner.banner, banner.button)
+            logger.debug(f"Cookies banner {result}")
             return
-        except StaleElementReferenceException:
-            logger.debug(f"Stale element in cookies banner on attempt {attempt + 1}, retrying...")
-            if attempt < max_retries - 1:
-                time.sleep(0.5)
-                continue
-            else:
+        except WebDriverException as e:
+            logger.debug(f"Could not remove cookies banner on attempt {attempt}: {e}")
+            if not retry.allow(e):
                 logger.debug("Could not remove cookies banner after retries, continuing anyway")
                 return
-        except Exception as e:
-            logger.debug(f"Unexpected error removing cookies banner: {e}, continuing anyway")
-            return
+            retry.wait(e)
 
 
 def _remove_split_window(driver: WebDriver) -> None:
@@ -833,12 +1807,12 @@ def _remove_split_window(driver: WebDriver) -> None:
     window_xpath = config.selectors.upload.split_window
 
     try:
-        condition = EC.presence_of_element_located((By.XPATH, window_xpath))
-        window = WebDriverWait(driver, config.implicit_wait).until(condition)
-        window.click()
-
+        wait_for(driver, window_xpath)
     except TimeoutException:
         logger.debug(red("Split window not found or operation timed out"))
+        return
+    if not dom.click(driver, window_xpath):
+        logger.debug(red("Split window could not be clicked"))
 
 
 def _set_interactivity(
@@ -862,99 +1836,38 @@ def _set_interactivity(
     duet : bool
         Whether or not to allow duets
     """
-    max_retries = 5  # Artirildi
-    for attempt in range(max_retries):
-        try:
-            logger.debug(green("Setting interactivity settings"))
-
-            # Her seferinde elementleri yeniden bul (stale element'i onlemek icin)
-            # Elementler bulunamazsa, kritik degil, devam et
-            try:
-                comment_box = WebDriverWait(driver, config.implicit_wait).until(
-                    EC.presence_of_element_located((By.XPATH, config.selectors.upload.comment))
-                )
-            except (TimeoutException, NoSuchElementException):
-                logger.debug("Comment box not found, skipping interactivity settings")
-                return
-
-            try:
-                stitch_box = WebDriverWait(driver, config.implicit_wait).until(
-                    EC.presence_of_element_located((By.XPATH, config.selectors.upload.stitch))
-                )
-            except (TimeoutException, NoSuchElementException):
-                logger.debug("Stitch box not found, skipping stitch setting")
-                stitch_box = None
-
-            try:
-                duet_box = WebDriverWait(driver, config.implicit_wait).until(
-                    EC.presence_of_element_located((By.XPATH, config.selectors.upload.duet))
-                )
-            except (TimeoutException, NoSuchElementException):
-                logger.debug("Duet box not found, skipping duet setting")
-                duet_box = None
-
-            # xor the current state with the desired state
-            # Her kullanimdan once elementleri yeniden bul
-            try:
-                comment_box = driver.find_element(By.XPATH, config.selectors.upload.comment)
-                if comment ^ comment_box.is_selected():
-                    comment_box.click()
-                    time.sleep(0.3)  # Kucuk bekleme
-            except StaleElementReferenceException:
-                logger.debug("Stale element in comment box, retrying...")
-                if attempt < max_retries - 1:
-                    time.sleep(0.5)
-                    continue
-                else:
-                    logger.debug("Comment box stale after retries, skipping")
-                    break
-            except Exception as e:
-                logger.debug(f"Error setting comment: {e}, skipping")
-                break
+    logger.debug(green("Setting interactivity settings"))
+    selectors = config.selectors.upload
+    try:
+        # the checkboxes are rendered together, the others are there with this one
+        wait_for(driver, selectors.comment)
+    except TimeoutException:
+        logger.debug("Comment box not found, skipping interactivity settings")
+        return
 
-            if stitch_box is not None:
-                try:
-                    stitch_box = driver.find_element(By.XPATH, config.selectors.upload.stitch)
-                    if stitch ^ stitch_box.is_selected():
-                        stitch_box.click()
-                        time.sleep(0.3)
-                except (StaleElementReferenceException, NoSuchElementException):
-                    logger.debug("Stale/missing element in stitch box, skipping")
-                except Exception as e:
-                    logger.debug(f"Error setting stitch: {e}, skipping")
-
-            if duet_box is not None:
-                try:
-                    duet_box = driver.find_element(By.XPATH, config.selectors.upload.duet)
-                    if duet ^ duet_box.is_selected():
-                        duet_box.click()
-                        time.sleep(0.3)
-                except (StaleElementReferenceException, NoSuchElementException):
-                    logger.debug("Stale/missing element in duet box, skipping")
-                except Exception as e:
-                    logger.debug(f"Error setting duet: {e}, skipping")
-
-            # Basarili olduysa cik
-            logger.debug(green("Interactivity settings set successfully"))
-            return
+    wanted = {"comment": comment, "stitch": stitch, "duet": duet}
+    toggles = {name: (getattr(selectors, name), checked) for name, checked in wanted.items()}
 
-        except StaleElementReferenceException:
-            logger.debug(f"Stale element reference on attempt {attempt + 1}, retrying...")
-            if attempt < max_retries - 1:
-                time.sleep(1)
-                continue
-            else:
-                logger.debug("Failed to set interactivity settings after retries (stale element)")
+    # every box is read, clicked and awaited by a single script
+    retry = Retry("set_interactivity")
+    for attempt in retry:
+        try:
+            states = dom.set_checked(driver, toggles)
+            break
+        except WebDriverException as e:
+            logger.debug(f"Setting interactivity failed on attempt {attempt}: {e}")
+            if not retry.allow(e):
                 # Kritik degil, devam et
+                logger.debug("Failed to set interactivity settings after retries")
                 return
-        except (NoSuchElementException, TimeoutException) as e:
-            logger.debug(f"Element not found in interactivity settings: {e}")
-            # Kritik degil, devam et
-            return
-        except Exception as e:
-            logger.debug(f"Failed to set interactivity settings: {e}")
-            # Kritik degil, devam et
-            return
+            retry.wait(e)
+
+    for name, checked in states.items():
+        if checked is None:
+            logger.debug(f"{name.capitalize()} box not found, skipping {name} setting")
+        elif checked != wanted[name]:
+            logger.debug(f"{name.capitalize()} box did not change, skipping {name} setting")
+    logger.debug(green("Interactivity settings set successfully"))
 
 
 def _set_visibility(
@@ -976,13 +1889,10 @@ def _set_visibility(
         dropdown_xpath = (
             "//div[@data-e2e='video_visibility_container']//button[@role='combobox']"
         )
-        dropdown = WebDriverWait(driver, config.implicit_wait).until(
-            EC.element_to_be_clickable((By.XPATH, dropdown_xpath))
-        )
+        dropdown = wait_for(driver, dropdown_xpath, "clickable")
 
-        # Click to open the dropdown
+        # Click to open the dropdown, the options are awaited below
         dropdown.click()
-        time.sleep(1.5)  # Wait for dropdown animation
 
         # Map visibility values to the text that appears in the dropdown
         visibility_text_map = {
@@ -997,35 +1907,30 @@ def _set_visibility(
         option_xpath = f"//div[@role='option' and contains(., '{option_text}')]"
         
         # Retry mechanism for stale element
-        max_retries = 3
-        for attempt in range(max_retries):
+        retry = Retry("set_visibility")
+        for attempt in retry:
             try:
-                option = WebDriverWait(driver, config.implicit_wait).until(
-                    EC.element_to_be_clickable((By.XPATH, option_xpath))
-                )
-                
-                driver.execute_script("arguments[0].scrollIntoView(true);", option)
-                time.sleep(0.5)
-                
-                # Element'i tekrar bul (stale element'i önlemek için)
-                option = driver.find_element(By.XPATH, option_xpath)
-                option.click()
-                
+                wait_for(driver, option_xpath, "clickable")
+
+                # scrolled to and clicked by one script, it cannot go stale in between
+                if not dom.click(driver, option_xpath):
+                    raise NoSuchElementException(f"Visibility option {option_text} disappeared")
+
                 logger.debug(green(f"Successfully set visibility to: {visibility}"))
                 return
                 
-            except StaleElementReferenceException:
-                if attempt < max_retries - 1:
-                    logger.debug(f"Stale element in visibility option on attempt {attempt + 1}/{max_retries}, retrying...")
-                    time.sleep(0.5)
+            except StaleElementReferenceException as e:
+                if retry.allow(e):
+                    logger.debug(f"Stale element in visibility option on attempt {attempt}/{retry.attempts}, retrying...")
+                    retry.wait(e)
                     continue
                 else:
-                    logger.error(red(f"Failed to set visibility after {max_retries} retries (stale element)"))
+                    logger.error(red(f"Failed to set visibility after {attempt} attempts (stale element)"))
                     raise
             except Exception as e:
-                if attempt < max_retries - 1:
-                    logger.debug(f"Error setting visibility on attempt {attempt + 1}/{max_retries}: {e}, retrying...")
-                    time.sleep(0.5)
+                if retry.allow(e):
+                    logger.debug(f"Error setting visibility on attempt {attempt}/{retry.attempts}: {e}, retrying...")
+                    retry.wait(e)
                     continue
                 else:
                     raise
@@ -1072,43 +1977,27 @@ def _set_schedule_video(driver: WebDriver, schedule: datetime.datetime) -> None:
 
 def __date_picker(driver: WebDriver, month: int, day: int) -> None:
     logger.debug(green("Picking date"))
+    selectors = config.selectors.schedule
 
-    condition = EC.presence_of_element_located(
-        (By.XPATH, config.selectors.schedule.date_picker)
-    )
-    date_picker = WebDriverWait(driver, config.implicit_wait).until(condition)
-    date_picker.click()
+    wait_for(driver, selectors.date_picker).click()
+    wait_for(driver, selectors.calendar)
 
-    condition = EC.presence_of_element_located(
-        (By.XPATH, config.selectors.schedule.calendar)
-    )
-    WebDriverWait(driver, config.implicit_wait).until(condition)
-
-    calendar_month = driver.find_element(
-        By.XPATH, config.selectors.schedule.calendar_month
-    ).text
-    n_calendar_month = datetime.datetime.strptime(calendar_month, "%B").month
+    calendar_month = dom.state(driver, selectors.calendar_month)["text"]
+    n_calendar_month = datetime.datetime.strptime(calendar_month.strip(), "%B").month
     if n_calendar_month != month:  # Max can be a month before or after
         if n_calendar_month < month:
-            arrow = driver.find_elements(
-                By.XPATH, config.selectors.schedule.calendar_arrows
-            )[-1]
+            arrow = f"({selectors.calendar_arrows})[last()]"
         else:
-            arrow = driver.find_elements(
-                By.XPATH, config.selectors.schedule.calendar_arrows
-            )[0]
-        arrow.click()
-    valid_days = driver.find_elements(
-        By.XPATH, config.selectors.schedule.calendar_valid_days
-    )
-
-    day_to_click = None
-    for day_option in valid_days:
-        if int(day_option.text) == day:
-            day_to_click = day_option
+            arrow = f"({selectors.calendar_arrows})[1]"
+        dom.click(driver, arrow, scroll=False)
+
+    # the days are read by one script instead of asking each for its text
+    valid_days = dom.query_all(driver, selectors.calendar_valid_days)
+    for index, day_option in enumerate(valid_days, 1):
+        text = day_option["text"].strip()
+        if text.isdigit() and int(text) == day:
+            dom.click(driver, f"({selectors.calendar_valid_days})[{index}]", scroll=False)
             break
-    if day_to_click:
-        day_to_click.click()
     else:
         raise Exception("Day not found in calendar")
 
@@ -1116,9 +2005,7 @@ def __date_picker(driver: WebDriver, month: int, day: int) -> None:
 
 
 def __verify_date_picked_is_correct(driver: WebDriver, month: int, day: int) -> None:
-    date_selected = driver.find_element(
-        By.XPATH, config.selectors.schedule.date_picker
-    ).text
+    date_selected = dom.state(driver, config.selectors.schedule.date_picker)["text"]
     date_selected_month = int(date_selected.split("-")[1])
     date_selected_day = int(date_selected.split("-")[2])
 
@@ -1132,58 +2019,40 @@ def __verify_date_picked_is_correct(driver: WebDriver, month: int, day: int) ->
 
 def __time_picker(driver: WebDriver, hour: int, minute: int) -> None:
     logger.debug(green("Picking time"))
+    selectors = config.selectors.schedule
 
-    condition = EC.presence_of_element_located(
-        (By.XPATH, config.selectors.schedule.time_picker)
-    )
-    time_picker = WebDriverWait(driver, config.implicit_wait).until(condition)
+    time_picker = wait_for(driver, selectors.time_picker)
     time_picker.click()
+    wait_for(driver, selectors.time_picker_container, "visible")
 
-    condition = EC.presence_of_element_located(
-        (By.XPATH, config.selectors.schedule.time_picker_container)
-    )
-    WebDriverWait(driver, config.implicit_wait).until(condition)
-
-    # 00 = 0, 01 = 1, 02 = 2, 03 = 3, 04 = 4, 05 = 5, 06 = 6, 07 = 7, 08 = 8, 09 = 9, 10 = 10, 11 = 11, 12 = 12,
-    # 13 = 13, 14 = 14, 15 = 15, 16 = 16, 17 = 17, 18 = 18, 19 = 19, 20 = 20, 21 = 21, 22 = 22, 23 = 23
-    hour_options = driver.find_elements(
-        By.XPATH, config.selectors.schedule.timepicker_hours
-    )
-    # 00 == 0, 05 == 1, 10 == 2, 15 == 3, 20 == 4, 25 == 5, 30 == 6, 35 == 7, 40 == 8, 45 == 9, 50 == 10, 55 == 11
-    minute_options = driver.find_elements(
-        By.XPATH, config.selectors.schedule.timepicker_minutes
-    )
-
-    hour_to_click = hour_options[hour]
-    minute_option_correct_index = int(minute / 5)
-    minute_to_click = minute_options[minute_option_correct_index]
-
-    time.sleep(1)  # temporay fix => might be better to use an explicit wait
-    driver.execute_script(
-        "arguments[0].scrollIntoView({block: 'center', inline: 'nearest'});",
-        hour_to_click,
+    # the hours are listed from 00 to 23 and the minutes from 00 to 55 in
+    # steps of 5, each option is scrolled to and clicked by one script
+    options = (
+        f"({selectors.timepicker_hours})[{hour + 1}]",
+        f"({selectors.timepicker_minutes})[{minute // 5 + 1}]",
     )
-    time.sleep(1)  # temporay fix => might be better to use an explicit wait
-    hour_to_click.click()
-
-    driver.execute_script(
-        "arguments[0].scrollIntoView({block: 'center', inline: 'nearest'});",
-        minute_to_click,
-    )
-    time.sleep(2)  # temporary fixed => Might be better to use an explicit wait
-    minute_to_click.click()
+    for option in options:
+        if not dom.click(driver, option):
+            raise Exception(f"Time picker option not found: {option}")
 
     # click somewhere else to close the time picker
     time_picker.click()
 
-    time.sleep(0.5)  # wait for the DOM change
+    # wait for the input to show the picked time
+    try:
+        wait_for(
+            driver,
+            selectors.time_picker_text,
+            "text",
+            text=f"{hour:02d}:{minute:02d}",
+        )
+    except TimeoutException:
+        pass  # reported by the verification below
     __verify_time_picked_is_correct(driver, hour, minute)
 
 
 def __verify_time_picked_is_correct(driver: WebDriver, hour: int, minute: int) -> None:
-    time_selected = driver.find_element(
-        By.XPATH, config.selectors.schedule.time_picker_text
-    ).text
+    time_selected = dom.state(driver, config.selectors.schedule.time_picker_text)["text"]
     time_selected_hour = int(time_selected.split(":")[0])
     time_selected_minute = int(time_selected.split(":")[1])
 
@@ -1208,79 +2077,54 @@ def _post_video(driver: WebDriver) -> None:
     """
     logger.debug(green("Clicking the post button"))
 
-    max_retries = 5
-    for attempt in range(max_retries):
+    post = config.selectors.upload.post
+    retry = Retry("post_button")
+    for attempt in retry:
         try:
-            # Güvenli lambda fonksiyonu - stale element hatalarını handle eder
-            def find_enabled_post_button(d):
-                try:
-                    el = d.find_element(By.XPATH, config.selectors.upload.post)
-                    return el.get_attribute("data-disabled") == "false" and el
-                except (StaleElementReferenceException, NoSuchElementException):
-                    return False
+            # the button is enabled once TikTok finished processing the video
+            with measure("processing", config.uploading_wait) as timeout:
+                wait_for(driver, post, "clickable", timeout)
 
-            post = WebDriverWait(driver, config.uploading_wait).until(find_enabled_post_button)
-            
-            # Element'i tekrar bul (stale element'i onlemek icin)
-            post = driver.find_element(By.XPATH, config.selectors.upload.post)
-            driver.execute_script(
-                "arguments[0].scrollIntoView({block: 'center', inline: 'nearest'});", post
-            )
-            
-            # Element'i tekrar bul ve tıkla
-            post = driver.find_element(By.XPATH, config.selectors.upload.post)
-            post.click()
-            break
-        except StaleElementReferenceException:
-            logger.debug(f"Stale element in post button on attempt {attempt + 1}, retrying...")
-            if attempt < max_retries - 1:
-                time.sleep(0.5)
-                continue
-            else:
-                # Son deneme - JavaScript ile dene
-                try:
-                    driver.execute_script('document.querySelector(".TUXButton--primary").click()')
-                    break
-                except Exception:
-                    raise FailedToUpload("Could not click post button after retries")
-        except ElementClickInterceptedException:
-            logger.debug(green("Trying to click on the button again"))
-            try:
-                driver.execute_script('document.querySelector(".TUXButton--primary").click()')
+            # scrolled to and clicked by the page, so no overlay intercepts it
+            # and the button cannot go stale between finding and clicking it
+            if dom.click(driver, post):
                 break
-            except Exception as e:
-                if attempt < max_retries - 1:
-                    time.sleep(0.5)
-                    continue
-                else:
-                    raise FailedToUpload(f"Could not click post button: {e}")
-
-    # wait for button with text "Post now" and click it if it exists
-    try:
-        logger.debug(green("Waiting for 'Post now' button"))
-        max_post_now_retries = 3
-        for attempt in range(max_post_now_retries):
+            raise NoSuchElementException("The post button was disabled again")
+        except (StaleElementReferenceException, NoSuchElementException) as e:
+            logger.debug(f"Could not click the post button on attempt {attempt}: {e}")
+            if not retry.allow(e):
+                raise FailedToUpload(f"Could not click post button after retries: {e}")
+            retry.wait(e)
+
+    # TikTok either asks to confirm with a "Post now" button or confirms
+    # directly, waiting for whichever comes first avoids a fixed delay when
+    # the button never shows up
+    logger.debug(green("Waiting for 'Post now' button or confirmation"))
+    post_now = config.selectors.upload.post_now
+    post_confirmation = config.selectors.upload.post_confirmation
+    with measure("post_response", config.explicit_wait) as timeout:
+        wait_for(driver, f"{post_now} | {post_confirmation}", timeout=timeout)
+
+    if dom.present(driver, post_now):
+        post_now_retry = Retry("post_now")
+        for _ in post_now_retry:
             try:
-                post_now_button = WebDriverWait(driver, config.implicit_wait).until(
-                    EC.element_to_be_clickable((By.XPATH, config.selectors.upload.post_now))
-                )
-                post_now_button.click()
+                wait_for(driver, post_now, "clickable").click()
                 break
-            except StaleElementReferenceException:
-                if attempt < max_post_now_retries - 1:
-                    time.sleep(0.5)
+            except StaleElementReferenceException as e:
+                if post_now_retry.allow(e):
+                    post_now_retry.wait(e)
                     continue
                 else:
                     logger.debug("Post now button stale after retries, skipping")
                     break
-    except TimeoutException:
-        logger.debug("No 'Post now' button found, proceeding without it")
+            except TimeoutException:
+                logger.debug("'Post now' button not clickable, proceeding without it")
+                break
 
     # waits for the video to upload
-    post_confirmation = EC.presence_of_element_located(
-        (By.XPATH, config.selectors.upload.post_confirmation)
-    )
-    WebDriverWait(driver, config.explicit_wait).until(post_confirmation)
+    with measure("post_confirmation", config.explicit_wait) as timeout:
+        wait_for(driver, post_confirmation, timeout=timeout)
 
     logger.debug(green("Video posted successfully"))
 
@@ -1457,20 +2301,6 @@ def __get_driver_timezone(driver: WebDriver) -> Any:
     return pytz.timezone(timezone_str)
 
 
-def _refresh_with_alert(driver: WebDriver) -> None:
-    try:
-        # attempt to refresh the page
-        driver.refresh()
-
-        # wait for the alert to appear
-        WebDriverWait(driver, config.explicit_wait).until(EC.alert_is_present())
-
-        # accept the alert
-        driver.switch_to.alert.accept()
-    except Exception as e:
-        print(f"Exception when refreshing alert {e}")
-
-
 class DescriptionTooLong(Exception):
     """
     A video description longer than the maximum allowed by TikTok's website (not app) uploader
@@ -1489,93 +2319,93 @@ class FailedToUpload(Exception):
         super().__init__(message or self.__doc__)
 
 
+class InvalidVideo(Exception):
+    """
+    A video can not be posted as given (unsupported file or invalid schedule)
+    """
+
+    def __init__(self, message: str | None = None):
+        super().__init__(message or self.__doc__)
+
+
+class UploadCancelled(Exception):
+    """
+    The upload was cancelled before the form was finished
+    """
+
+    def __init__(self, message: str | None = None):
+        super().__init__(message or self.__doc__)
+
+
 def _add_product_link(driver: WebDriver, product_id: str) -> None:
     """
     Adds the product link to the video using the provided product ID.
     """
     logger.debug(green(f"Attempting to add product link for ID: {product_id}..."))
     try:
-        wait = WebDriverWait(driver, 20)  # Wait up to 20 seconds
+        timeout = 20  # seconds to wait for each step of the modal
 
         # -- Step 1: Find and click the 'Add Product Link' button --
         add_link_button_xpath = (
             "//button[contains(@class, 'Button__root') and contains(., 'Add')]"
         )
-        add_link_button = wait.until(
-            EC.element_to_be_clickable((By.XPATH, add_link_button_xpath))
-        )
-        # Optional: Scroll to the button if it might be off-screen
-        # driver.execute_script("arguments[0].scrollIntoView(true);", add_link_button)
-        # time.sleep(0.5) # Short pause after scrolling
+        add_link_button = wait_for(driver, add_link_button_xpath, "clickable", timeout)
         add_link_button.click()
         logger.debug(green("Clicked 'Add Product Link' button."))
-        time.sleep(1)  # Wait for modal animation
 
         # -- Step 2: Click the 'Next' button in the first modal (if it exists) --
         try:
             first_next_button_xpath = "//button[contains(@class, 'TUXButton--primary') and .//div[text()='Next']]"
             # Ensure this button belongs to the correct modal context if multiple exist
-            first_next_button = wait.until(
-                EC.element_to_be_clickable((By.XPATH, first_next_button_xpath))
+            first_next_button = wait_for(
+                driver, first_next_button_xpath, "clickable", timeout
             )
             first_next_button.click()
             logger.debug(green("Clicked first 'Next' button in modal."))
-            time.sleep(1)  # Wait for the next part of the modal to load
         except TimeoutException:
             logger.debug("First 'Next' button not found or not needed, proceeding...")
 
         # -- Step 3: Find search input, enter product ID, and press Enter --
         search_input_xpath = "//input[@placeholder='Search products']"
-        search_input = wait.until(
-            EC.visibility_of_element_located((By.XPATH, search_input_xpath))
-        )
+        search_input = wait_for(driver, search_input_xpath, "visible", timeout)
         search_input.clear()
         search_input.send_keys(product_id)
         search_input.send_keys(Keys.RETURN)  # Press Enter to search
         logger.debug(green(f"Entered product ID '{product_id}' and pressed Enter."))
-        # Wait for search results - Replace sleep with explicit wait if possible
-        # e.g., wait for a specific element in the results table to appear
-        time.sleep(3)  # Increased wait time slightly
 
         # -- Step 4: Find and select the radio button for the product --
         # !!! CRITICAL: Verify and adjust this XPath based on actual HTML structure !!!
         # It assumes the product ID is visible within a span or div in the same table row (tr)
+        # the wait resolves as soon as the search results contain the product
         product_radio_xpath = f"//tr[.//span[contains(text(), '{product_id}')] or .//div[contains(text(), '{product_id}')]]//input[@type='radio' and contains(@class, 'TUXRadioStandalone-input')]"
         logger.debug(f"Looking for radio button with XPath: {product_radio_xpath}")
-        product_radio = wait.until(
-            EC.element_to_be_clickable((By.XPATH, product_radio_xpath))
-        )
+        product_radio = wait_for(driver, product_radio_xpath, "present", timeout)
         # Use JavaScript click for potentially troublesome radio buttons
         driver.execute_script("arguments[0].click();", product_radio)
+        wait_for(driver, product_radio_xpath, "checked", timeout)
         logger.debug(green(f"Selected product radio for ID: {product_id}"))
-        time.sleep(1)  # Pause after selection
 
         # -- Step 5: Find and click the 'Next' button (after selecting radio) --
         second_next_button_xpath = (
             "//button[contains(@class, 'TUXButton--primary') and .//div[text()='Next']]"
         )
         # Add more context if needed to distinguish this 'Next' button
-        second_next_button = wait.until(
-            EC.element_to_be_clickable((By.XPATH, second_next_button_xpath))
+        second_next_button = wait_for(
+            driver, second_next_button_xpath, "clickable", timeout
         )
         second_next_button.click()
         logger.debug(green("Clicked second 'Next' button."))
-        time.sleep(1)  # Wait for the next modal/confirmation step
 
         # -- Step 6: Find and click the final 'Add' button --
         final_add_button_xpath = (
             "//button[contains(@class, 'TUXButton--primary') and .//div[text()='Add']]"
         )
-        final_add_button = wait.until(
-            EC.element_to_be_clickable((By.XPATH, final_add_button_xpath))
-        )
+        final_add_button = wait_for(driver, final_add_button_xpath, "clickable", timeout)
         final_add_button.click()
         logger.debug(green("Clicked final 'Add' button. Product link should be added."))
 
         # Wait for the modal to close (e.g., wait for the final 'Add' button to disappear)
-        wait.until(
-            EC.invisibility_of_element_located((By.XPATH, final_add_button_xpath))
-        )
+        wait_for(driver, final_add_button_xpath, "absent", timeout)
         logger.debug(green("Product link modal closed."))
 
     except TimeoutException:
@@ -1605,95 +2435,52 @@ def _add_product_link(driver: WebDriver, product_id: str) -> None:
         )
 
 
-def _set_cover(driver, cover_path: str) -> None:
+def _set_cover(driver: WebDriver, cover_path: str) -> None:
     """
     Adds a custom cover to the video using the provided cover image path.
     """
     logger.debug(green(f"Attempting to add custom cover: {cover_path}..."))
+    cover = config.selectors.upload.cover
     try:
         if not _check_valid_cover_path(cover_path):
             raise Exception("Invalid cover image file path")
 
         # First, get the current cover image blob source
-        WebDriverWait(driver, config.implicit_wait).until(
-            EC.presence_of_element_located(
-                (By.XPATH, config.selectors.upload.cover.edit_cover_button)
-            )
-        )
-        current_cover_preview = driver.find_element(
-            By.XPATH, config.selectors.upload.cover.cover_preview
-        ).get_attribute("src")
-
-        # Click the "Edit Cover" button
-        WebDriverWait(driver, config.implicit_wait).until(
-            EC.presence_of_element_located(
-                (By.XPATH, config.selectors.upload.cover.edit_cover_button)
-            )
-        )
-        edit_cover_button = driver.find_element(
-            By.XPATH, config.selectors.upload.cover.edit_cover_button
-        )
-        edit_cover_button.click()
+        wait_for(driver, cover.edit_cover_button, "clickable")
+        current_cover_preview = dom.state(driver, cover.cover_preview)["src"]
 
-        # Enter the Custom Cover tab
-        WebDriverWait(driver, config.implicit_wait).until(
-            EC.presence_of_element_located(
-                (By.XPATH, config.selectors.upload.cover.upload_cover_tab)
-            )
-        )
-        upload_cover_tab = driver.find_element(
-            By.XPATH, config.selectors.upload.cover.upload_cover_tab
-        )
-        upload_cover_tab.click()
+        # Click the "Edit Cover" button, then enter the Custom Cover tab
+        dom.click(driver, cover.edit_cover_button)
+        wait_for(driver, cover.upload_cover_tab)
+        dom.click(driver, cover.upload_cover_tab)
 
         # Wait For Input File
-        driverWait = WebDriverWait(driver, config.explicit_wait)
-        upload_boxWait = EC.presence_of_element_located(
-            (By.XPATH, config.selectors.upload.cover.upload_cover)
-        )
-        driverWait.until(upload_boxWait)
-        upload_box = driver.find_element(
-            By.XPATH, config.selectors.upload.cover.upload_cover
-        )
+        upload_box = wait_for(driver, cover.upload_cover, timeout=config.explicit_wait)
         upload_box.send_keys(cover_path)
 
         # Wait until image is loaded and click confirmation button
-        WebDriverWait(driver, config.implicit_wait).until(
-            EC.presence_of_element_located(
-                (By.XPATH, config.selectors.upload.cover.upload_confirmation)
-            )
-        )
-        upload_confirmation = driver.find_element(
-            By.XPATH, config.selectors.upload.cover.upload_confirmation
-        )
-        upload_confirmation.click()
+        wait_for(driver, cover.upload_confirmation, "clickable")
+        if not dom.click(driver, cover.upload_confirmation):
+            raise NoSuchElementException("The cover confirmation button disappeared")
 
         # At last, wait until the cover image preview changes blob source
-        WebDriverWait(driver, config.implicit_wait).until_not(
-            EC.text_to_be_present_in_element_attribute(
-                (By.XPATH, config.selectors.upload.cover.cover_preview),
-                "src",
-                current_cover_preview,
-            )
+        changed = (
+            f"{cover.cover_preview}[@src != '{current_cover_preview}']"
+            if current_cover_preview
+            else f"{cover.cover_preview}[@src]"
         )
+        wait_for(driver, changed)
 
     except Exception as e:
         logger.error(red(f"Error: {e}. Using default cover instead."))
 
         try:
             # If the edit cover container is open, close it
-            cover_container = driver.find_element(
-                By.XPATH, config.selectors.upload.cover.edit_cover_container
-            )
-            if cover_container.is_displayed():
-                exit_icon = WebDriverWait(driver, config.implicit_wait).until(
-                    EC.presence_of_element_located(
-                        (By.XPATH, config.selectors.upload.cover.exit_cover_container)
-                    )
-                )
-                exit_icon.click()
+            if dom.state(driver, cover.edit_cover_container)["visible"]:
+                wait_for(driver, cover.exit_cover_container)
+                dom.click(driver, cover.exit_cover_container)
         except Exception as e:
-            logger.error(red("Could not print with the default color"))
+            logger.error(red(f"Could not close the cover editor: {e}"))
         return
 
     logger.debug(green("Custom cover posted successfully"))
@@ -2,6 +2,12 @@
 Utilities for TikTok Uploader
 """
 
+import os
+import sys
+from pathlib import Path
+
+CACHE_DIR_ENV = "TIKTOK_UPLOADER_CACHE_DIR"
+
 HEADER = "\033[95m"
 OKBLUE = "\033[94m"
 OKCYAN = "\033[96m"
@@ -39,3 +45,21 @@ def cyan(to_cyan: str) -> str:
     Returns the cyan green
     """
     return OKCYAN + to_cyan + ENDC
+
+
+def cache_dir() -> Path:
+    """
+    Returns the directory where validated config snapshots and other caches live
+
+    `TIKTOK_UPLOADER_CACHE_DIR` overrides the platform's user cache directory
+    """
+    override = os.environ.get(CACHE_DIR_ENV)
+    if override:
+        return Path(override)
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Caches"
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "tiktok_uploader"
@@ -0,0 +1,220 @@
+"""
+Waits which resolve the moment the page reaches a condition
+
+Instead of sleeping for a fixed time (or polling every half second like
+`WebDriverWait`), a MutationObserver is injected which re-checks the
+condition on every DOM change and answers as soon as it holds. `settle`
+waits for the browser to paint, which replaces the pauses used to let
+animations and scrolling finish.
+
+Key Functions
+-------------
+wait_for : Waits until an XPath matches a condition
+settle : Waits until the next frames have been rendered
+"""
+
+import time
+from typing import Literal, overload
+
+from selenium.common.exceptions import JavascriptException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import WebElement
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from tiktok_uploader import config
+
+# the conditions which are met by an element, `wait_for` returns it
+element_condition_t = Literal[
+    "present",
+    "visible",
+    "clickable",
+    "checked",
+    "unchecked",
+    "text",
+    "filled",
+    "empty",
+]
+condition_t = element_condition_t | Literal["absent"]
+
+# the longest a single async script is allowed to run, selenium's default
+# script timeout is 30 seconds so longer waits are split into several calls
+MAX_SCRIPT_WAIT = 20  # seconds
+
+WAIT_SCRIPT = """
+const [xpath, condition, text, timeoutMs, done] = arguments;
+
+function find() {
+  return document.evaluate(
+    xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+  ).singleNodeValue;
+}
+
+function visible(el) {
+  return el.getClientRects().length > 0
+    && getComputedStyle(el).visibility !== 'hidden';
+}
+
+function check() {
+  const el = find();
+  switch (condition) {
+    case 'absent': return el && visible(el) ? null : true;
+    case 'present': return el;
+    case 'visible': return el && visible(el) ? el : null;
+    case 'clickable':
+      return el && visible(el) && !el.disabled
+        && el.getAttribute('aria-disabled') !== 'true'
+        && el.getAttribute('data-disabled') !== 'true' ? el : null;
+    case 'checked': return el && el.checked ? el : null;
+    case 'unchecked': return el && !el.checked ? el : null;
+    case 'text': return el && (el.textContent || '').includes(text) ? el : null;
+    case 'filled': return el && (el.innerText || '') !== '' ? el : null;
+    case 'empty': return el && (el.innerText || '') === '' ? el : null;
+  }
+  return null;
+}
+
+let result = check();
+if (result) { done(result); return; }
+
+const observer = new MutationObserver(() => {
+  const found = check();
+  if (found) finish(found);
+});
+const timer = setTimeout(() => finish(check()), timeoutMs);
+
+function finish(value) {
+  observer.disconnect();
+  clearTimeout(timer);
+  done(value);
+}
+
+observer.observe(document, {
+  subtree: true, childList: true, attributes: true, characterData: true
+});
+"""
+
+SETTLE_SCRIPT = """
+const [frames, done] = arguments;
+let remaining = frames;
+function tick() {
+  if (--remaining <= 0) { done(true); return; }
+  requestAnimationFrame(tick);
+}
+requestAnimationFrame(tick);
+"""
+
+
+@overload
+def wait_for(
+    driver: WebDriver,
+    xpath: str,
+    condition: element_condition_t = "present",
+    timeout: float | None = None,
+    text: str = "",
+) -> WebElement: ...
+
+
+@overload
+def wait_for(
+    driver: WebDriver,
+    xpath: str,
+    condition: Literal["absent"],
+    timeout: float | None = None,
+    text: str = "",
+) -> None: ...
+
+
+def wait_for(
+    driver: WebDriver,
+    xpath: str,
+    condition: condition_t = "present",
+    timeout: float | None = None,
+    text: str = "",
+) -> WebElement | None:
+    """
+    Waits until the element at `xpath` matches the condition
+
+    Parameters
+    ----------
+    driver : selenium.webdriver
+    xpath : str
+        The element to watch
+    condition : str
+        One of present, absent (missing or hidden), visible, clickable,
+        checked, unchecked, text (the element's text contains `text`),
+        filled or empty (the element has some or no visible text)
+    timeout : float
+        Seconds to wait before raising TimeoutException, defaults to `config.implicit_wait`
+
+    Returns
+    -------
+    element : WebElement
+        The matched element, None when waiting for it to be absent
+    """
+    timeout = config.implicit_wait if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+
+    while True:
+        remaining = max(0.0, deadline - time.monotonic())
+        chunk = min(remaining, MAX_SCRIPT_WAIT)
+        try:
+            result = driver.execute_async_script(
+                WAIT_SCRIPT, xpath, condition, text, int(chunk * 1000)
+            )
+        except JavascriptException:
+            # e.g. a page with a CSP forbidding the observer, fall back to polling
+            return _poll_for(driver, xpath, condition, remaining, text)
+
+        if result:
+            return result if isinstance(result, WebElement) else None
+        if time.monotonic() >= deadline:
+            raise TimeoutException(
+                f"Timed out after {timeout}s waiting for {xpath} to be {condition}"
+            )
+
+
+def settle(driver: WebDriver, frames: int = 2) -> None:
+    """
+    Waits until the browser rendered `frames` more frames
+
+    Used after scrolling or opening a menu, when the next action needs the
+    layout (and any CSS transition started by it) to be applied
+    """
+    try:
+        driver.execute_async_script(SETTLE_SCRIPT, frames)
+    except (JavascriptException, TimeoutException):
+        # headless pages in the background may throttle animation frames
+        pass
+
+
+def _poll_for(
+    driver: WebDriver,
+    xpath: str,
+    condition: condition_t,
+    timeout: float,
+    text: str,
+) -> WebElement | None:
+    """
+    The WebDriverWait equivalent of `wait_for`
+    """
+    locator = (By.XPATH, xpath)
+    expected = {
+        "present": EC.presence_of_element_located(locator),
+        "absent": EC.invisibility_of_element_located(locator),
+        "visible": EC.visibility_of_element_located(locator),
+        "clickable": EC.element_to_be_clickable(locator),
+        "checked": EC.element_located_selection_state_to_be(locator, True),
+        "unchecked": EC.element_located_selection_state_to_be(locator, False),
+        "text": EC.text_to_be_present_in_element(locator, text),
+        "filled": lambda d: d.find_element(*locator).text != "",
+        "empty": lambda d: d.find_element(*locator).text == "",
+    }[condition]
+
+    result = WebDriverWait(driver, timeout).until(expected)
+    if isinstance(result, WebElement):
+        return result
+    if condition in ("checked", "unchecked", "text", "filled", "empty"):
+        return driver.find_element(*locator)
+    return None
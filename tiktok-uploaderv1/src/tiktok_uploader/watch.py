@@ -0,0 +1,376 @@
+"""
+Watches folders for new videos and uploads them as they arrive
+
+`FolderWatcher` reports a video once it is completely written: on Linux
+inotify (through ctypes, no extra dependency) tells when a file was created,
+closed after writing or moved into the folder, elsewhere the folders are
+polled. Either way a file is only reported once its size and modification
+time stopped changing, so a converter still writing a clip is waited for.
+
+`WatchDaemon` feeds the reported videos into a `JobStore` and uploads them
+with one `UploadSession` whose browser is started, authenticated and left on
+the upload page up front, so a new clip starts uploading within seconds.
+
+Key Classes
+-----------
+FolderWatcher : Reports videos which finished writing in a set of folders
+WatchDaemon : Uploads every new video of the watched folders
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator
+
+from tiktok_uploader import config, logger
+from tiktok_uploader.jobs import JobStore, process_queue
+from tiktok_uploader.types import VideoDict
+from tiktok_uploader.upload import UploadSession
+from tiktok_uploader.utils import green
+
+# inotify(7)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len, then the name
+
+# files being written by browsers, downloaders and converters
+PARTIAL_SUFFIXES = (".part", ".partial", ".tmp", ".crdownload", ".download")
+
+
+class _Inotify:
+    """
+    The inotify instance of a `FolderWatcher`
+    """
+
+    def __init__(self, folders: list[str]):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.folders: dict[int, str] = {}
+        try:
+            for folder in folders:
+                wd = libc.inotify_add_watch(self.fd, os.fsencode(folder), WATCH_MASK)
+                if wd < 0:
+                    errno = ctypes.get_errno()
+                    raise OSError(
+                        errno, f"inotify_add_watch failed: {os.strerror(errno)}"
+                    )
+                self.folders[wd] = folder
+        except BaseException:
+            os.close(self.fd)
+            raise
+
+    def read(self, timeout: float) -> tuple[list[tuple[str, bool]], bool] | None:
+        """
+        Waits up to `timeout` seconds for events
+
+        Returns the (path, closed) pairs of the changed files and whether
+        events were lost, None when nothing happened
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return None
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return None
+
+        changes, overflow = [], False
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size : offset + _EVENT.size + length]
+            offset += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            folder = self.folders.get(wd)
+            name = name.rstrip(b"\0")
+            if folder is None or not name or mask & IN_ISDIR:
+                continue
+            closed = bool(mask & (IN_CLOSE_WRITE | IN_MOVED_TO))
+            changes.append((os.path.join(folder, os.fsdecode(name)), closed))
+        return changes, overflow
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class FolderWatcher:
+    """
+    Reports the videos of some folders once they are completely written
+
+    Videos already in the folders are reported too, as soon as they are
+    found stable
+
+    Parameters
+    ----------
+    folders : list
+        The folders to watch (not their subfolders)
+    settle : float
+        Seconds a file's size must stay the same before it counts as written
+    closed_settle : float
+        The same for files inotify saw being closed after writing
+    poll_interval : float
+        Seconds between two scans of the folders when polling, and between
+        two checks of the files still being written
+    use_inotify : bool
+        Use inotify where it is available, polls otherwise
+    extensions : list
+        The video extensions to report, `config.supported_file_types` by default
+    """
+
+    def __init__(
+        self,
+        folders: list[str],
+        settle: float = 3.0,
+        closed_settle: float = 0.5,
+        poll_interval: float = 1.0,
+        use_inotify: bool = True,
+        extensions: list[str] | None = None,
+    ):
+        self.folders = [os.path.abspath(folder) for folder in folders]
+        self.settle = settle
+        self.closed_settle = closed_settle
+        self.poll_interval = poll_interval
+        self.extensions = {
+            f".{ext.lower()}" for ext in (extensions or config.supported_file_types)
+        }
+
+        # path -> (size, mtime, time it last changed, closed after writing)
+        self._pending: dict[str, tuple[int, float, float, bool]] = {}
+        # the (size, mtime) of every reported file, so it is reported once
+        self._reported: dict[str, tuple[int, float]] = {}
+
+        self._inotify: _Inotify | None = None
+        if use_inotify and sys.platform.startswith("linux"):
+            try:
+                self._inotify = _Inotify(self.folders)
+            except (OSError, AttributeError) as e:
+                logger.debug(f"inotify is not available ({e}), polling the folders")
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if self._inotify is not None else "polling"
+
+    def watch(self, stop: threading.Event | None = None) -> Iterator[str]:
+        """
+        Yields the path of every video which finished writing until `stop` is set
+        """
+        stop = stop or threading.Event()
+        self._scan()
+        next_scan = time.monotonic() + self.poll_interval
+        while not stop.is_set():
+            yield from self.ready()
+
+            if self._inotify is None:
+                stop.wait(max(0.0, next_scan - time.monotonic()))
+                self._scan()
+                next_scan = time.monotonic() + self.poll_interval
+                continue
+
+            # files being written are checked every poll_interval, an idle
+            # watcher still wakes up now and then to notice `stop`
+            timeout = (
+                min(self.poll_interval, self.closed_settle) if self._pending else 1.0
+            )
+            events = self._inotify.read(timeout)
+            if events is None:
+                continue
+            changes, overflow = events
+            for path, closed in changes:
+                self._touch(path, closed)
+            if overflow:
+                logger.debug("inotify lost events, scanning the folders again")
+                self._scan()
+
+    def ready(self) -> list[str]:
+        """
+        Returns the pending files which stopped changing, in the order they arrived
+        """
+        now = time.monotonic()
+        ready = []
+        for path, (size, mtime, changed, closed) in list(self._pending.items()):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                del self._pending[path]  # deleted or moved away
+                continue
+            if (stat.st_size, stat.st_mtime) != (size, mtime):
+                # written again after it was closed, wait for the next close
+                self._pending[path] = (stat.st_size, stat.st_mtime, now, False)
+                continue
+            quiet = now - changed
+            if stat.st_size and quiet >= (
+                self.closed_settle if closed else self.settle
+            ):
+                del self._pending[path]
+                self._reported[path] = (size, mtime)
+                ready.append(path)
+        return ready
+
+    def close(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def __enter__(self) -> "FolderWatcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _scan(self) -> None:
+        for folder in self.folders:
+            try:
+                names = os.listdir(folder)
+            except OSError as e:
+                logger.debug(f"Could not list {folder}: {e}")
+                continue
+            for name in names:
+                self._touch(os.path.join(folder, name), closed=False)
+
+    def _touch(self, path: str, closed: bool) -> None:
+        """
+        Starts (or restarts) waiting for a file to be stable
+        """
+        name = os.path.basename(path)
+        if name.startswith(".") or name.lower().endswith(PARTIAL_SUFFIXES):
+            return
+        if os.path.splitext(name)[1].lower() not in self.extensions:
+            return
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        if not os.path.isfile(path):
+            return
+        if self._reported.get(path) == (stat.st_size, stat.st_mtime):
+            return  # a scan finding a file which was already reported
+
+        previous = self._pending.get(path)
+        if previous is not None and previous[:2] == (stat.st_size, stat.st_mtime):
+            # nothing changed, only the close is news
+            self._pending[path] = (*previous[:3], previous[3] or closed)
+        else:
+            self._pending[path] = (
+                stat.st_size,
+                stat.st_mtime,
+                time.monotonic(),
+                closed,
+            )
+
+
+class WatchDaemon:
+    """
+    Uploads every video which appears in the watched folders
+
+    A background thread watches the folders and queues each new video in the
+    store, the calling thread uploads the queue with the session. While
+    nothing is queued the browser waits on the upload page and is reloaded
+    every `refresh_interval` seconds (or replaced when it died), so the next
+    video does not wait for a browser to start.
+
+    Parameters
+    ----------
+    folders : list
+        The folders to watch
+    store : JobStore
+        The persistent queue, videos already in it are not queued again
+    session : UploadSession
+        Uploads the videos, its browser is kept open between them
+    make_video : function
+        Returns the video (path, description, ...) to upload for a new file
+    account : str
+        The account the jobs are queued and processed under, the session's
+        account by default
+    refresh_interval : float
+        Seconds an idle browser waits before the upload page is loaded again
+    **watcher_kwargs :
+        Passed to `FolderWatcher`
+    """
+
+    def __init__(
+        self,
+        folders: list[str],
+        store: JobStore,
+        session: UploadSession,
+        make_video: Callable[[str], VideoDict] | None = None,
+        account: str | None = None,
+        refresh_interval: float = 900,
+        **watcher_kwargs,
+    ):
+        self.store = store
+        self.session = session
+        self.make_video = make_video or (lambda path: {"path": path})
+        self.account = session.auth.account_id if account is None else account
+        self.refresh_interval = refresh_interval
+        self.watcher = FolderWatcher(folders, **watcher_kwargs)
+
+        self._stop = threading.Event()
+        self._queued = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def run(self) -> None:
+        """
+        Watches and uploads until `stop` is called (or KeyboardInterrupt)
+        """
+        folders = ", ".join(self.watcher.folders)
+        logger.info(green(f"Klasorler izleniyor ({self.watcher.backend}): {folders}"))
+        self._thread = threading.Thread(
+            target=self._watch, name="tiktok-watch", daemon=True
+        )
+        self._thread.start()
+
+        self._warm_up()
+        warmed_at = time.monotonic()
+        # jobs left over by an earlier run are uploaded right away
+        self._queued.set()
+        try:
+            while not self._stop.is_set():
+                if self._queued.wait(timeout=1.0):
+                    self._queued.clear()
+                    if process_queue(self.store, self.session, self.account):
+                        logger.info(green("Kuyruk bos, yeni videolar bekleniyor"))
+                    self._warm_up()
+                    warmed_at = time.monotonic()
+                elif time.monotonic() - warmed_at > self.refresh_interval:
+                    self._warm_up()
+                    warmed_at = time.monotonic()
+        finally:
+            self.stop()
+            self._thread.join(timeout=5)
+            self.watcher.close()
+
+    def stop(self) -> None:
+        """
+        Stops watching, an upload in flight is finished first
+        """
+        self._stop.set()
+
+    def _warm_up(self) -> None:
+        try:
+            self.session.warm_up()
+        except Exception as e:
+            # the next upload starts the browser itself
+            logger.error(f"Tarayici hazirlanamadi: {e}")
+
+    def _watch(self) -> None:
+        try:
+            for path in self.watcher.watch(self._stop):
+                if self.store.enqueue(self.make_video(path), self.account) is not None:
+                    logger.info(f"Yeni video kuyruga eklendi: {os.path.basename(path)}")
+                    self._queued.set()
+        except Exception as e:
+            logger.error(f"Klasor izleme durdu: {e}")
+            self.stop()
@@ -0,0 +1,200 @@
+"""
+Health monitoring of long lived drivers
+
+A driver reused for a long batch can grow until the host runs out of memory,
+or hang inside chromedriver so that the command in flight never returns and
+the whole batch stops. `DriverWatchdog` checks the driver from a background
+thread and kills its processes when it is unhealthy, which makes the
+blocked command fail so `UploadSession` can start a new, re-authenticated
+browser and put the video back in line.
+
+Key Classes
+-----------
+DriverWatchdog : Kills a driver which uses too much memory, hangs or overruns a stage
+"""
+
+import threading
+import time
+from collections.abc import Callable
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from tiktok_uploader import logger
+from tiktok_uploader.browsers import (
+    driver_rss,
+    kill_driver,
+    warn_without_process_inspection,
+)
+from tiktok_uploader.timing import UploadTrace, command_activity, count_commands
+from tiktok_uploader.types import WatchdogLimits
+from tiktok_uploader.utils import red
+
+# the cheapest command that still needs the page's renderer to answer
+PING_SCRIPT = "return 1"
+
+
+class DriverWatchdog:
+    """
+    Watches a single driver from a daemon thread
+
+    Every `interval` seconds it checks that
+
+    - the browser's process tree stays below `max_rss_mb`
+    - no WebDriver command waits longer than `hang_timeout` for an answer,
+      an idle driver is pinged with a tiny script to find out
+    - the running upload stage is within its deadline, the stages waiting
+      for the video's transfer get the upload's own deadline (see `watch`)
+
+    The first failed check kills the driver's processes and is kept in
+    `tripped`, the watchdog then stops.
+
+    Parameters
+    ----------
+    driver : selenium.webdriver
+        The driver to watch, its commands are counted if they are not yet
+    max_rss_mb : int
+        Memory the browser and its child processes may use, unlimited if None
+    hang_timeout : float
+        Seconds a command may go without an answer
+    stage_deadline : float
+        Seconds any other upload stage may run
+    stage_deadlines : dict
+        Fixed deadlines of individual stages, like {"await_processing": 1800},
+        they take precedence over the deadlines given to `watch`
+    interval : float
+        Seconds between two checks
+    on_trip : function
+        Called with the reason after the driver was killed
+    """
+
+    def __init__(
+        self,
+        driver: WebDriver,
+        max_rss_mb: int | None = None,
+        hang_timeout: float = 120,
+        stage_deadline: float = 900,
+        stage_deadlines: dict[str, float] | None = None,
+        interval: float = 5,
+        on_trip: Callable[[str], None] | None = None,
+    ):
+        self.driver = driver
+        self.max_rss_mb = max_rss_mb
+        # without them only chromedriver itself is killed, not the browser
+        warn_without_process_inspection("Watchdog bellek olcumu ve surec agaci kapatma")
+        self.hang_timeout = hang_timeout
+        self.stage_deadline = stage_deadline
+        self.stage_deadlines = stage_deadlines or {}
+        self._deadlines = dict(self.stage_deadlines)
+        self.interval = interval
+        self.on_trip = on_trip
+        self.tripped: str | None = None
+
+        self._trace: UploadTrace | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        count_commands(driver)
+
+    @classmethod
+    def from_limits(
+        cls,
+        driver: WebDriver,
+        limits: WatchdogLimits,
+        on_trip: Callable[[str], None] | None = None,
+    ) -> "DriverWatchdog":
+        """
+        Creates a watchdog from `UploadSession`'s `watchdog` limits
+        """
+        options = {key: value for key, value in limits.items() if key != "max_requeues"}
+        return cls(driver, on_trip=on_trip, **options)  # type: ignore[arg-type]
+
+    def watch(
+        self, trace: UploadTrace | None, deadlines: dict[str, float] | None = None
+    ) -> None:
+        """
+        Enforces the stage deadlines on the upload the trace records
+
+        `deadlines` are the seconds the upload's own waits in a stage may
+        take, like the transfer of a large video on a slow proxy. The stage
+        is given `hang_timeout` more, so it times out by itself first.
+        """
+        self._trace = trace
+        own = {
+            stage: seconds + self.hang_timeout
+            for stage, seconds in (deadlines or {}).items()
+        }
+        self._deadlines = {**own, **self.stage_deadlines}
+
+    def start(self) -> "DriverWatchdog":
+        self._thread = threading.Thread(
+            target=self._run, name="tiktok-watchdog", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stops watching, the driver is left alone
+        """
+        self._stop.set()
+
+    def check(self) -> str | None:
+        """
+        Runs every check once, returns why the driver is unhealthy or None
+        """
+        if self.max_rss_mb is not None:
+            rss = driver_rss(self.driver)
+            if rss is not None and rss > self.max_rss_mb * 1024 * 1024:
+                return f"bellek {rss // (1024 * 1024)} MB > {self.max_rss_mb} MB"
+
+        running = self._trace.running() if self._trace is not None else None
+        if running is not None:
+            stage, elapsed = running
+            deadline = self._deadlines.get(stage, self.stage_deadline)
+            if elapsed > deadline:
+                return (
+                    f"{stage} asamasi {elapsed:.0f} sn surdu (sinir {deadline:.0f} sn)"
+                )
+
+        activity = command_activity(self.driver)
+        if activity is None:
+            return None
+        pending, last_activity = activity
+        idle = time.monotonic() - last_activity
+        if pending and idle > self.hang_timeout:
+            return f"WebDriver {idle:.0f} sn boyunca cevap vermedi"
+        if not pending and running is None and idle > self.interval:
+            # an unanswered ping shows up as a pending command next time
+            threading.Thread(target=self._ping, daemon=True).start()
+        return None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                reason = self.check()
+            except Exception as e:
+                logger.debug(f"Watchdog check failed: {e}")
+                continue
+            if reason is not None and not self._stop.is_set():
+                self._trip(reason)
+                return
+
+    def _ping(self) -> None:
+        try:
+            self.driver.execute_script(PING_SCRIPT)
+        except Exception:
+            pass  # a dead driver is found by the upload, a hung one by `check`
+
+    def _trip(self, reason: str) -> None:
+        self.tripped = reason
+        logger.warning(red(f"Tarayici sagliksiz ({reason}), kapatiliyor"))
+        if not kill_driver(self.driver):
+            # a remote driver, quit can hang as well so it gets its own thread
+            threading.Thread(target=self._quit, daemon=True).start()
+        if self.on_trip is not None:
+            self.on_trip(reason)
+
+    def _quit(self) -> None:
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.debug(f"Could not quit driver cleanly: {e}")
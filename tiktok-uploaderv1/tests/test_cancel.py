@@ -0,0 +1,79 @@
+"""
+Tests for cancelling an upload before its browser can be killed
+"""
+
+import pytest
+
+from tiktok_uploader import upload
+from tiktok_uploader.auth import AuthBackend
+from tiktok_uploader.timeouts import LatencyStore
+from tiktok_uploader.upload import UploadCancelled, UploadSession, complete_upload_form
+from tiktok_uploader.utils import CACHE_DIR_ENV
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setenv(CACHE_DIR_ENV, str(tmp_path))
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(b"video")
+    return {"path": str(path), "description": "test"}
+
+
+class Browser:
+    """
+    A driver which fails the test once it is sent a command
+    """
+
+    def __init__(self):
+        self.quit_called = False
+
+    def execute(self, command: str, params: dict | None = None) -> dict:
+        raise AssertionError(f"{command} was sent to the browser")
+
+    def quit(self) -> None:
+        self.quit_called = True
+
+
+class SlowStart(UploadSession):
+    """
+    A session which is cancelled while its browser starts
+    """
+
+    def _start_driver(self):
+        self.cancel("zaman asimi")
+        self.started = Browser()
+        return self.started
+
+
+def test_cancel_while_the_browser_starts(tmp_path, video, monkeypatch):
+    def complete_upload_form(*args, **kwargs):
+        raise AssertionError("the form of a cancelled upload is filled")
+
+    monkeypatch.setattr(upload, "complete_upload_form", complete_upload_form)
+    session = SlowStart(
+        AuthBackend(sessionid="session"),
+        latency_store=LatencyStore(tmp_path / "latencies.json"),
+    )
+
+    assert not session.upload(video)
+    assert video["error"] == "Yukleme durduruldu: zaman asimi"
+
+    # the browser the cancel could not kill is quit by the next upload
+    session.upload({"path": "missing.mp4"})
+    assert session.started.quit_called
+
+
+def test_cancelled_form_runs_no_stage(video):
+    with pytest.raises(UploadCancelled, match="zaman asimi"):
+        complete_upload_form(
+            Browser(),  # type: ignore[arg-type]
+            video["path"],
+            video["description"],
+            None,
+            skip_split_window=False,
+            cancelled=lambda: "zaman asimi",
+        )
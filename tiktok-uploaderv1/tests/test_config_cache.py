@@ -0,0 +1,93 @@
+"""
+Tests for the cached config snapshots
+"""
+
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from tiktok_uploader import config, config_dir, upload
+from tiktok_uploader.config import load_config
+from tiktok_uploader.config_cache import NO_CACHE_ENV, ConfigSnapshot, load_settings
+from tiktok_uploader.utils import CACHE_DIR_ENV
+
+CONFIG_FILE = Path(config_dir) / "config.toml"
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setenv(CACHE_DIR_ENV, str(tmp_path))
+    monkeypatch.delenv(NO_CACHE_ENV, raising=False)
+    return tmp_path
+
+
+def test_snapshot_is_reused(cache):
+    validated = load_settings(CONFIG_FILE)
+    assert len(list(cache.glob("config-*.json"))) == 1
+
+    cached = load_settings(CONFIG_FILE)
+    assert isinstance(cached, ConfigSnapshot)
+    assert cached == validated
+
+
+def test_changed_file_is_validated_again(cache, tmp_path):
+    changed = tmp_path / "config.toml"
+    changed.write_text(CONFIG_FILE.read_text().replace("headless = ", "headless =  "))
+
+    load_settings(CONFIG_FILE)
+    load_settings(changed)
+    assert len(list(cache.glob("config-*.json"))) == 2
+
+
+def test_unreadable_snapshot_is_validated_again(cache):
+    load_settings(CONFIG_FILE)
+    (snapshot,) = cache.glob("config-*.json")
+    snapshot.write_text("{not json")
+
+    assert load_settings(CONFIG_FILE) == ConfigSnapshot(
+        load_config(CONFIG_FILE).model_dump(mode="json")
+    )
+
+
+def test_paths_match_the_model():
+    model = load_config(CONFIG_FILE)
+    load_settings(CONFIG_FILE)
+    snapshot = load_settings(CONFIG_FILE)
+
+    for name in ("main", "login", "upload"):
+        assert str(getattr(snapshot.paths, name)) == str(getattr(model.paths, name))
+
+
+class UploadPage:
+    """
+    A driver which already shows the upload page
+    """
+
+    def __init__(self, url: str):
+        self.current_url = url
+        self.loaded: list[str] = []
+        self.switch_to = SimpleNamespace(default_content=lambda: None)
+
+    def get(self, url: str) -> None:
+        self.loaded.append(url)
+
+    def refresh(self) -> None:
+        raise AssertionError("the page is refreshed instead of loaded")
+
+    def find_element(self, by: str, value: str) -> object:
+        return object()
+
+
+@pytest.mark.parametrize("source", ["snapshot", "model"])
+def test_upload_page_is_loaded_with_either_config(source, monkeypatch):
+    if source == "snapshot":
+        load_settings(CONFIG_FILE)
+        paths = load_settings(CONFIG_FILE).paths
+    else:
+        paths = load_config(CONFIG_FILE).paths
+    monkeypatch.setattr(config, "paths", paths)
+
+    driver = UploadPage(str(paths.upload))
+    upload._go_to_upload(driver)  # type: ignore[arg-type]
+    assert driver.loaded == [str(paths.upload)]
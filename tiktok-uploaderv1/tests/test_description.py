@@ -0,0 +1,88 @@
+"""
+Tests for the splitting of descriptions into text runs, hashtags and mentions
+"""
+
+import pytest
+
+from tiktok_uploader import upload
+from tiktok_uploader.upload import INSERT_TEXT_SCRIPT, _insert_text, _split_description
+
+
+def typed(tokens: list[str]) -> str:
+    """
+    The text the tokens type, a hashtag or mention is followed by a space
+    once it was picked from its suggestions
+    """
+    return "".join(token + " " if token[0] in "#@" else token for token in tokens)
+
+
+@pytest.mark.parametrize(
+    "description, tokens",
+    [
+        ("hello world", ["hello world "]),
+        ("great day #fun #sun", ["great day ", "#fun", "#sun"]),
+        ("#first words", ["#first", "words "]),
+        ("with @friend today", ["with ", "@friend", "today "]),
+        # a bare trailing sign is typed like a hashtag, as word by word did
+        ("trailing #", ["trailing ", "#"]),
+        # runs of spaces are kept inside the plain text
+        ("two  spaces", ["two  spaces "]),
+        ("before  #tag", ["before  ", "#tag"]),
+        ("emoji 🎉 here #tag 🔥", ["emoji 🎉 here ", "#tag", "🔥 "]),
+        # only a sign in front of a word starts a hashtag or mention
+        ("mail me@example.com or C#", ["mail me@example.com or C# "]),
+        ("#one#two", ["#one#two"]),
+    ],
+)
+def test_split_description(description, tokens):
+    assert _split_description(description) == tokens
+
+
+@pytest.mark.parametrize(
+    "description",
+    ["hello world", "a  b #c  @d e", "#tag", "🎉 @x 🎉", " leading and trailing "],
+)
+def test_split_types_what_word_by_word_typed(description):
+    # every word used to be typed with a space after it
+    assert typed(_split_description(description)) == description + " "
+
+
+class Editor:
+    """
+    A driver whose editor accepts (or rejects) the inserted text
+    """
+
+    def __init__(self, accepts: bool):
+        self.accepts = accepts
+        self.scripts: list[tuple] = []
+
+    def find_element(self, by: str, value: str) -> str:
+        return value
+
+    def execute_script(self, script: str, *args) -> bool:
+        self.scripts.append((script, *args))
+        return self.accepts
+
+
+@pytest.fixture
+def typed_keys(monkeypatch):
+    keys: list[str] = []
+    monkeypatch.setattr(
+        upload, "_safe_send_keys", lambda driver, xpath, text: keys.append(text)
+    )
+    return keys
+
+
+def test_insert_text(typed_keys):
+    driver = Editor(accepts=True)
+    _insert_text(driver, "//editor", "great day 🎉 ")  # type: ignore[arg-type]
+
+    assert driver.scripts == [(INSERT_TEXT_SCRIPT, "//editor", "great day 🎉 ")]
+    assert typed_keys == []
+
+
+def test_rejected_text_is_typed(typed_keys):
+    driver = Editor(accepts=False)
+    _insert_text(driver, "//editor", "great day ")  # type: ignore[arg-type]
+
+    assert typed_keys == ["great day "]
@@ -0,0 +1,234 @@
+"""
+Tests for the job queue's status transitions and crash recovery
+"""
+
+import sqlite3
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from tiktok_uploader.jobs import (
+    INTERRUPTED_POST,
+    JobStore,
+    process_queue,
+    resolve_reviews,
+)
+from tiktok_uploader.ledger import UploadLedger
+
+
+@pytest.fixture
+def database(tmp_path):
+    return str(tmp_path / "jobs.db")
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(b"video")
+    return {"path": str(path), "description": "test"}
+
+
+def expire(database: str, job_id: int) -> None:
+    """
+    Makes the job's lease look like it ran out long ago
+    """
+    connection = sqlite3.connect(database)
+    with connection:
+        connection.execute(
+            "UPDATE jobs SET heartbeat = ?, updated_at = ? WHERE id = ?",
+            (time.time() - 3600, time.time() - 3600, job_id),
+        )
+    connection.close()
+
+
+def test_job_lifecycle(database, video):
+    with JobStore(database) as store:
+        job_id = store.enqueue(video)
+        assert job_id is not None
+        assert store.enqueue(video) is None  # already known
+
+        job = store.claim()
+        assert job is not None
+        assert job["id"] == job_id
+        assert job["status"] == "uploading"
+        assert job["attempts"] == 1
+        assert store.claim() is None
+
+        store.mark(job_id, "form_filled")
+        store.mark(job_id, "posted")
+        assert store.counts() == {"posted": 1}
+
+
+def test_requeue_failed(database, video):
+    with JobStore(database) as store:
+        job_id = store.enqueue(video)
+        store.claim()
+        store.mark(job_id, "failed", "boom")
+
+        assert store.requeue_failed(max_attempts=1) == 0
+        assert store.requeue_failed() == 1
+        job = store.get(job_id)
+        assert job["status"] == "queued"
+        assert job["error"] is None
+
+
+def test_recover_requeues_interrupted_upload(database, video):
+    with JobStore(database, recover=False) as dead:
+        job_id = dead.enqueue(video)
+        dead.claim()
+    expire(database, job_id)
+
+    with JobStore(database) as store:
+        assert store.get(job_id)["status"] == "queued"
+        job = store.claim()
+        assert job["id"] == job_id
+        assert job["attempts"] == 2
+
+
+def test_recover_never_requeues_interrupted_post(database, video):
+    with JobStore(database, recover=False) as dead:
+        job_id = dead.enqueue(video)
+        dead.claim()
+        dead.mark(job_id, "form_filled")
+    expire(database, job_id)
+
+    with JobStore(database) as store:
+        assert store.recover() == 0
+        job = store.get(job_id)
+        assert job["status"] == "review"
+        assert job["error"] == INTERRUPTED_POST
+        # the video may already be posted, it is not uploaded a second time
+        assert store.claim() is None
+
+
+def test_recover_leaves_live_workers_alone(database, video):
+    with JobStore(database, recover=False) as worker:
+        job_id = worker.enqueue(video)
+        worker.claim()
+
+        with JobStore(database) as other:
+            assert other.recover() == 0
+            assert other.get(job_id)["status"] == "uploading"
+
+            # a renewed heartbeat keeps the job past its first lease
+            expire(database, job_id)
+            worker.heartbeat()
+            assert other.recover() == 0
+            assert other.get(job_id)["status"] == "uploading"
+
+
+def test_recover_waits_for_the_lease(database, video):
+    with JobStore(database, recover=False) as dead:
+        job_id = dead.enqueue(video)
+        dead.claim()
+
+    with JobStore(database, lease=3600) as store:
+        assert store.get(job_id)["status"] == "uploading"
+    with JobStore(database, lease=0) as store:
+        assert store.get(job_id)["status"] == "queued"
+
+
+def test_resolve_reviews(database, tmp_path, video):
+    other = tmp_path / "other.mp4"
+    other.write_bytes(b"other video")
+
+    with JobStore(database, recover=False) as dead:
+        posted_id = dead.enqueue(video, "account")
+        unknown_id = dead.enqueue(
+            {"path": str(other), "description": "other"}, "account"
+        )
+        for job_id in (posted_id, unknown_id):
+            dead.claim()
+            dead.mark(job_id, "form_filled")
+    expire(database, posted_id)
+    expire(database, unknown_id)
+
+    with UploadLedger(str(tmp_path / "ledger.db")) as ledger:
+        ledger.record(video["path"], "account")
+        session = SimpleNamespace(
+            ledger=ledger, auth=SimpleNamespace(account_id="account")
+        )
+
+        with JobStore(database) as store:
+            assert resolve_reviews(store, session) == 1
+            assert store.get(posted_id)["status"] == "posted"
+            assert store.get(unknown_id)["status"] == "review"
+
+
+def test_reviews_of_other_accounts_are_left_alone(database, tmp_path, video):
+    with JobStore(database, recover=False) as dead:
+        job_id = dead.enqueue(video, "other")
+        dead.claim()
+        dead.mark(job_id, "form_filled")
+    expire(database, job_id)
+
+    with UploadLedger(str(tmp_path / "ledger.db")) as ledger:
+        ledger.record(video["path"], "account")
+        session = SimpleNamespace(
+            ledger=ledger, auth=SimpleNamespace(account_id="account")
+        )
+
+        with JobStore(database) as store:
+            assert resolve_reviews(store, session) == 0
+            assert store.get(job_id)["status"] == "review"
+
+
+class Session:
+    """
+    Posts every video it is given, under its account
+    """
+
+    def __init__(self, account_id: str):
+        self.auth = SimpleNamespace(account_id=account_id)
+        self.ledger = None
+        self.on_status = None
+        self.posted: list[str] = []
+
+    def upload(self, video, label: str = "") -> bool:
+        self.posted.append(video["path"])
+        return True
+
+    def wait_between_videos(self) -> None:
+        pass
+
+
+def test_process_queue_takes_only_the_session_account(database, tmp_path, video):
+    other = tmp_path / "other.mp4"
+    other.write_bytes(b"other video")
+
+    with JobStore(database) as store:
+        store.enqueue(video, "account")
+        other_id = store.enqueue({"path": str(other), "description": "other"}, "other")
+
+        session = Session("account")
+        assert process_queue(store, session) == 1  # type: ignore[arg-type]
+        assert session.posted == [video["path"]]
+        # the other account's video is not posted with this session's cookies
+        assert store.get(other_id)["status"] == "queued"
+
+
+def test_old_schema_is_migrated(database, video):
+    connection = sqlite3.connect(database)
+    connection.executescript(
+        """
+        CREATE TABLE jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            account TEXT NOT NULL DEFAULT '',
+            path TEXT NOT NULL,
+            video TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            error TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            worker TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            UNIQUE (account, path)
+        );
+        """
+    )
+    connection.close()
+
+    with JobStore(database) as store:
+        assert store.enqueue(video) is not None
+        assert store.claim() is not None
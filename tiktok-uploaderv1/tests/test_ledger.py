@@ -0,0 +1,122 @@
+"""
+Tests for the fingerprints and the posted videos of the upload ledger
+"""
+
+import os
+import shutil
+
+import pytest
+
+from tiktok_uploader import ledger
+from tiktok_uploader.ledger import CHUNK_SIZE, UploadLedger, fingerprint
+
+
+@pytest.fixture
+def store(tmp_path):
+    with UploadLedger(str(tmp_path / "ledger.db")) as store:
+        yield store
+
+
+def write(path, data: bytes, mtime_ns: int | None = None) -> str:
+    path.write_bytes(data)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return str(path)
+
+
+def test_fingerprint_follows_content(tmp_path):
+    video = write(tmp_path / "video.mp4", b"a" * 100)
+    copy = tmp_path / "renamed.mp4"
+    shutil.copy(video, copy)
+    other = write(tmp_path / "other.mp4", b"b" * 100)
+
+    assert fingerprint(video) == fingerprint(str(copy))
+    assert fingerprint(video) != fingerprint(other)
+
+
+def test_fingerprint_hashes_both_ends(tmp_path):
+    size = 3 * CHUNK_SIZE
+    start = bytearray(size)
+    start[0] = 1
+    end = bytearray(size)
+    end[-1] = 1
+    middle = bytearray(size)
+    middle[size // 2] = 1
+
+    plain = fingerprint(write(tmp_path / "plain.mp4", bytes(size)))
+    assert fingerprint(write(tmp_path / "start.mp4", bytes(start))) != plain
+    assert fingerprint(write(tmp_path / "end.mp4", bytes(end))) != plain
+    # only the first and last chunks are read
+    assert fingerprint(write(tmp_path / "middle.mp4", bytes(middle))) == plain
+
+
+def test_fingerprint_is_cached(tmp_path, store, monkeypatch):
+    video = write(tmp_path / "video.mp4", b"a" * 100)
+    expected = store.fingerprint(video)
+
+    calls = []
+    monkeypatch.setattr(
+        ledger, "fingerprint", lambda path: calls.append(path) or "hashed"
+    )
+    assert store.fingerprint(video) == expected
+    assert calls == []
+
+
+def test_cache_survives_reopening(tmp_path, monkeypatch):
+    video = write(tmp_path / "video.mp4", b"a" * 100)
+    with UploadLedger(str(tmp_path / "ledger.db")) as store:
+        expected = store.fingerprint(video)
+
+    monkeypatch.setattr(ledger, "fingerprint", lambda path: "hashed")
+    with UploadLedger(str(tmp_path / "ledger.db")) as store:
+        assert store.fingerprint(video) == expected
+
+
+@pytest.mark.parametrize(
+    "data, mtime_ns",
+    [
+        (b"b" * 100, 2_000_000_000_000_000_000),  # rewritten
+        (b"b" * 200, 1_000_000_000_000_000_000),  # grew, mtime restored
+    ],
+)
+def test_cache_is_invalidated(tmp_path, store, data, mtime_ns):
+    video = tmp_path / "video.mp4"
+    before = store.fingerprint(write(video, b"a" * 100, 1_000_000_000_000_000_000))
+    after = store.fingerprint(write(video, data, mtime_ns))
+
+    assert after != before
+    assert after == fingerprint(str(video))
+
+
+def test_cache_only_compares_the_stat(tmp_path, store):
+    video = tmp_path / "video.mp4"
+    before = store.fingerprint(write(video, b"a" * 100, 1_000_000_000_000_000_000))
+    # same size and mtime, the edit is not seen without hashing every file
+    after = store.fingerprint(write(video, b"b" * 100, 1_000_000_000_000_000_000))
+
+    assert after == before
+
+
+def test_is_uploaded_per_account(tmp_path, store):
+    video = write(tmp_path / "video.mp4", b"a" * 100)
+    copy = tmp_path / "copy.mp4"
+    shutil.copy(video, copy)
+
+    assert not store.is_uploaded(video, "first")
+    store.record(video, "first")
+    assert store.is_uploaded(video, "first")
+    assert store.is_uploaded(str(copy), "first")
+    assert not store.is_uploaded(video, "second")
+
+
+def test_uploads_survive_reopening(tmp_path):
+    video = write(tmp_path / "video.mp4", b"a" * 100)
+    with UploadLedger(str(tmp_path / "ledger.db")) as store:
+        store.record(video, "account")
+    with UploadLedger(str(tmp_path / "ledger.db")) as store:
+        assert store.is_uploaded(video, "account")
+
+
+def test_missing_file(tmp_path, store):
+    with pytest.raises(OSError):
+        store.is_uploaded(str(tmp_path / "missing.mp4"))
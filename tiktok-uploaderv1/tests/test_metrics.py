@@ -0,0 +1,117 @@
+"""
+Tests for the Prometheus text rendering of the metrics
+"""
+
+import urllib.error
+import urllib.request
+
+import pytest
+
+from tiktok_uploader import metrics
+from tiktok_uploader.jobs import JobStore
+from tiktok_uploader.metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_counter():
+    registry = Registry()
+    uploads = registry.register(Counter("uploads_total", "Uploads"))
+    assert registry.render() == (
+        "# HELP uploads_total Uploads\n# TYPE uploads_total counter\nuploads_total 0\n"
+    )
+
+    uploads.inc()
+    uploads.inc(0.5)
+    assert registry.render().splitlines()[-1] == "uploads_total 1.5"
+
+
+def test_labelled_gauge():
+    registry = Registry()
+    depth = registry.register(Gauge("depth", "Depth", ["status"]))
+    # a labelled metric has no sample until it is updated
+    assert registry.render().splitlines()[2:] == []
+
+    depth.set(3, status="queued")
+    depth.inc(status="failed")
+    depth.dec(status="queued")
+    assert registry.render().splitlines()[2:] == [
+        'depth{status="queued"} 2',
+        'depth{status="failed"} 1',
+    ]
+
+
+def test_histogram():
+    registry = Registry()
+    duration = registry.register(
+        Histogram("duration_seconds", "Duration", ["stage"], buckets=[5, 1])
+    )
+    duration.observe(0.5, stage="post")
+    duration.observe(3, stage="post")
+
+    assert registry.render().splitlines()[2:] == [
+        'duration_seconds_bucket{stage="post",le="1"} 1',
+        'duration_seconds_bucket{stage="post",le="5"} 2',
+        'duration_seconds_bucket{stage="post",le="+Inf"} 2',
+        'duration_seconds_sum{stage="post"} 3.5',
+        'duration_seconds_count{stage="post"} 2',
+    ]
+
+
+@pytest.mark.parametrize(
+    "value, escaped",
+    [
+        ("plain", "plain"),
+        ('say "hi"', 'say \\"hi\\"'),
+        ("C:\\videos", "C:\\\\videos"),
+        ("two\nlines", "two\\nlines"),
+        ("çiğdem", "çiğdem"),
+    ],
+)
+def test_label_values_are_escaped(value, escaped):
+    registry = Registry()
+    registry.register(Counter("retries_total", "Retries", ["exception"])).inc(
+        exception=value
+    )
+    assert registry.render().splitlines()[-1] == (
+        f'retries_total{{exception="{escaped}"}} 1'
+    )
+
+
+def test_failing_collector_is_skipped():
+    registry = Registry()
+    gauge = registry.register(Gauge("value", "Value"))
+
+    def broken() -> None:
+        raise RuntimeError("unavailable")
+
+    registry.collectors += [broken, lambda: gauge.set(7)]
+    assert registry.render().splitlines()[-1] == "value 7"
+
+
+def test_queue_depth(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(b"video")
+
+    with JobStore(str(tmp_path / "jobs.db")) as store:
+        store.enqueue({"path": str(path), "description": "test"})
+        rendered = metrics.REGISTRY.render()
+        assert 'tiktok_queue_jobs{status="queued"} 1' in rendered
+        assert 'tiktok_queue_jobs{status="review"} 0' in rendered
+
+    rendered = metrics.REGISTRY.render()
+    assert 'tiktok_queue_jobs{status="queued"} 0' in rendered
+
+
+def test_metrics_server():
+    server = metrics.start_metrics_server(port=0)
+    url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        with urllib.request.urlopen(f"{url}/metrics") as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert b"# TYPE tiktok_uploads_started_total counter" in response.read()
+
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"{url}/other")
+        assert error.value.code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
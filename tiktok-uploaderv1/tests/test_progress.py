@@ -0,0 +1,120 @@
+"""
+Tests for the transfer progress and the detection of stalled transfers
+"""
+
+import math
+from collections import deque
+
+import pytest
+
+from tiktok_uploader import config, progress
+from tiktok_uploader.progress import UploadStalled, _progress, watch_transfer
+from tiktok_uploader.timeouts import MIB
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(progress.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def policy(monkeypatch):
+    monkeypatch.setattr(config, "stall_timeout", 30)
+    monkeypatch.setattr(config.timeouts, "min_throughput", 0.25)
+
+
+class ProgressPage:
+    """
+    A driver whose progress indicator shows the given percents, one per reading
+
+    Every reading takes the interval it waits for, the last percent is shown
+    until the upload finishes after `finish` readings
+    """
+
+    def __init__(self, clock: Clock, percents: list[float | None], finish: int = 0):
+        self.clock = clock
+        self.percents = percents
+        self.finish = finish
+        self.readings = 0
+
+    def execute_async_script(self, script: str, *args) -> dict:
+        self.clock.now += args[-1] / 1000
+        self.readings += 1
+        index = min(self.readings, len(self.percents)) - 1
+        finished = bool(self.finish) and self.readings >= self.finish
+        return {"finished": finished, "percent": self.percents[index]}
+
+
+def test_progress():
+    samples = deque([(0.0, 0), (10.0, 40 * MIB)])
+    assert _progress("video.mp4", 100 * MIB, 40 * MIB, samples, 12.0) == {
+        "path": "video.mp4",
+        "bytes_sent": 40 * MIB,
+        "total_bytes": 100 * MIB,
+        "percent": 40.0,
+        "throughput": 4 * MIB,
+        "eta": 15.0,
+        "elapsed": 12.0,
+    }
+
+
+def test_progress_without_throughput():
+    report = _progress("video.mp4", 100, 0, deque([(5.0, 0)]), 5.0)
+    assert report["throughput"] == 0.0
+    assert report["eta"] is None
+
+
+def test_progress_of_an_empty_file():
+    assert _progress("video.mp4", 0, 0, deque([(5.0, 0)]), 5.0)["percent"] == 100.0
+
+
+def test_finished_transfer(clock, policy):
+    reports = []
+    driver = ProgressPage(clock, [10, 50, 90], finish=3)
+    watch_transfer(driver, "video.mp4", MIB, 600, reports.append, interval=1)  # type: ignore[arg-type]
+
+    assert [report["percent"] for report in reports] == [10.0, 50.0, 100.0]
+
+
+def test_stalled_transfer(clock, policy):
+    driver = ProgressPage(clock, [10, 20])
+    with pytest.raises(UploadStalled):
+        watch_transfer(driver, "video.mp4", MIB, 600, interval=1)  # type: ignore[arg-type]
+
+    # given up once the indicator stood still at 20% for longer than 30s
+    assert driver.readings == 2 + 31
+
+
+def test_slow_large_transfer_is_not_stalled(clock, policy):
+    # a percent of 2 GiB takes about 82s at 0.25 MiB/s
+    size = 2048 * MIB
+    window = size / 100 / (0.25 * MIB)
+    readings = int(window) - 10
+    driver = ProgressPage(clock, [10] * readings + [11], finish=readings + 2)
+    watch_transfer(driver, "video.mp4", size, 600, interval=1)  # type: ignore[arg-type]
+
+    driver = ProgressPage(clock, [10])
+    with pytest.raises(UploadStalled):
+        watch_transfer(driver, "video.mp4", size, 600, interval=1)  # type: ignore[arg-type]
+    assert driver.readings == 1 + math.ceil(window)
+
+
+def test_processing_is_not_stalled(clock, policy):
+    # at 100% the video is being processed, which shows no progress
+    driver = ProgressPage(clock, [100], finish=60)
+    watch_transfer(driver, "video.mp4", MIB, 600, interval=1)  # type: ignore[arg-type]
+
+
+def test_stall_detection_can_be_disabled(clock, policy):
+    driver = ProgressPage(clock, [10], finish=60)
+    watch_transfer(driver, "video.mp4", MIB, 600, stall_timeout=0, interval=1)  # type: ignore[arg-type]
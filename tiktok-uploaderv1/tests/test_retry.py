@@ -0,0 +1,162 @@
+"""
+Tests for retry classification, backoff and budgets
+"""
+
+import pytest
+from selenium.common.exceptions import (
+    InvalidSessionIdException,
+    StaleElementReferenceException,
+    TimeoutException,
+)
+
+from tiktok_uploader import config, retry
+from tiktok_uploader.progress import UploadStalled
+from tiktok_uploader.retry import (
+    Retry,
+    RetryBudget,
+    backoff_delay,
+    classify,
+    retry_budgets,
+)
+
+
+@pytest.fixture
+def policy(monkeypatch):
+    """
+    A fixed policy, without jitter unless a test sets one
+    """
+    for key, value in {
+        "base_delay": 0.5,
+        "max_delay": 8.0,
+        "multiplier": 2.0,
+        "jitter": 0.0,
+        "video_budget": 2,
+    }.items():
+        monkeypatch.setattr(config.retry, key, value)
+    return config.retry
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(retry.time, "monotonic", clock)
+    return clock
+
+
+class PageTimeout(TimeoutException):
+    pass
+
+
+@pytest.mark.parametrize(
+    "exception, kind",
+    [
+        (InvalidSessionIdException(), "fatal"),
+        (FileNotFoundError(), "fatal"),
+        (StaleElementReferenceException(), "no_backoff"),
+        (UploadStalled("stalled"), "no_backoff"),
+        (TimeoutException(), "backoff"),
+        (ValueError(), "backoff"),
+    ],
+)
+def test_classify(exception, kind):
+    assert classify(exception) == kind
+
+
+def test_classify_matches_base_classes(monkeypatch):
+    monkeypatch.setattr(config.retry, "fatal", ["TimeoutException"])
+    assert classify(PageTimeout()) == "fatal"
+
+
+def test_backoff_is_exponential_and_capped(policy):
+    assert [backoff_delay(n) for n in range(6)] == [0.5, 1, 2, 4, 8, 8]
+
+
+def test_no_backoff_waits_the_base_delay(policy):
+    assert backoff_delay(5, "no_backoff") == 0.5
+
+
+def test_backoff_jitter(policy, monkeypatch):
+    policy.jitter = 0.5
+    monkeypatch.setattr(retry.random, "random", lambda: 1.0)
+    assert backoff_delay(2) == 1
+    monkeypatch.setattr(retry.random, "random", lambda: 0.0)
+    assert backoff_delay(2) == 2
+
+
+def test_budget_limit():
+    budget = RetryBudget(2)
+    assert budget.take()
+    assert budget.take()
+    assert not budget.take()
+    assert budget.spent == 2
+
+
+def test_unlimited_budget():
+    budget = RetryBudget(None)
+    assert all(budget.take() for _ in range(100))
+
+
+def test_budget_window(clock):
+    budget = RetryBudget(2, window=60)
+    assert budget.take()
+    clock.now += 30
+    assert budget.take()
+    assert not budget.take()
+
+    # the first retry leaves the window
+    clock.now += 31
+    assert budget.take()
+    assert not budget.take()
+    assert budget.spent == 2
+
+
+def test_retry_sleeps_the_backoff(policy):
+    slept = []
+    loop = Retry("test", attempts=3, sleep=slept.append)
+    with pytest.raises(TimeoutException):
+        for _ in loop:
+            loop.failed(TimeoutException())
+
+    assert loop.attempt == 3
+    assert slept == [0.5, 1]
+
+
+def test_retry_never_retries_fatal(policy):
+    slept = []
+    loop = Retry("test", attempts=3, sleep=slept.append)
+    with pytest.raises(InvalidSessionIdException):
+        for _ in loop:
+            loop.failed(InvalidSessionIdException())
+
+    assert loop.attempt == 1
+    assert slept == []
+
+
+def test_video_budget_is_shared_by_stages(policy):
+    with retry_budgets() as budget:
+        first = Retry("first", attempts=5, sleep=lambda delay: None)
+        assert first.allow(TimeoutException())
+        assert first.allow(TimeoutException())
+
+        second = Retry("second", attempts=5, sleep=lambda delay: None)
+        assert not second.allow(TimeoutException())
+        assert budget.spent == 2
+
+    # outside of an upload only the loop's own attempts count
+    assert Retry("third", attempts=5).allow(TimeoutException())
+
+
+def test_worker_budget(policy):
+    worker = RetryBudget(1, scope="worker")
+    with retry_budgets(worker):
+        assert Retry("first", attempts=5).allow(TimeoutException())
+    with retry_budgets(worker):
+        assert not Retry("second", attempts=5).allow(TimeoutException())
@@ -0,0 +1,102 @@
+"""
+Tests for reading the upload manifest of the scheduler
+"""
+
+import datetime
+import json
+
+import pytest
+
+from tiktok_uploader.scheduler import load_manifest
+
+
+@pytest.fixture
+def account(tmp_path):
+    path = tmp_path / "account.txt"
+    path.write_text("cookies")
+    return str(path)
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    path = tmp_path / "manifest.json"
+
+    def write(entries: object) -> str:
+        path.write_text(json.dumps(entries))
+        return str(path)
+
+    return write
+
+
+def test_inline_and_listed_videos(manifest, account):
+    jobs = load_manifest(
+        manifest(
+            [
+                {"account": account, "path": "a.mp4", "description": "#a"},
+                {"account": account, "videos": [{"path": "b.mp4"}, {"path": "c.mp4"}]},
+            ]
+        )
+    )
+    assert jobs == [
+        {"account": account, "video": {"path": "a.mp4", "description": "#a"}},
+        {"account": account, "video": {"path": "b.mp4"}},
+        {"account": account, "video": {"path": "c.mp4"}},
+    ]
+
+
+def test_schedule_is_parsed(manifest, account):
+    (job,) = load_manifest(
+        manifest(
+            [
+                {
+                    "account": account,
+                    "path": "a.mp4",
+                    "schedule": "2026-01-02T03:05:00+00:00",
+                }
+            ]
+        )
+    )
+    assert job["video"]["schedule"] == datetime.datetime(
+        2026, 1, 2, 3, 5, tzinfo=datetime.timezone.utc
+    )
+
+
+def test_empty_manifest(manifest):
+    assert load_manifest(manifest([])) == []
+
+
+@pytest.mark.parametrize(
+    "entries, message",
+    [
+        ({"account": "a.txt"}, "must be a list of jobs"),
+        ([{"path": "a.mp4"}], "entry 1 has no account"),
+        (["a.mp4"], "entry 1 has no account"),
+        ([{"account": "{account}"}], "entry 1 has a video without a path"),
+        (
+            [{"account": "{account}", "videos": [{"path": "a.mp4"}, {}]}],
+            "entry 1 has a video without a path",
+        ),
+        (
+            [{"account": "{account}", "path": "a.mp4", "schedule": "tomorrow"}],
+            "entry 1 has an invalid schedule: tomorrow",
+        ),
+        (
+            [{"account": "{account}", "path": "a.mp4", "schedule": 1700000000}],
+            "entry 1 has an invalid schedule: 1700000000",
+        ),
+    ],
+)
+def test_invalid_entries(manifest, account, entries, message):
+    text = json.dumps(entries).replace("{account}", account)
+    with pytest.raises(ValueError, match=message):
+        load_manifest(manifest(json.loads(text)))
+
+
+def test_unknown_account(manifest, account, tmp_path):
+    missing = str(tmp_path / "missing.txt")
+    entries = [
+        {"account": account, "path": "a.mp4"},
+        {"account": missing, "path": "b.mp4"},
+    ]
+    with pytest.raises(FileNotFoundError, match="manifest entry 2"):
+        load_manifest(manifest(entries))
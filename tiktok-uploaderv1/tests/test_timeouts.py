@@ -0,0 +1,150 @@
+"""
+Tests for the latency percentiles behind adaptive timeouts
+"""
+
+import json
+
+import pytest
+
+from tiktok_uploader import config
+from tiktok_uploader.timeouts import (
+    BUCKETS,
+    MIB,
+    AdaptiveTimeouts,
+    LatencyStore,
+    wait_deadline,
+)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "latencies.json"
+
+
+@pytest.fixture
+def policy(monkeypatch):
+    for key, value in {
+        "adaptive": True,
+        "percentile": 0.9,
+        "margin": 2.0,
+        "floor": 1.0,
+        "min_samples": 3,
+        "min_throughput": 0.0,
+    }.items():
+        monkeypatch.setattr(config.timeouts, key, value)
+    return config.timeouts
+
+
+def bucket(seconds: float) -> float:
+    """
+    The upper bound of the bucket a latency is counted in
+    """
+    return min(bound for bound in BUCKETS if bound >= seconds)
+
+
+def test_quantile(path):
+    store = LatencyStore(path)
+    for seconds in [1] * 9 + [10]:
+        store.observe("upload", seconds)
+
+    assert store.quantile("upload", 0.5) == bucket(1)
+    assert store.quantile("upload", 0.9) == bucket(1)
+    assert store.quantile("upload", 1.0) == bucket(10)
+
+
+def test_quantile_is_none_without_latencies(path):
+    assert LatencyStore(path).quantile("upload", 0.9) is None
+
+
+def test_latencies_beyond_the_last_bucket(path):
+    store = LatencyStore(path)
+    store.observe("upload", 10 * BUCKETS[-1])
+    assert store.quantile("upload", 0.9) == BUCKETS[-1]
+
+
+def test_quantile_falls_back_to_aggregates(path):
+    store = LatencyStore(path)
+    store.observe("upload", 2, account="first", proxy="proxy")
+    store.observe("upload", 2, account="first", proxy="proxy")
+    store.observe("upload", 8, account="first", proxy="other")
+    store.observe("upload", 30, account="second")
+
+    # the exact key has enough latencies
+    assert store.quantile("upload", 1.0, "first", "proxy", min_samples=2) == bucket(2)
+    # a new proxy starts from what the account's other proxies saw
+    assert store.quantile("upload", 1.0, "first", "new", min_samples=2) == bucket(8)
+    # a new account from what every account saw
+    assert store.quantile("upload", 1.0, "new", "new", min_samples=4) == bucket(30)
+    assert store.quantile("upload", 1.0, "new", "new", min_samples=5) is None
+
+
+def test_save_merges_processes(path):
+    first = LatencyStore(path)
+    second = LatencyStore(path)
+    first.observe("upload", 1)
+    second.observe("upload", 1)
+    second.observe("upload", 10)
+    first.save()
+    second.save()
+
+    store = LatencyStore(path)
+    counts = dict(zip(BUCKETS, store._counts["upload|*|*"]))
+    assert counts[bucket(1)] == 2
+    assert counts[bucket(10)] == 1
+    # the first save is not counted twice by a second one
+    second.save()
+    assert LatencyStore(path)._counts == store._counts
+
+
+def test_file_with_other_buckets_is_ignored(path):
+    path.write_text(json.dumps({"buckets": [1, 2, 3], "counts": {"upload|*|*": [1]}}))
+    assert LatencyStore(path).quantile("upload", 0.9) is None
+
+
+def test_corrupt_file_is_ignored(path):
+    path.write_text("{not json")
+    store = LatencyStore(path)
+    store.observe("upload", 1)
+    store.save()
+    assert LatencyStore(path).quantile("upload", 0.9) == bucket(1)
+
+
+def test_deadline_uses_the_configured_timeout_until_learned(path, policy):
+    timeouts = AdaptiveTimeouts(LatencyStore(path))
+    assert timeouts.deadline("upload", 30) == 30
+
+    for _ in range(3):
+        timeouts.observe("upload", 2)
+    assert timeouts.deadline("upload", 30) == bucket(2) * policy.margin
+
+
+def test_deadline_floor(path, policy):
+    timeouts = AdaptiveTimeouts(LatencyStore(path))
+    for _ in range(3):
+        timeouts.observe("upload", 0.01)
+    assert timeouts.deadline("upload", 30) == policy.floor
+
+
+def test_transfer_is_learned_per_mib(path, policy):
+    timeouts = AdaptiveTimeouts(LatencyStore(path))
+    for _ in range(3):
+        timeouts.observe("transfer", 20, size=10 * MIB)
+
+    per_mib = bucket(2) * policy.margin
+    assert timeouts.deadline("transfer", 30, size=10 * MIB) == pytest.approx(
+        10 * per_mib
+    )
+    assert timeouts.deadline("transfer", 30, size=100 * MIB) == pytest.approx(
+        100 * per_mib
+    )
+
+
+def test_wait_deadline(path, policy):
+    timeouts = AdaptiveTimeouts(LatencyStore(path))
+    for _ in range(3):
+        timeouts.observe("upload", 2)
+
+    assert wait_deadline(None, "upload", 30) == 30
+    assert wait_deadline(timeouts, "upload", 30) == bucket(2) * policy.margin
+    policy.adaptive = False
+    assert wait_deadline(timeouts, "upload", 30) == 30
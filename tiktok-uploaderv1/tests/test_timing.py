@@ -0,0 +1,199 @@
+"""
+Tests for the stage spans, command counts and reports of upload traces
+"""
+
+import json
+
+import pytest
+
+from tiktok_uploader import timing
+from tiktok_uploader.timing import (
+    UploadTrace,
+    command_activity,
+    command_count,
+    count_commands,
+    record_retry,
+    write_trace,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(timing.time, "perf_counter", clock)
+    return clock
+
+
+class Driver:
+    """
+    Answers every WebDriver command with nothing
+    """
+
+    def execute(self, command: str, params: dict | None = None) -> None:
+        pass
+
+
+@pytest.fixture
+def driver():
+    driver = Driver()
+    count_commands(driver)  # type: ignore[arg-type]
+    return driver
+
+
+def test_commands_are_counted_once(driver):
+    count_commands(driver)  # counting twice does not wrap it twice
+    driver.execute("getTitle")
+    driver.execute("getCurrentUrl")
+
+    assert command_count(driver) == 2
+    assert command_activity(driver)[0] == 0  # nothing waits for an answer
+
+
+def test_commands_of_an_uncounted_driver():
+    assert command_count(Driver()) == 0  # type: ignore[arg-type]
+    assert command_activity(Driver()) is None  # type: ignore[arg-type]
+    assert command_count(None) == 0
+
+
+def test_span(clock, driver):
+    trace = UploadTrace("video.mp4", "account", driver)
+    clock.now += 1
+    with trace.span("set_video") as span:
+        assert trace.running() == ("set_video", 0)
+        clock.now += 2.5
+        driver.execute("findElement")
+        driver.execute("sendKeys")
+
+    assert trace.running() is None
+    assert span == {
+        "stage": "set_video",
+        "attempt": 1,
+        "start": 1.0,
+        "duration": 2.5,
+        "commands": 2,
+        "retries": 0,
+        "retry_errors": [],
+        "error": None,
+        "background": False,
+    }
+
+
+def test_nested_spans(clock, driver):
+    trace = UploadTrace(driver=driver)
+    with trace.span("outer") as outer:
+        driver.execute("findElement")
+        clock.now += 1
+        with trace.span("inner") as inner:
+            assert trace.running() == ("inner", 0)
+            driver.execute("click")
+            clock.now += 2
+            record_retry(TimeoutError())
+        assert trace.running() == ("outer", 3)
+        record_retry()
+
+    # a span is recorded when it ends, the outer one covers the inner one
+    assert [span["stage"] for span in trace.stages] == ["inner", "outer"]
+    assert (inner["start"], inner["duration"], inner["commands"]) == (1.0, 2.0, 1)
+    assert (outer["start"], outer["duration"], outer["commands"]) == (0.0, 3.0, 2)
+    # a retry counts against the stage running when it happened
+    assert (inner["retries"], inner["retry_errors"]) == (1, ["TimeoutError"])
+    assert (outer["retries"], outer["retry_errors"]) == (1, [])
+
+
+def test_retry_outside_of_a_span_is_not_counted():
+    record_retry(TimeoutError())
+    trace = UploadTrace()
+    with trace.span("stage") as span:
+        pass
+    assert span["retries"] == 0
+
+
+def test_failed_span(clock):
+    trace = UploadTrace()
+    with pytest.raises(TimeoutError):
+        with trace.span("post_video"):
+            clock.now += 1
+            raise TimeoutError("no confirmation")
+
+    (span,) = trace.stages
+    assert span["error"] == "TimeoutError: no confirmation"
+    assert span["duration"] == 1.0
+    assert trace.running() is None
+
+
+def test_spans_of_later_attempts(clock):
+    trace = UploadTrace()
+    with trace.span("set_video"):
+        pass
+    trace.attempt = 2
+    with trace.span("set_video"):
+        pass
+    assert [span["attempt"] for span in trace.stages] == [1, 2]
+
+
+def test_background_span(clock):
+    trace = UploadTrace()
+    clock.now += 10
+    span = trace.add_span("await_processing", 4)
+    assert (span["start"], span["duration"], span["background"]) == (6.0, 4, True)
+
+
+def test_to_dict(clock, driver):
+    trace = UploadTrace("video.mp4", "account", driver)
+    with trace.span("set_video"):
+        driver.execute("sendKeys")
+        record_retry()
+        clock.now += 1
+    with trace.span("post_video"):
+        driver.execute("click")
+        clock.now += 2
+    trace.success = True
+
+    record = trace.to_dict()
+    assert record["path"] == "video.mp4"
+    assert record["account"] == "account"
+    assert record["total"] == 3.0
+    assert record["attempts"] == 1
+    assert record["success"] is True
+    assert record["commands"] == 2
+    assert record["retries"] == 1
+    assert record["stages"] == trace.stages
+
+
+def test_report(clock, driver):
+    trace = UploadTrace(driver=driver)
+    with trace.span("set_video"):
+        driver.execute("sendKeys")
+        record_retry()
+        clock.now += 1.5
+    trace.add_span("await_processing", 4)
+    with trace.span("post_video"):
+        driver.execute("click")
+        driver.execute("click")
+        clock.now += 0.25
+
+    # the background span overlaps the others and is left out of the total
+    assert trace.report() == (
+        "set_video 1.50s/1cmd/1retry, await_processing 4.00s/0cmd (background),"
+        " post_video 0.25s/2cmd (total 1.75s)"
+    )
+
+
+def test_write_trace(tmp_path, clock):
+    path = str(tmp_path / "trace.jsonl")
+    first, second = UploadTrace("çiçek.mp4"), UploadTrace("b.mp4")
+    write_trace(path, first.to_dict())
+    write_trace(path, second.to_dict())
+
+    with open(path, encoding="utf-8") as file:
+        lines = file.read().splitlines()
+    assert [json.loads(line)["path"] for line in lines] == ["çiçek.mp4", "b.mp4"]
+    assert "çiçek" in lines[0]
@@ -0,0 +1,192 @@
+"""
+Tests for the settling of new videos in watched folders
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+from tiktok_uploader import watch
+from tiktok_uploader.watch import FolderWatcher
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(watch.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def watcher(tmp_path):
+    with FolderWatcher(
+        [str(tmp_path)], settle=3, closed_settle=0.5, use_inotify=False
+    ) as watcher:
+        yield watcher
+
+
+def write(path, data: bytes = b"video") -> str:
+    with open(path, "ab") as file:
+        file.write(data)
+    return str(path)
+
+
+def test_video_is_reported_once_it_settled(tmp_path, clock, watcher):
+    path = write(tmp_path / "video.mp4")
+    watcher._scan()
+    assert watcher.ready() == []
+
+    clock.now += 3
+    assert watcher.ready() == [path]
+    # neither a later check nor a scan finding it again reports it twice
+    watcher._scan()
+    assert watcher.ready() == []
+
+
+def test_growing_video_is_waited_for(tmp_path, clock, watcher):
+    path = write(tmp_path / "video.mp4")
+    watcher._scan()
+
+    clock.now += 2
+    write(path, b" more")
+    assert watcher.ready() == []
+
+    # the settle time starts over from the last change
+    clock.now += 2
+    assert watcher.ready() == []
+    clock.now += 1
+    assert watcher.ready() == [path]
+
+
+def test_closed_video_settles_sooner(tmp_path, clock, watcher):
+    path = write(tmp_path / "video.mp4")
+    watcher._touch(path, closed=True)
+
+    clock.now += 0.5
+    assert watcher.ready() == [path]
+
+
+def test_closed_video_written_again_waits_the_full_settle(tmp_path, clock, watcher):
+    path = write(tmp_path / "video.mp4")
+    watcher._touch(path, closed=True)
+    write(path, b" more")
+
+    clock.now += 0.5
+    assert watcher.ready() == []
+    clock.now += 3
+    assert watcher.ready() == [path]
+
+
+def test_videos_are_reported_in_the_order_they_arrived(tmp_path, clock, watcher):
+    first = write(tmp_path / "b.mp4")
+    watcher._touch(first, closed=False)
+    clock.now += 1
+    second = write(tmp_path / "a.mov")
+    watcher._touch(second, closed=False)
+
+    clock.now += 3
+    assert watcher.ready() == [first, second]
+
+
+def test_other_files_are_ignored(tmp_path, clock, watcher):
+    for name in ("video.mp4.part", "video.mp4.crdownload", ".hidden.mp4", "notes.txt"):
+        write(tmp_path / name)
+    (tmp_path / "folder.mp4").mkdir()
+    watcher._scan()
+
+    clock.now += 3
+    assert watcher.ready() == []
+
+
+def test_empty_video_is_not_reported(tmp_path, clock, watcher):
+    path = write(tmp_path / "video.mp4", b"")
+    watcher._scan()
+    clock.now += 3
+    assert watcher.ready() == []
+
+    # the check after it was written starts the settle time
+    write(path)
+    assert watcher.ready() == []
+    clock.now += 3
+    assert watcher.ready() == [path]
+
+
+def test_deleted_video_is_forgotten(tmp_path, clock, watcher):
+    path = write(tmp_path / "video.mp4")
+    watcher._scan()
+    os.remove(path)
+
+    clock.now += 3
+    assert watcher.ready() == []
+    assert watcher._pending == {}
+
+
+def test_replaced_video_is_reported_again(tmp_path, clock, watcher):
+    path = write(tmp_path / "video.mp4")
+    watcher._scan()
+    clock.now += 3
+    assert watcher.ready() == [path]
+
+    write(path, b" replaced")
+    watcher._scan()
+    clock.now += 3
+    assert watcher.ready() == [path]
+
+
+def test_polling_backend(tmp_path):
+    with FolderWatcher([str(tmp_path)], use_inotify=False) as watcher:
+        assert watcher.backend == "polling"
+
+
+def test_polling_when_inotify_is_unavailable(tmp_path, monkeypatch):
+    def unavailable(folders):
+        raise OSError(24, "too many open files")
+
+    monkeypatch.setattr(watch, "_Inotify", unavailable)
+    with FolderWatcher([str(tmp_path)]) as watcher:
+        assert watcher.backend == "polling"
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify")
+def test_inotify_backend(tmp_path):
+    with FolderWatcher([str(tmp_path)]) as watcher:
+        assert watcher.backend == "inotify"
+
+
+@pytest.mark.parametrize("use_inotify", [False, True])
+def test_watch(tmp_path, use_inotify):
+    existing = write(tmp_path / "existing.mp4")
+    new = str(tmp_path / "new.mp4")
+    found = []
+    stop = threading.Event()
+    # a watcher which never reports the videos fails instead of hanging
+    timer = threading.Timer(10, stop.set)
+    timer.start()
+    try:
+        with FolderWatcher(
+            [str(tmp_path)],
+            settle=0.2,
+            closed_settle=0.1,
+            poll_interval=0.05,
+            use_inotify=use_inotify,
+        ) as watcher:
+            for path in watcher.watch(stop):
+                found.append(path)
+                if path == existing:
+                    write(new)
+                else:
+                    stop.set()
+    finally:
+        timer.cancel()
+
+    assert found == [existing, new]